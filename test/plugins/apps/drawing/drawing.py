@@ -22,12 +22,73 @@ from tichy import gui
 from tichy.gui import Vect, Rect
 
 import pygame
-import Numeric
+import pygame.surfarray
+import numpy
 
 import logging
 logger = logging.getLogger('App.Drawing')
 
 
+def brush_alpha(dist, radius):
+    """Return the alpha of the brush at some distances from its center
+    """
+    return numpy.clip(radius + 0.5 - dist, 0, radius) * 255 / radius
+
+
+def alpha_surface(alpha, color):
+    """Return a surface of a color with an array of alpha values"""
+    ret = pygame.Surface(alpha.shape, pygame.SRCALPHA, 32)
+    ret.fill(color)
+    pixels = pygame.surfarray.pixels_alpha(ret)
+    pixels[...] = alpha
+    del pixels
+    return ret
+
+
+# The brushes surfaces, indexed by (radius, color)
+brushes = {}
+
+
+def brush_surface(radius, color):
+    """Return the surface of a brush
+
+    The center of the brush is at (radius, radius).
+    """
+    key = (radius, color)
+    ret = brushes.get(key)
+    if ret is None:
+        x, y = numpy.indices((radius * 2, radius * 2))
+        dist = numpy.hypot(x - radius, y - radius)
+        ret = alpha_surface(brush_alpha(dist, radius), color)
+        brushes[key] = ret
+    return ret
+
+
+def stroke_surface(start, end, radius, color):
+    """Return the surface of a stroke of the brush between two points
+
+    Rather than stamping the brush at some points between the ends,
+    we compute at once for all the pixels their distance to the
+    segment, so the stroke has no gaps however fast we move.
+
+    :Returns: (surface, position of the surface)
+    """
+    x0 = min(start[0], end[0]) - radius
+    y0 = min(start[1], end[1]) - radius
+    width = abs(end[0] - start[0]) + radius * 2
+    height = abs(end[1] - start[1]) + radius * 2
+    x, y = numpy.indices((width, height))
+    # The pixels coordinates relative to the start of the stroke
+    x += x0 - start[0]
+    y += y0 - start[1]
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    # The position of the nearest point of the segment
+    t = (x * dx + y * dy) / float(max(dx * dx + dy * dy, 1))
+    t = numpy.clip(t, 0, 1)
+    dist = numpy.hypot(x - t * dx, y - t * dy)
+    return alpha_surface(brush_alpha(dist, radius), color), (x0, y0)
+
+
 class DrawingWidget(gui.SurfWidget):
 
     def __init__(self, parent, size):
@@ -61,46 +122,25 @@ class DrawingWidget(gui.SurfWidget):
         self.need_redraw(self.rect)
 
     def update_shape(self):
-        radius = self.radius
-        self.shape = pygame.Surface((radius * 2, radius * 2),
-                                    pygame.SRCALPHA, 32).convert_alpha()
-        self.shape.fill(self.color)
-        alpha = pygame.surfarray.pixels_alpha(self.shape)
-        x, y = Numeric.indices((radius * 2, radius * 2))
-        dist = Numeric.sqrt((x - radius)**2 + (y - radius)**2)
-        a = radius + 0.5 - dist
-        a = Numeric.clip(a, 0, radius) * 255 / radius
-        alpha[:] = a.astype(alpha.typecode())
-        # alpha[:,:] = 255
-        del alpha
+        self.shape = brush_surface(self.radius, self.color)
 
     def clickable(self):
         return True
 
     def mouse_down(self, pos):
         self.mouse_pos = pos
-        self.mouse_motion(pos)
+        corner = pos - Vect(self.radius, self.radius)
+        self.surface.blit(self.shape, corner)
+        self.need_redraw(Rect(corner, self.shape.get_size()))
         return True
 
     def mouse_motion(self, pos):
-        # We need to draw several rects...
-        dist = pos - self.mouse_pos
-        norm = abs(dist.x) + abs(dist.y)
-        nb_points = norm / self.radius + 1
-
-        redraw_rect = Rect(pos, (0, 0))
-
-        color = self.surface.map_rgb(self.color)
-        for i in range(nb_points):
-            ipos = (self.mouse_pos * i + pos * (nb_points - i)) / nb_points
-            # rect = (ipos.x, ipos.y, self.pen_size, self.pen_size)
-            self.surface.blit(self.shape, (ipos.x, ipos.y))
-            # self.surface.fill(color, rect)
-            # TODO: allow better rect constructors
-            redraw_rect = redraw_rect.merge(Rect(
-                    (ipos.x, ipos.y),
-                    (self.radius * 2, self.radius * 2)))
-        self.need_redraw(redraw_rect)
+        if pos == self.mouse_pos:
+            return
+        surf, corner = stroke_surface(self.mouse_pos, pos, self.radius,
+                                      self.color)
+        self.surface.blit(surf, corner)
+        self.need_redraw(Rect(corner, surf.get_size()))
         self.mouse_pos = pos
 
 
@@ -28,39 +28,121 @@ from application_view import ApplicationFrame
 
 
 class ListView(gui.Scrollable):
+    """Sliding view of a list
+
+    The view is updated incrementally when the list is modified : we
+    only create the views of the new items and destroy the views of
+    the removed ones. The modifications that have their own signal
+    are applied directly, we only compare the whole list with the
+    views after the other ones (e.g. a sort).
+    """
 
     def __init__(self, parent, list, expand=True, **kargs):
         super(ListView, self).__init__(parent, item=list, axis=1, border=0,
                                        spacing=0, expand=expand)
         vbox = gui.Box(self, axis=1)
+        # The items currently shown, in the same order than the box
+        # children
+        self.items = []
+        # True if the last modification of the list has already been
+        # applied by the handler of its own signal
+        self.applied = False
         # We add the already present items :
         for item in list:
-            item.view(vbox)
+            self._insert_view(vbox, len(self.items), item)
 
         self.monitor(list, 'appened', self.on_appened, vbox)
         self.monitor(list, 'removed', self.on_removed, vbox)
         self.monitor(list, 'cleared', self.on_clear, vbox)
         self.monitor(list, 'inserted', self.on_insert, vbox)
+        self.monitor(list, 'changed', self.on_changed, vbox)
+        self.monitor(list, 'modified', self.on_modified, vbox)
+
+    def _insert_view(self, view, index, item):
+        """Create the view of an item at a given position in the box"""
+        item.view(view)
+        # The view has been added at the end of the box
+        view.move_child(view.children[-1], index)
+        self.items.insert(index, item)
+
+    def _remove_view(self, view, index):
+        """Destroy the view of the item at a given position"""
+        del self.items[index]
+        view.children[index].destroy()
+
+    def _index(self, value):
+        for i, item in enumerate(self.items):
+            if item is value:
+                return i
+        raise ValueError(value)
 
     def on_appened(self, list, value, view):
-        value.view(view)
+        self._insert_view(view, len(self.items), value)
+        self.applied = True
 
     def on_removed(self, list, value, view):
-        for c in view.children[:]:
-            c.destroy()
-        for item in list:
-            item.view(view)
+        self._remove_view(view, self._index(value))
+        self.applied = True
 
     def on_clear(self, list, view):
+        self.items = []
         for c in view.children[:]:
             c.destroy()
+        self.applied = True
 
     def on_insert(self, list, index, value, view):
-        # Sub optimal way of doing...
-        for c in view.children[:]:
-            c.destroy()
+        # We use the same rules than python list insert
+        if index < 0:
+            index = max(0, len(self.items) + index)
+        index = min(index, len(self.items))
+        self._insert_view(view, index, value)
+        self.applied = True
+
+    def on_changed(self, list, change, view):
+        # Called after a batch of modifications
+        for start, stop in reversed(change.removed):
+            for i in reversed(range(start, stop)):
+                self._remove_view(view, i)
+        for start, stop in change.added:
+            for i in range(start, stop):
+                self._insert_view(view, i, list[i])
+        if change.moved:
+            self._sync(view, list)
+        self.applied = True
+
+    def on_modified(self, list, view):
+        # Emitted after every modification, including the ones without
+        # a specific signal (e.g. sort or slice assignment)
+        if self.applied:
+            self.applied = False
+            return
+        if len(self.items) != len(list) or \
+                not all(a is b for a, b in zip(self.items, list)):
+            self._sync(view, list)
+
+    def _sync(self, view, list):
+        """Make the views match the list
+
+        We reuse the views of the items still in the list, so we only
+        create the views of the new items.
+        """
+        views = {}
+        for item, child in zip(self.items, view.children):
+            views.setdefault(id(item), []).append(child)
+        children = []
         for item in list:
-            item.view(view)
+            reused = views.get(id(item))
+            if reused:
+                children.append(reused.pop(0))
+            else:
+                item.view(view)
+                children.append(view.children[-1])
+        # The views left are the ones of the removed items
+        for reused in views.values():
+            for child in reused:
+                child.destroy()
+        view.reorder(children)
+        self.items = list[:]
 
 
 class Default(Service):
@@ -80,11 +162,25 @@ class Default(Service):
     def __init__(self):
         self.selected = None
 
-    def view_list(self, parent, list, **kargs):
-        return ListView(parent, list, **kargs)
-
-    def view_actor_list(self, parent, items, **kargs):
-        return self.view_list(parent, items, **kargs)
+    # Lists bigger than this are shown using a gui.VirtualList
+    virtual_list_size = 64
+    # The lists of actors (e.g. the contacts or the messages of the
+    # services) often grow after we create their view, and the views
+    # of the actors all have the same height, so we always show them
+    # using a gui.VirtualList
+    virtual_actor_lists = True
+
+    def view_list(self, parent, list, expand=True, **kargs):
+        if len(list) > self.virtual_list_size:
+            return gui.VirtualList(parent, list, border=0, spacing=0,
+                                   expand=expand)
+        return ListView(parent, list, expand=expand, **kargs)
+
+    def view_actor_list(self, parent, items, expand=True, **kargs):
+        if self.virtual_actor_lists:
+            return gui.VirtualList(parent, items, border=0, spacing=0,
+                                   expand=expand)
+        return self.view_list(parent, items, expand=expand, **kargs)
 
     def view_actor(self, parent, actor, **kargs):
         ret = gui.Button(parent, item=actor, holdable=1000, **kargs)
@@ -56,10 +56,17 @@ class ActorsTable(gui.Frame):
             self._add(actor)
 
         self.monitor(list, 'appened', self._on_appened)
+        self.monitor(list, 'changed', self._on_changed)
 
     def _on_appened(self, list, actor):
         self._add(actor)
 
+    def _on_changed(self, list, change):
+        for c in self.table.children[:]:
+            c.destroy()
+        for actor in list:
+            self._add(actor)
+
     def _add(self, actor):
         view = ActorView(self.table, actor)
 
@@ -0,0 +1,118 @@
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests of the input file descriptors of the events loop
+
+We can't count on a X server here, so we check that we fall back to
+polling whenever the X connection can't be found.
+
+usage : python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import ctypes
+import unittest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, root_dir)
+
+import pygame
+
+from tichy.guip import mainloop
+
+
+class XConnectionTest(unittest.TestCase):
+
+    def setUp(self):
+        pygame.display.init()
+        self.get_driver = pygame.display.get_driver
+        self.get_wm_info = pygame.display.get_wm_info
+
+    def tearDown(self):
+        pygame.display.get_driver = self.get_driver
+        pygame.display.get_wm_info = self.get_wm_info
+        pygame.display.quit()
+
+    def fake_x11(self, wm_info):
+        pygame.display.get_driver = lambda: 'x11'
+        pygame.display.get_wm_info = wm_info
+
+    def test_not_x11(self):
+        pygame.display.get_driver = lambda: 'dummy'
+        self.assertEqual(mainloop.x_connection_fd(), None)
+
+    def test_no_display(self):
+        self.fake_x11(lambda: {})
+        self.assertEqual(mainloop.x_connection_fd(), None)
+
+    def test_unknown_display(self):
+        self.fake_x11(lambda: {'display': object()})
+        self.assertEqual(mainloop.x_connection_fd(), None)
+
+    def test_error(self):
+        def wm_info():
+            raise pygame.error('video system not initialized')
+        self.fake_x11(wm_info)
+        self.assertEqual(mainloop.x_connection_fd(), None)
+
+    def test_capsule_pointer(self):
+        new = ctypes.pythonapi.PyCapsule_New
+        new.restype = ctypes.py_object
+        new.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_void_p]
+        capsule = new(1234, 'display', None)
+        self.assertEqual(mainloop._void_pointer(ctypes, capsule), 1234)
+        self.assertEqual(mainloop._void_pointer(ctypes, object()), None)
+
+
+class InputFdsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.x_connection_fd = mainloop.x_connection_fd
+
+    def tearDown(self):
+        mainloop.x_connection_fd = self.x_connection_fd
+
+    def loop(self, event_driven, input_fds=None):
+        loop = mainloop.EventsLoop()
+        loop.event_driven = event_driven
+        loop.input_fds = input_fds
+        return loop
+
+    def test_polling(self):
+        mainloop.x_connection_fd = lambda: 3
+        self.assertEqual(self.loop(False).find_input_fds(), [])
+
+    def test_x_connection(self):
+        mainloop.x_connection_fd = lambda: 3
+        self.assertEqual(self.loop(True).find_input_fds(), [3])
+
+    def test_no_x_connection(self):
+        mainloop.x_connection_fd = lambda: None
+        self.assertEqual(self.loop(True).find_input_fds(), [])
+
+    def test_input_fds(self):
+        mainloop.x_connection_fd = lambda: 3
+        self.assertEqual(self.loop(True, (5, 6)).find_input_fds(), [5, 6])
+
+
+if __name__ == '__main__':
+    unittest.main()
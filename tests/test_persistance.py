@@ -0,0 +1,100 @@
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests of the journaled `Persistance` files
+
+usage : python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, root_dir)
+
+from tichy.persistance import Persistance
+
+
+class JournalTest(unittest.TestCase):
+
+    codec = 'yaml'
+
+    def setUp(self):
+        self.base_path = Persistance.base_path
+        Persistance.base_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(Persistance.base_path)
+        Persistance.base_path = self.base_path
+
+    def persistance(self):
+        # A new instance doesn't share the journal state of the others
+        Persistance._Persistance__journals.clear()
+        return Persistance('journal', journal=True, delay=0,
+                           codec=self.codec)
+
+    def journal_path(self):
+        return self.persistance()._path() + '.journal'
+
+    def test_save_load(self):
+        records = [{'a': 1}, {'a': 2}]
+        p = self.persistance()
+        p.save(records)
+        records.append({'a': 3})
+        p.save(records)
+        self.assertEqual(self.persistance().load(), records)
+
+    def test_torn_append(self):
+        p = self.persistance()
+        p.save([{'a': 1}])
+        p.save([{'a': 1}, {'a': 2}])
+        # We crash while appending an entry
+        f = open(self.journal_path(), 'ab')
+        f.write('{index: 2, op: add, rec')
+        f.close()
+        p = self.persistance()
+        self.assertEqual(p.load(), [{'a': 1}, {'a': 2}])
+        p.save([{'a': 1}, {'a': 2}, {'a': 3}])
+        self.assertEqual(self.persistance().load(),
+                         [{'a': 1}, {'a': 2}, {'a': 3}])
+
+    def test_bad_entry(self):
+        p = self.persistance()
+        p.save([{'a': 1}])
+        p.save([{'a': 1}, {'a': 2}])
+        f = open(self.journal_path(), 'ab')
+        f.write('{index: [\n')
+        f.close()
+        p = self.persistance()
+        self.assertEqual(p.load(), [{'a': 1}, {'a': 2}])
+        p.save([{'a': 1}, {'a': 2}, {'a': 3}])
+        self.assertEqual(self.persistance().load(),
+                         [{'a': 1}, {'a': 2}, {'a': 3}])
+
+
+class MarshalJournalTest(JournalTest):
+
+    codec = 'marshal'
+
+
+if __name__ == '__main__':
+    unittest.main()
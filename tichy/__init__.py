@@ -39,6 +39,7 @@ from message import Message
 from contact import Contact
 from time import Time
 from persistance import Persistance
+import database
 
 from dialog import Dialog
 
@@ -20,6 +20,8 @@
 
 """contact module"""
 
+from __future__ import with_statement
+
 __docformat__ = 'reStructuredText'
 
 import logging
@@ -281,6 +283,9 @@ class PhoneContact(Contact):
     tel_type = ContactField('tel_type', tichy.Text)
     fields = [name, tel, note, tel_type]
 
+    # The indexed columns of the contacts database table
+    columns = {'number': 'tel', 'name': 'name'}
+
     def __init__(self, **kargs):
         super(PhoneContact, self).__init__(**kargs)
         self.connect('modified', self._on_modified)
@@ -301,7 +306,8 @@ class PhoneContact(Contact):
         LOGGER.info("Saving phone contacts")
         contacts = tichy.Service('Contacts').contacts
         data = [c.to_dict() for c in contacts if isinstance(c, PhoneContact)]
-        tichy.Persistance('contacts/phone').save(data)
+        tichy.database.records_storage(
+            'contacts/phone', cls.columns).save(data)
         yield None
 
     @classmethod
@@ -312,13 +318,147 @@ class PhoneContact(Contact):
         """
         LOGGER.info("Loading phone contacts")
         ret = []
-        data = tichy.Persistance('contacts/phone').load()
+        data = tichy.database.records_storage(
+            'contacts/phone', cls.columns).load()
         for kargs in data:
             contact = PhoneContact(**kargs)
             ret.append(contact)
         yield ret
 
 
+class NumberIndex(object):
+    """Index of a list of contacts by telephone number
+
+    The contacts are indexed by `TelNumber.key`, so finding the
+    contacts having a number doesn't need to look at all the
+    contacts. The index is kept up to date with the signals of the
+    list and of the contacts.
+
+    We also cache the contact found for each number (see `get`). The
+    cache is cleared and `generation` incremented every time a
+    contact is added, removed or modified.
+    """
+
+    def __init__(self, contacts):
+        """Create the index of a list of contacts
+
+        :Parameters:
+
+            contacts : `tichy.List`
+                The list of `Contact` we index
+        """
+        self.contacts = contacts
+        self.buckets = {}   # key -> list of contacts
+        self.entries = {}   # id(contact) -> (contact, key, connection)
+        self.resolved = {}  # number -> contact or None
+        self.generation = 0
+        # Set when the last modification of the list has already
+        # been handled
+        self.__handled = False
+        contacts.connect('appened', self._on_added)
+        contacts.connect('inserted', self._on_inserted)
+        contacts.connect('removed', self._on_removed)
+        contacts.connect('cleared', self._on_cleared)
+        contacts.connect('modified', self._on_modified)
+        self.sync()
+
+    def add(self, contact):
+        """Add a contact into the index"""
+        if id(contact) in self.entries:
+            return
+        key = self._key(contact)
+        connection = contact.connect('modified', self._on_contact_modified)
+        self.entries[id(contact)] = (contact, key, connection)
+        if key:
+            self.buckets.setdefault(key, []).append(contact)
+        self._invalidate()
+
+    def remove(self, contact):
+        """Remove a contact from the index"""
+        contact, key, connection = self.entries.pop(id(contact))
+        contact.disconnect(connection)
+        if key:
+            bucket = self.buckets[key]
+            bucket.remove(contact)
+            if not bucket:
+                del self.buckets[key]
+        self._invalidate()
+
+    def sync(self):
+        """Make the index match the list of contacts"""
+        ids = set(id(c) for c in self.contacts)
+        for contact, key, connection in self.entries.values():
+            if id(contact) not in ids:
+                self.remove(contact)
+        for contact in self.contacts:
+            self.add(contact)
+
+    def find(self, number):
+        """Return all the contacts having a given number
+
+        :Returns: list of `Contact`
+        """
+        bucket = self.buckets.get(tichy.TelNumber.key(number), [])
+        return [c for c in bucket if tichy.TelNumber.match(c.tel, number)]
+
+    def get(self, number):
+        """Return the first contact having a given number
+
+        :Returns: `Contact` | None
+        """
+        number = unicode(number)
+        try:
+            return self.resolved[number]
+        except KeyError:
+            contacts = self.find(number)
+            contact = contacts[0] if contacts else None
+            self.resolved[number] = contact
+            return contact
+
+    def _invalidate(self):
+        self.resolved.clear()
+        self.generation += 1
+
+    @staticmethod
+    def _key(contact):
+        tel = contact.tel
+        return tel and tichy.TelNumber.key(tel)
+
+    def _on_added(self, contacts, contact):
+        self.add(contact)
+        self.__handled = True
+
+    def _on_inserted(self, contacts, index, contact):
+        self.add(contact)
+        self.__handled = True
+
+    def _on_removed(self, contacts, contact):
+        if id(contact) in self.entries:
+            self.remove(contact)
+        self.__handled = True
+
+    def _on_cleared(self, contacts):
+        for contact, key, connection in self.entries.values():
+            self.remove(contact)
+        self.__handled = True
+
+    def _on_modified(self, contacts):
+        # The other modifications (slices, extend, batches) only emit
+        # 'modified'
+        if not self.__handled:
+            self.sync()
+        self.__handled = False
+
+    def _on_contact_modified(self, contact):
+        # The number may have changed
+        if self._key(contact) != self.entries[id(contact)][1]:
+            self.remove(contact)
+            self.add(contact)
+        else:
+            # The name may have changed
+            self._invalidate()
+
+
 class ContactsService(tichy.Service):
     """Allow to add and get the phone or sim contacts"""
 
@@ -327,10 +467,18 @@ class ContactsService(tichy.Service):
     def __init__(self):
         super(ContactsService, self).__init__()
         self.contacts = tichy.List()
+        self.index = NumberIndex(self.contacts)
         # TODO: the problem here is that when we load the contacts we
         # are going to rewrite them !
         self.contacts.connect('modified', self._on_contacts_modified)
 
+    def __get_generation(self):
+        return self.index.generation
+
+    # Incremented every time a contact is added, removed or modified,
+    # so that we can cache the values that depend on the contacts.
+    generation = property(__get_generation)
+
     def _on_contacts_modified(self, contacts):
         yield PhoneContact.save()
 
@@ -352,7 +500,10 @@ class ContactsService(tichy.Service):
                 continue
             assert all(isinstance(x, Contact) for x in contacts)
             all_contacts.extend(contacts)
-        self.contacts[:] = all_contacts
+        # We use a batch so that the contacts are only saved once
+        with self.contacts.batch():
+            del self.contacts[:]
+            self.contacts.extend(all_contacts)
         LOGGER.info("Totally got %d contacts", len(self.contacts))
 
     @tichy.tasklet.tasklet
@@ -394,7 +545,20 @@ class ContactsService(tichy.Service):
 
         :Returns: list of `Contact`
         """
-        return [x for x in self.contacts if x.tel == number]
+        return self.index.find(number)
+
+    def get_by_number(self, number):
+        """Return the first contact having a given number
+
+        The result is cached until the contacts are modified.
+
+        :Parameters:
+            number : str
+               The number of the contact
+
+        :Returns: `Contact` | None
+        """
+        return self.index.get(number)
 
     def create(self, name=None, **kargs):
         """Create a new `Contact` instance
@@ -0,0 +1,370 @@
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""SQLite storage of the records lists
+
+This module is an alternative to the `Persistance` files for the big
+lists of records (messages, calls logs, contacts). The records are
+stored in a single SQLite database, one row per record, so saving a
+modified record doesn't rewrite the others, and we can query the
+records without loading all of them.
+
+The services still keep all their records in memory and save their
+whole lists : the table only writes the rows that changed, and
+`Table.update` and `Table.remove` modify a single record in O(log n).
+Moving the services onto paged queries (`Table.select`), so that
+their memory doesn't grow with the history, is left to the services.
+
+The SQLite storage is only used if `enabled` is set to True (e.g.
+with the --database option of test/tichy) and the sqlite3 module is
+available. Use `records_storage` to get the storage of a list of
+records.
+"""
+
+from __future__ import with_statement
+
+import os
+import threading
+from hashlib import md5
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+from persistance import Persistance, codecs, write_behind
+
+import logging
+LOGGER = logging.getLogger('database')
+
+
+# Set this to True to use the SQLite storage
+enabled = False
+
+
+def records_storage(path, columns=None):
+    """Return the storage of a list of records
+
+    The returned object has a `load` and a `save` method, like
+    `Persistance`.
+
+    :Parameters:
+
+        path : str
+            The name of the list of records (e.g. 'messages')
+
+        columns : dict | None
+            The indexed columns of the table, see `Table`
+    """
+    if enabled and sqlite3 is not None:
+        return Table.get(path, columns)
+    return Persistance(path, journal=True)
+
+
+class Table(object):
+    """A list of records stored into an SQLite table
+
+    The records are dictionaries. They are stored serialized into a
+    'data' column, and some of their values are copied into indexed
+    columns, so that we can query them. The order of the list is kept
+    with a 'rank' column.
+
+    Like the `Persistance` files, the saves are coalesced and written
+    by the `WriteBehind` thread. We only keep the ids, ranks and
+    digests of the rows in memory : when a list is written, its
+    records are serialized and compared with the digests, and only
+    the rows of the records that changed are written.
+
+    There is only one Table instance per table, use `Table.get` to
+    get it.
+    """
+
+    # The file of the database, by default 'tichy.db' in the
+    # `Persistance` directory
+    file = None
+    # The codec used for the data column
+    codec = codecs['marshal']
+    # Time we wait before writing a save
+    delay = Persistance.delay
+
+    # The connection is used by the main thread and the write behind
+    # thread, one at a time
+    lock = threading.RLock()
+    __connection = None
+    __tables = {}
+
+    @classmethod
+    def get(cls, path, columns=None):
+        """Return the table storing a given list of records"""
+        table = cls.__tables.get(path)
+        if table is None:
+            table = cls(path, columns)
+            cls.__tables[path] = table
+        return table
+
+    @classmethod
+    def connection(cls):
+        """Return the connection to the database"""
+        if cls.__connection is None:
+            path = cls.file or os.path.join(Persistance.base_path,
+                                            'tichy.db')
+            dir = os.path.dirname(path)
+            if not os.path.exists(dir):
+                os.makedirs(dir)
+            cls.__connection = sqlite3.connect(path,
+                                               check_same_thread=False)
+        return cls.__connection
+
+    def __init__(self, path, columns=None):
+        """Create the table if it doesn't exist yet
+
+        :Parameters:
+
+            path : str
+                The name of the list of records. If a `Persistance`
+                file with this name exists, its records are imported
+                into the table.
+
+            columns : dict | None
+                The indexed columns of the table : column name ->
+                record key. For example {'number': 'peer'} means that
+                the 'peer' value of the records is stored into the
+                indexed 'number' column.
+        """
+        self.path = path
+        self.name = path.replace('/', '_')
+        self.columns = dict(columns or {})
+        self.rows = None        # list of (id, rank, digest)
+        with self.lock:
+            connection = self.connection()
+            defs = ''.join(', %s TEXT' % c for c in self.columns)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS %s "
+                "(id INTEGER PRIMARY KEY, rank REAL, data BLOB%s)" %
+                (self.name, defs))
+            for column in ['rank'] + self.columns.keys():
+                connection.execute(
+                    "CREATE INDEX IF NOT EXISTS %s_%s ON %s (%s)" %
+                    (self.name, column, self.name, column))
+            connection.commit()
+        self._import()
+
+    def _import(self):
+        """Import the records saved in a `Persistance` file"""
+        persistance = Persistance(self.path, journal=True)
+        if self.count() or not os.path.exists(persistance._path()):
+            return
+        LOGGER.info("importing %s into the database", self.path)
+        self.write(persistance.load() or [])
+
+    def _values(self, record):
+        return [record.get(key) for key in self.columns.itervalues()]
+
+    def _where(self, where):
+        for column in where:
+            if column not in self.columns:
+                raise KeyError("no column %s in %s" % (column, self.name))
+        if not where:
+            return '', []
+        return ('WHERE ' + ' AND '.join('%s = ?' % c for c in where),
+                where.values())
+
+    def count(self, **where):
+        """Return the number of records
+
+        :Parameters:
+
+            where
+                Only count the records with the given columns values
+        """
+        clause, args = self._where(where)
+        query = "SELECT COUNT(*) FROM %s %s" % (self.name, clause)
+        write_behind.flush(self.path)
+        with self.lock:
+            return self.connection().execute(query, args).fetchone()[0]
+
+    def select(self, order='rank', limit=-1, offset=0, **where):
+        """Return a page of records
+
+        :Parameters:
+
+            order : str
+                The column used to sort the records. Add ' DESC' to
+                reverse the order.
+
+            limit : int
+                The maximum number of records, -1 for no limit
+
+            offset : int
+                The number of records we skip
+
+            where
+                Only return the records with the given columns values
+
+        :Returns: list of (id, record)
+        """
+        if order.split()[0] not in ['id', 'rank'] + self.columns.keys():
+            raise KeyError("no column %s in %s" % (order, self.name))
+        clause, args = self._where(where)
+        query = "SELECT id, data FROM %s %s ORDER BY %s LIMIT ? OFFSET ?" % (
+            self.name, clause, order)
+        write_behind.flush(self.path)
+        with self.lock:
+            cursor = self.connection().execute(query,
+                                               args + [limit, offset])
+            return [(id, self.codec.loads(str(data)))
+                    for id, data in cursor]
+
+    def update(self, id, record):
+        """Replace the record with a given id"""
+        data = self.codec.dumps(record)
+        sets = ''.join(', %s = ?' % c for c in self.columns)
+        # A pending save would overwrite the record
+        write_behind.flush(self.path)
+        with self.lock:
+            self.connection().execute(
+                "UPDATE %s SET data = ?%s WHERE id = ?" % (self.name, sets),
+                [buffer(data)] + self._values(record) + [id])
+            self.connection().commit()
+            self.rows = None
+
+    def remove(self, id):
+        """Remove the record with a given id"""
+        write_behind.flush(self.path)
+        with self.lock:
+            self.connection().execute(
+                "DELETE FROM %s WHERE id = ?" % self.name, [id])
+            self.connection().commit()
+            self.rows = None
+
+    def load(self):
+        """Return the list of all the records"""
+        return [record for id, record in self.select()]
+
+    def _digest(self, data):
+        return md5(data).digest()
+
+    def _load_rows(self):
+        cursor = self.connection().execute(
+            "SELECT id, rank, data FROM %s ORDER BY rank" % self.name)
+        self.rows = [(id, rank, self._digest(str(data)))
+                     for id, rank, data in cursor]
+
+    def _renumber(self):
+        """Set all the ranks to integers"""
+        connection = self.connection()
+        rows = []
+        for i, (id, rank, digest) in enumerate(self.rows):
+            if rank != i:
+                connection.execute(
+                    "UPDATE %s SET rank = ? WHERE id = ?" % self.name,
+                    [i, id])
+            rows.append((id, i, digest))
+        self.rows = rows
+
+    def save(self, records):
+        """Make the table contain a given list of records
+
+        The records are written later by the write behind thread, see
+        `Persistance.save`.
+        """
+        records = list(records)
+        if self.delay and write_behind.running:
+            write_behind.schedule(self, records, self.delay)
+        else:
+            write_behind.flush(self.path)
+            self.write(records)
+
+    def write(self, records):
+        """Make the table contain a given list of records now
+
+        We compare the digests of the serialized records with the
+        digests of the rows, and only write the modified records.
+        """
+        datas = [self.codec.dumps(r) for r in records]
+        with self.lock:
+            self._write(records, datas)
+
+    def _write(self, records, datas):
+        if self.rows is None:
+            self._load_rows()
+        digests = [self._digest(d) for d in datas]
+        old = self.rows
+        size = min(len(old), len(digests))
+        start = 0
+        while start < size and old[start][2] == digests[start]:
+            start += 1
+        end = 0
+        while end < size - start and old[-1 - end][2] == digests[-1 - end]:
+            end += 1
+        old_end = len(old) - end
+        new_end = len(digests) - end
+        if start == old_end and start == new_end:
+            return
+
+        connection = self.connection()
+        name = self.name
+        sets = ''.join(', %s = ?' % c for c in self.columns)
+        rows = old[:start]
+        index = start
+        # Modified records
+        while index < old_end and index < new_end:
+            id, rank, digest = old[index]
+            connection.execute(
+                "UPDATE %s SET data = ?%s WHERE id = ?" % (name, sets),
+                [buffer(datas[index])] + self._values(records[index]) +
+                [id])
+            rows.append((id, rank, digests[index]))
+            index += 1
+        # Removed records
+        if index < old_end:
+            connection.executemany(
+                "DELETE FROM %s WHERE id = ?" % name,
+                [(row[0], ) for row in old[index:old_end]])
+        # Added records, with ranks between the ranks of their
+        # neighbours
+        if index < new_end:
+            if rows:
+                low = rows[-1][1]
+            elif end:
+                low = old[old_end][1] - 1
+            else:
+                low = 0
+            if end:
+                high = old[old_end][1]
+            else:
+                high = low + new_end - index + 1
+            if high - low < 1e-6 * (new_end - index + 1):
+                # Not enough room between the ranks
+                self.rows = rows + old[old_end:]
+                self._renumber()
+                self._write(records, datas)
+                return
+            step = (high - low) / float(new_end - index + 1)
+            fields = ''.join(', %s' % c for c in self.columns)
+            marks = ', ?' * len(self.columns)
+            for i in xrange(index, new_end):
+                rank = low + step * (i - index + 1)
+                cursor = connection.execute(
+                    "INSERT INTO %s (rank, data%s) VALUES (?, ?%s)" %
+                    (name, fields, marks),
+                    [rank, buffer(datas[i])] + self._values(records[i]))
+                rows.append((cursor.lastrowid, rank, digests[i]))
+        connection.commit()
+        self.rows = rows + old[old_end:]
@@ -0,0 +1,261 @@
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import
+
+__docformat__ = 'reStructuredText'
+
+"""Profiler of the cost of the drawing of the widgets
+
+When a `DrawProfiler` is attached to a screen, the widgets are drawn
+through it : for every widget drawn we record the time taken by the
+widget itself (without its children), and the number of blits and of
+pixels its painter did. The costs are summed per widget class, per
+type of item shown by the widget, and per stack of widgets.
+
+After a given number of frames we write a report of the most costly
+classes and items types, and optionally the stacks in the folded
+format used by the flame graph tools (one line per stack, with the
+classes separated by ';' and the time in microseconds). The slowest
+widgets can also be outlined on the screen.
+
+The profiler works with the guip and guic backends. It costs nothing
+when it is not attached, but the recorded times include its own
+overhead, so they are only meaningful relative to each other.
+"""
+
+import sys
+import time
+import heapq
+
+from tichy.gui import Vect, Rect
+
+import logging
+logger = logging.getLogger('draw_profiler')
+
+
+class DrawProfiler(object):
+    """Record the time, blits and pixels of the drawing of the widgets
+
+    :Parameters:
+
+        frames : int | None
+            The number of frames after which we write the report and
+            start again. If None we only write it when `dump` is
+            called
+
+        output : file
+            Where we write the report, default to stdout
+
+        stacks : str | None
+            The path of a file where we append the folded stacks of
+            every report
+
+        overlay : int
+            The number of slowest widgets we outline on the screen
+    """
+
+    # The color and width of the outlines of the slowest widgets
+    overlay_color = (255, 0, 0)
+    overlay_width = 2
+
+    def __init__(self, frames=100, output=None, stacks=None, overlay=0):
+        self.frames = frames
+        self.output = output or sys.stdout
+        self.stacks_path = stacks
+        self.overlay = overlay
+        self.screen = None
+        self.connection = None
+        self.outlines = []
+        # The widgets being drawn : [path, children time, blits, pixels]
+        self.stack = []
+        self.reset()
+
+    def reset(self):
+        """Forget all the recorded costs"""
+        self.frame_count = 0
+        self.classes = {}   # class name -> [draws, time, blits, pixels]
+        self.items = {}     # item type name -> [draws, time, blits, pixels]
+        self.stacks = {}    # path -> time
+        # We keep the widgets alive until the next report
+        self.widgets = {}   # id(widget) -> [time, widget]
+
+    def attach(self, screen):
+        """Start to profile the drawing of a screen"""
+        self.detach()
+        self.screen = screen
+        screen.painter.profiler = self
+        self.connection = screen.scheduler.connect('frame', self.on_frame)
+
+    def detach(self):
+        """Stop to profile the screen"""
+        if self.screen is None:
+            return
+        self.screen.painter.profiler = None
+        self.screen.scheduler.disconnect(self.connection)
+        self.set_outlines([])
+        self.screen = None
+
+    def draw(self, widget, painter, draw=None):
+        """Draw a widget on a painter, recording its cost
+
+        This is called by the painters instead of `widget.draw` when
+        the profiler is attached.
+
+        :Parameters:
+
+            draw : callable | None
+                The function used to draw the widget, default to its
+                `draw` method
+        """
+        name = type(widget).__name__
+        item = widget.item
+        item_name = type(item).__name__ if item is not None else None
+        label = name if item_name is None else '%s(%s)' % (name, item_name)
+        stack = self.stack
+        path = stack[-1][0] + ';' + label if stack else label
+        entry = [path, 0.0, 0, 0]
+        stack.append(entry)
+        start = time.time()
+        try:
+            if draw is None:
+                widget.draw(painter)
+            else:
+                draw(painter)
+        finally:
+            duration = time.time() - start
+            stack.pop()
+        if stack:
+            stack[-1][1] += duration
+        duration -= entry[1]
+        for stats, key in ((self.classes, name), (self.items, item_name)):
+            if key is None:
+                continue
+            stat = stats.get(key)
+            if stat is None:
+                stat = stats[key] = [0, 0.0, 0, 0]
+            stat[0] += 1
+            stat[1] += duration
+            stat[2] += entry[2]
+            stat[3] += entry[3]
+        self.stacks[path] = self.stacks.get(path, 0.0) + duration
+        record = self.widgets.get(id(widget))
+        if record is None:
+            self.widgets[id(widget)] = [duration, widget]
+        else:
+            record[0] += duration
+
+    def blit(self, rect):
+        """Record a blit of the widget being drawn
+
+        :Parameters:
+
+            rect : `Rect`
+                The painted rect, clipped by the mask of the painter
+        """
+        if not self.stack:
+            # The screen background
+            return
+        entry = self.stack[-1]
+        entry[2] += 1
+        entry[3] += rect.size[0] * rect.size[1]
+
+    def on_frame(self, scheduler, timings):
+        self.frame_count += 1
+        if self.frames is not None and self.frame_count >= self.frames:
+            self.dump()
+        self.draw_outlines()
+
+    def slowest(self, count):
+        """Return the `count` widgets that took the most time"""
+        return [w for t, w in heapq.nlargest(count, self.widgets.values(),
+                                             key=lambda r: r[0])]
+
+    def dump(self):
+        """Write the report and start again"""
+        self.report(self.output)
+        if self.stacks_path is not None:
+            try:
+                f = open(self.stacks_path, 'a')
+                self.write_stacks(f)
+                f.close()
+            except IOError, e:
+                logger.error("can't write the stacks : %s", e)
+        if self.overlay:
+            self.set_outlines([self.widget_rect(w) for w in
+                               self.slowest(self.overlay)])
+        self.reset()
+
+    def report(self, output, count=10):
+        """Write the most costly widgets classes and items types"""
+        frames = max(self.frame_count, 1)
+        output.write("draw profile of %d frames\n" % self.frame_count)
+        for title, stats in (('class', self.classes),
+                             ('item', self.items)):
+            output.write("%-24s %8s %10s %8s %10s\n" % (
+                title, 'draws', 'ms/frame', 'blits', 'pixels'))
+            items = sorted(stats.items(), key=lambda i: i[1][1],
+                           reverse=True)
+            for key, (draws, duration, blits, pixels) in items[:count]:
+                output.write("%-24s %8d %10.3f %8d %10d\n" % (
+                    key, draws, duration * 1000 / frames, blits, pixels))
+
+    def write_stacks(self, output):
+        """Write the stacks in the folded format of the flame graphs"""
+        for path, duration in sorted(self.stacks.items()):
+            output.write("%s %d\n" % (path, int(duration * 1000000)))
+
+    def widget_rect(self, widget):
+        """Return the rect of a widget on the screen, or None"""
+        w = widget
+        while w is not self.screen:
+            if w.parent is None or w not in w.parent.children:
+                # The widget has been removed from the screen
+                return None
+            w = w.parent
+        pos = widget.screen_pos()
+        return self.screen.rect.clip(Rect(pos, widget.size))
+
+    def set_outlines(self, rects):
+        """Set the rects of the outlined widgets"""
+        rects = [r for r in rects if r is not None]
+        # The old outlines are erased by the next frame
+        for rect in self.outlines:
+            if rect not in rects:
+                self.screen.need_redraw(rect)
+        self.outlines = rects
+
+    def draw_outlines(self):
+        """Draw the outlines over the display"""
+        if not self.outlines:
+            return
+        painter = self.screen.painter
+        painter.set_mask(self.screen.rect)
+        width = self.overlay_width
+        for rect in self.outlines:
+            x, y = rect.pos.x, rect.pos.y
+            w, h = rect.size.x, rect.size.y
+            for pos, size in (((x, y), (w, width)),
+                              ((x, y + h - width), (w, width)),
+                              ((x, y), (width, h)),
+                              ((x + w - width, y), (width, h))):
+                painter.move(Vect(*pos))
+                painter.fill(self.overlay_color, size)
+                painter.umove(Vect(*pos))
+            painter.flip(rect)
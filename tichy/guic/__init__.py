@@ -31,10 +31,11 @@ from .window import Window
 from .box import Box, Fixed
 from .table import Table
 from .scrollable import Scrollable, ScrollableSlide
+from .virtual_list import VirtualList
 from .spring import Spring
 from .widget import Widget
 from .frame import Frame
 from .sdl_painter import SdlPainter as Painter
-from .mainloop import EventsLoop
+from .mainloop import EventsLoop, HeadlessLoop
 from .surf_widget import SurfWidget
 from .xwindow import XWindow
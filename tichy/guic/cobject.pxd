@@ -24,3 +24,5 @@ cdef class Object:
     cdef void _emit_1(self, char* event, v) except *
     
     cdef dict __listeners
+    cdef dict __connections
+    cdef dict __dead
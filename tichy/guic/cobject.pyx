@@ -16,17 +16,50 @@
 #    You should have received a copy of the GNU General Public License
 #    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
 
+from itertools import count
 from types import GeneratorType
 from tichy.tasklet import Tasklet
 
+# Used to generate the connections ids, see `tichy.object`
+_next_connection_id = count(1).next
+
+def _dead_callback(*args):
+    """The callback of the disconnected slots"""
+
+def _remove_slot(dict listeners, dict dead, event, list slot):
+    """Remove a slot from the listeners of an event
+    
+    We only mark the slot as dead, and clean the listeners list once
+    it contains more dead slots than living ones.
+    """
+    cdef list slots = listeners[event]
+    slot[0] = _dead_callback
+    if slots[-1] is slot:
+        # We keep the list even if it is empty, since the event is
+        # likely to be connected again
+        slots.pop()
+        return
+    nb_dead = dead.get(event, 0) + 1
+    if nb_dead * 2 > len(slots):
+        dead.pop(event, None)
+        listeners[event] = [x for x in slots if x[0] is not _dead_callback]
+    else:
+        dead[event] = nb_dead
+
 cdef class Object:
     """This class implements the observer patern
     
         I could use gobject.GObject instead.
         But i think gobject may be overkill there... still thinking about it...
+        
+    This works like `tichy.object.Object` : the connections are kept
+    in a registry (id -> (event, slot)) so that we can disconnect in
+    constant time, and the disconnected slots are only marked as dead.
     """
     def __init__(self):
-        self.__listeners = {}
+        self.__listeners = {}   # event -> [slot, ...]
+        self.__connections = {} # id -> (event, slot)
+        self.__dead = {}        # event -> number of dead slots
         
     def connect(self, char* event, callback, *args):
         """Connect the object to a given event""" 
@@ -34,25 +67,41 @@ cdef class Object:
         
     def connect_object(self, char* event, callback, obj, *args):
         """Connect an event using a given object instead of self"""
-        connection = (callback, obj, args)
-        self.__listeners.setdefault(event, []).append(connection)
-        return id(connection)
+        cdef list slot = [callback, obj, args]
+        oid = _next_connection_id()
+        listeners = self.__listeners.get(event)
+        if listeners is None:
+            self.__listeners[event] = [slot]
+        else:
+            listeners.append(slot)
+        self.__connections[oid] = (event, slot)
+        return oid
         
     def disconnect(self, oid):
         """remove a connection from the listeners"""
-        for l in self.__listeners.itervalues():
-            for c in l:
-                if id(c) == oid:
-                    l.remove(c)
-                    return
-        raise Exception("trying to disconnect a bad id")
+        try:
+            event, slot = self.__connections.pop(oid)
+        except KeyError:
+            raise Exception("trying to disconnect a bad id")
+        _remove_slot(self.__listeners, self.__dead, event, slot)
         
     def emit(self, char* event, *args):
         """Emit a signal
         
-           All the listeners will be notified
+           All the listeners connected when the signal is emitted will
+           be notified, unless an other callback disconnects them
+           during the emission.
         """
-        for e in self.__listeners.get(event, []):
+        cdef list listeners = self.__listeners.get(event)
+        if not listeners:
+            return
+        # A callback can connect or disconnect during the emission, so
+        # we iterate over a copy of the listeners
+        if len(listeners) == 1:
+            slots = (listeners[0], )
+        else:
+            slots = listeners[:]
+        for e in slots:
             eargs = args + e[2]
             call = e[0](e[1], *eargs)
             # Now in case the callback is a generator, we turn it into a task
@@ -62,12 +111,26 @@ cdef class Object:
         
     cdef void _emit(self, char* event) except *:
         """An optimized version of emit only for internal use"""
-        for e in self.__listeners.get(event, []):
+        cdef list listeners = self.__listeners.get(event)
+        if not listeners:
+            return
+        if len(listeners) == 1:
+            e = listeners[0]
+            e[0](e[1], *e[2])
+            return
+        for e in listeners[:]:
             e[0](e[1], *e[2])
             
     cdef void _emit_1(self, char* event, a) except *:
         """An optimized version of emit only for internal use"""
-        for e in self.__listeners.get(event, []):
+        cdef list listeners = self.__listeners.get(event)
+        if not listeners:
+            return
+        if len(listeners) == 1:
+            e = listeners[0]
+            e[0](e[1], a, *e[2])
+            return
+        for e in listeners[:]:
             e[0](e[1], a, *e[2])
 
     def monitor(self, object, char* event, callback, *args):
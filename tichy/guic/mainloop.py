@@ -16,7 +16,15 @@
 #    You should have received a copy of the GNU General Public License
 #    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
 
-import gobject
+import heapq
+import os
+import time
+
+try:
+    import gobject
+except ImportError:
+    # We can still run a `HeadlessLoop`
+    gobject = None
 import pygame
 import pygame.locals
 
@@ -24,15 +32,99 @@ import tichy.object
 from geo import Vect, Rect, asvect, asrect
 
 
+import logging
+LOGGER = logging.getLogger('mainloop')
+
+
+def x_connection_fd():
+    """Return the file descriptor of the X connection used by SDL
+
+    SDL only gives us the Xlib display as an opaque python object, so
+    we get its pointer and ask Xlib with ctypes. This can fail in many
+    ways (SDL not using X, no ctypes or Xlib, an unknown kind of
+    object), so any error makes us return None, and the events loop
+    then polls.
+    """
+    try:
+        if pygame.display.get_driver() != 'x11':
+            return None
+        display = pygame.display.get_wm_info().get('display')
+        if display is None:
+            return None
+        import ctypes
+        import ctypes.util
+        pointer = _void_pointer(ctypes, display)
+        if not pointer:
+            return None
+        xlib = ctypes.CDLL(ctypes.util.find_library('X11'))
+        xlib.XConnectionNumber.argtypes = [ctypes.c_void_p]
+        fd = xlib.XConnectionNumber(pointer)
+        # Make sure it is an open file descriptor before we watch it
+        os.fstat(fd)
+        return fd
+    except Exception, e:
+        LOGGER.warning("can't get the X connection : %s", e)
+        return None
+
+
+def _void_pointer(ctypes, obj):
+    """Return the pointer wrapped into a PyCObject or a PyCapsule
+
+    Return None if the object is neither of them.
+    """
+    api = ctypes.pythonapi
+    name = type(obj).__name__
+    if name == 'PyCObject':
+        as_pointer = api.PyCObject_AsVoidPtr
+        as_pointer.restype = ctypes.c_void_p
+        as_pointer.argtypes = [ctypes.py_object]
+        return as_pointer(obj)
+    if name == 'PyCapsule':
+        get_name = api.PyCapsule_GetName
+        get_name.restype = ctypes.c_char_p
+        get_name.argtypes = [ctypes.py_object]
+        get_pointer = api.PyCapsule_GetPointer
+        get_pointer.restype = ctypes.c_void_p
+        get_pointer.argtypes = [ctypes.py_object, ctypes.c_char_p]
+        return get_pointer(obj, get_name(obj))
+    return None
+
+
 class EventsLoop(tichy.object.Object):
     """This is our events loop, that use SDL to get the inputs
+
+    By default we poll the SDL events `fps` times per second. In
+    event driven mode, we instead watch the input file descriptors
+    (the X connection of SDL) and only tick when some input arrives
+    or when `wakeup` has been called, e.g. by a screen that needs to
+    be redrawn. There is never more than `fps` ticks per second. If
+    we can't find any input file descriptor we poll.
+
+    The screens draw a frame on every tick, so `fps` is the maximum
+    number of frames per second.
     """
 
+    # The maximum number of ticks per second
+    fps = 20
+    # Set to True to only tick when needed
+    event_driven = False
+    # The file descriptors we watch for inputs in event driven mode,
+    # by default the X connection of SDL
+    input_fds = None
+
     def __init__(self):
         super(EventsLoop, self).__init__()
         self.events = []
         self.running = True
         self.clock = pygame.time.Clock()
+        self.polling = True
+        self.fds = []               # The input file descriptors
+        self.watches = {}           # fd -> watch, while we wait
+        self.tick_source = None     # The scheduled tick
+        self.last_tick = 0
+        # The number of ticks and of wakeups on inputs
+        self.ticks = 0
+        self.input_wakeups = 0
 
     def next(self):
         self.events = []
@@ -53,24 +145,93 @@ class EventsLoop(tichy.object.Object):
                     self.surface = pygame.display.set_mode(event.size,
                                                            pygame.RESIZABLE)
         self.emit('tick')
+        self.ticks += 1
 
     def run(self):
         # OK here we are in fact relying on the gobject main loop. Why
         # ? Because we want to be able to use DBus, and sofar we can
         # only use DBus with gobject main loop.
+        # Let the python threads (e.g. the persistance writer) run
+        # while we are waiting in the gobject loop
+        gobject.threads_init()
         self.gobject_loop = gobject.MainLoop()
-        # This is used to synchronize the gobject loop and the sdl_loop
+        fds = self.find_input_fds()
+        self.polling = not fds
+        if self.polling:
+            # This is used to synchronize the gobject loop and the
+            # sdl_loop
 
-        def on_tick(*args):
-            self.next()
-            return True
-        gobject.timeout_add(50, on_tick)
+            def on_tick(*args):
+                self.next()
+                return True
+            gobject.timeout_add(int(1000 / self.fps), on_tick)
+        else:
+            LOGGER.info("watching the inputs on %s", fds)
+            self.fds = fds
+            self.wakeup()
         self.gobject_loop.run()
 
+    def find_input_fds(self):
+        """Return the file descriptors to watch for inputs
+
+        Return an empty list if we are not event driven or if we
+        can't find any, in which case we poll.
+        """
+        if not self.event_driven:
+            return []
+        fds = self.input_fds
+        if fds is None:
+            fd = x_connection_fd()
+            fds = [fd] if fd is not None else []
+        return list(fds)
+
+    def on_input(self, fd, condition):
+        self.input_wakeups += 1
+        # The file descriptor stays readable until the tick reads the
+        # events, so we stop watching until then
+        del self.watches[fd]
+        for watch in self.watches.itervalues():
+            gobject.source_remove(watch)
+        self.watches = {}
+        self.wakeup()
+        return False
+
+    def wakeup(self):
+        """Ask for a tick as soon as possible
+
+        This does nothing if we are polling anyway.
+        """
+        if self.polling or self.tick_source is not None:
+            return
+        elapsed = (time.time() - self.last_tick) * 1000
+        delay = max(0, int(1000 / self.fps - elapsed))
+        self.tick_source = gobject.timeout_add(delay, self.on_tick)
+
+    def on_tick(self):
+        self.tick_source = None
+        self.last_tick = time.time()
+        self.next()
+        # SDL may have read some events from the X connection during
+        # the tick, the file descriptor won't tell us about them
+        if pygame.display.get_init() and pygame.event.peek():
+            self.wakeup()
+        if not self.watches:
+            self.watches = dict((fd, self.watch(fd, self.on_input))
+                                for fd in self.fds)
+        return False
+
     def quit(self):
         self.running = False
         self.gobject_loop.quit()
 
+    def watch(self, fd, callback, *args):
+        """Call a callback every time a file descriptor is readable
+
+        The callback is called with the file descriptor and the
+        condition. It must return True to keep watching.
+        """
+        return gobject.io_add_watch(fd, gobject.IO_IN, callback, *args)
+
     def debug(self):
         import gc
         gc.collect()
@@ -96,3 +257,103 @@ class EventsLoop(tichy.object.Object):
             type = pygame.KEYUP
         pygame.event.post(pygame.event.Event(type, key=key, mod=mod,
                                              unicode=str))
+        self.wakeup()
+
+    def post_mouse_event(self, type, pos):
+        """Simulate a mouse event from the user
+
+        :Parameters:
+
+            type : str
+                'down', 'up', or 'motion' for a motion with the button
+                pressed
+
+            pos : `Vect` | tuple
+                The position on the screen
+        """
+        pos = tuple(pos)
+        if type == 'down':
+            event = pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos,
+                                       button=1)
+        elif type == 'up':
+            event = pygame.event.Event(pygame.MOUSEBUTTONUP, pos=pos,
+                                       button=1)
+        else:
+            event = pygame.event.Event(pygame.MOUSEMOTION, pos=pos,
+                                       rel=(0, 0), buttons=(1, 0, 0))
+        pygame.event.post(event)
+        self.wakeup()
+
+
+class HeadlessLoop(EventsLoop):
+    """An events loop that needs neither gobject nor a display
+
+    The time is simulated : every `step` advances the clock of one
+    tick, calls the timeouts that are due and then ticks. The only
+    inputs are the events posted with `post_key_event` and
+    `post_mouse_event`, so with the SDL dummy video driver (see the
+    `headless` option of the painter) we can script a whole session,
+    e.g. to benchmark the gui.
+    """
+
+    def __init__(self):
+        super(HeadlessLoop, self).__init__()
+        self.time = 0           # The simulated time in ms
+        self.timeouts = []      # heap of [time, id, delay, callback, args]
+        self.next_id = 0
+        # True if a tick has been asked since the last one
+        self.woken = True
+
+    def run(self):
+        while self.running:
+            self.step()
+
+    def step(self, delay=None):
+        """Advance the time of `delay` ms (default one tick) and tick"""
+        if delay is None:
+            delay = 1000 / self.fps
+        end = self.time + delay
+        while self.timeouts and self.timeouts[0][0] <= end:
+            timeout = heapq.heappop(self.timeouts)
+            self.time = timeout[0]
+            if timeout[3](*timeout[4]):
+                timeout[0] = self.time + timeout[2]
+                heapq.heappush(self.timeouts, timeout)
+        self.time = end
+        self.woken = False
+        self.next()
+
+    def settle(self, max_steps=100):
+        """Step until no more tick is needed
+
+        :Returns: The number of steps done
+        """
+        for i in range(max_steps):
+            if not self.woken and not pygame.event.peek():
+                return i
+            self.step()
+        return max_steps
+
+    def wakeup(self):
+        self.woken = True
+
+    def quit(self):
+        self.running = False
+
+    def timeout_add(self, time, callback, *args):
+        self.next_id += 1
+        heapq.heappush(self.timeouts,
+                       [self.time + time, self.next_id, time, callback, args])
+        return self.next_id
+
+    def source_remove(self, connection):
+        for timeout in self.timeouts:
+            if timeout[1] == connection:
+                self.timeouts.remove(timeout)
+                heapq.heapify(self.timeouts)
+                return
+
+    def watch(self, fd, callback, *args):
+        # We never read any file descriptor
+        self.next_id += 1
+        return self.next_id
@@ -27,6 +27,8 @@ cdef class Painter:
     """
     cdef c_Vect c_pos
     cdef c_Rect c_mask
+    cdef public object layer    # The window whose layer we are drawing, if any
+    cdef public object profiler # The DrawProfiler drawing the widgets, if any
     
     cdef void _draw(self, o)
     
@@ -37,7 +39,7 @@ cdef class Painter:
     cdef void c_set_mask(self, c_Rect *r)
     
     cdef Painter _to_surface(self, surf)
-    cdef c_surface_from_size(self, c_Vect *size)
+    cdef c_surface_from_size(self, c_Vect *size, int alpha=*)
     cdef _surface_from_image(self, char* path)
     cdef _surface_from_text(self, font, text, color, length)
     cdef void _draw_surface(self, surf, area)
@@ -43,14 +43,24 @@ cdef class Painter:
         
     cdef Painter _to_surface(self, surf):
         raise NotImplementedError
+    def to_surface(self, surf): return self._to_surface(surf)
             
     cdef void _draw(self, o):
         raise NotImplementedError
+    def draw(self, o): self._draw(o)
+
+    def draw_child(self, w):
+        """Draw a child widget, through the profiler if there is one"""
+        if self.profiler is None:
+            w.draw(self)
+        else:
+            self.profiler.draw(w, self)
         
-    cdef c_surface_from_size(self, c_Vect *size):
+    cdef c_surface_from_size(self, c_Vect *size, int alpha=True):
+        """Create a new surface, transparent if alpha is True"""
         raise NotImplementedError
-    def surface_from_size(self, Vect v):
-        self.c_surface_from_size(&v.c_value)
+    def surface_from_size(self, Vect v, alpha = True):
+        return self.c_surface_from_size(&v.c_value, alpha)
         
     cdef _surface_from_image(self, char* path):
         raise NotImplementedError
@@ -70,8 +80,16 @@ cdef class Painter:
     cdef void _draw_frame(self, frame, Vect size):
         raise NotImplementedError
     def draw_frame(self, frame, size): self._draw_frame(frame, asvect(size))
+
+    def scroll_surface(self, surf, offset):
+        """Shift the contents of a surface by offset"""
+        raise NotImplementedError
             
     cdef void _flip(self, Rect rect):
         pass
     def flip(self, r): self._flip(asrect(r))
+
+    def flip_rects(self, rects):
+        """Show a list of rects of the display, all at once"""
+        raise NotImplementedError
     
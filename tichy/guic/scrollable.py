@@ -18,6 +18,8 @@
 #    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
 
 
+import time
+
 from widget import Widget
 from geo import Vect, Rect
 from tichy.tasklet import Tasklet, WaitFirst, Wait
@@ -25,17 +27,51 @@ from tichy.tasklet import Tasklet, WaitFirst, Wait
 
 class Scrollable(Widget):
     """Special widget that can be scrolled in a given direction
+
+    The visible part of the child can be kept in a surface, the
+    viewport. When we scroll, the contents of the viewport are shifted
+    and we only draw the strip of the child that becomes visible,
+    instead of all the visible children. This is only faster when the
+    children don't keep their own drawing (see `Widget.store_surface`),
+    so by default we only use the viewport for them.
+
+    If the scrollable is kinetic, it keeps scrolling after we release
+    it, and slows down until it stops.
     """
 
-    def __init__(self, parent, axis=1, **kargs):
+    # Set to True to always use the viewport, to False to draw all the
+    # visible part of the child at every scroll step. If None we use
+    # the viewport when the rows of the child don't store their
+    # surface.
+    blit = None
+    # The speed (in pixels per second) under which a kinetic motion
+    # stops
+    min_speed = 50
+    # The fraction of the speed that remains after one second of
+    # kinetic motion
+    friction = 0.05
+
+    def __init__(self, parent, axis=1, kinetic=False, **kargs):
         self.axis = axis
+        self.kinetic = kinetic
+        self.viewport = None
+        self.viewport_size = None
+        self.viewport_dirty = None  # The part of the viewport to redraw
+        self.viewport_shift = Vect(0, 0)    # Not applied yet
+        self.scrolling = False
+        self.kinetic_task = None
         super(Scrollable, self).__init__(parent, **kargs)
+        # Our parents have to call our python draw method
+        self.python_draw = True
         self.click_pos = None
 
     def move_distance(self):
         return 32
 
     def mouse_down(self, pos):
+        if self.kinetic_task is not None:
+            self.kinetic_task.close()
+            self.kinetic_task = None
         self.children[0].mouse_down(pos - self.children[0].pos)
         self.click_pos = (pos - self.children[0].pos)[self.axis]
         task = Tasklet(generator=self.motion_task(pos))
@@ -63,8 +99,10 @@ class Scrollable(Widget):
 
         # OK now we are in motion mode
         child.mouse_down_cancel()
-        # child.store_surface = True
         last_dist = None
+        # The last positions of the mouse, used to compute the speed
+        # of the kinetic motion
+        moves = []
         while True:
             e, args = yield WaitFirst(Wait(self, 'mouse-up'),
                                       Wait(self, 'mouse-motion'))
@@ -72,23 +110,145 @@ class Scrollable(Widget):
             if e == 0:
                 break
             if e == 1:
+                moves = moves[-3:] + [(time.time(), pos[self.axis])]
                 # We use a step of 8
                 dist = (pos[self.axis] - self.click_pos) / 8 * 8
                 if dist == last_dist:
                     continue
                 last_dist = dist
-                child.pos = child.pos.set(self.axis, dist)
-                # We ensure that we don't go too far
-                if child.pos[self.axis] + child.size[self.axis] < \
-                        self.size[self.axis]:
-                    child.pos = child.pos.set(
-                        self.axis,
-                        self.size[self.axis] - child.size[self.axis])
-                if child.pos[self.axis] > 0:
-                    child.pos = child.pos.set(self.axis, 0)
-                self.emit('scrolled')
-
-        child.store_surface = False
+                self.scroll(dist)
+
+        if self.kinetic and len(moves) > 1:
+            (t0, pos0), (t1, pos1) = moves[0], moves[-1]
+            # We don't throw the child if the mouse stopped before
+            # the release
+            if t1 > t0 and time.time() - t1 < 0.1:
+                speed = (pos1 - pos0) / (t1 - t0)
+                self.kinetic_task = Tasklet(
+                    generator=self.kinetic_motion(speed))
+                self.kinetic_task.start()
+
+    def kinetic_motion(self, speed):
+        """The tasklet that keeps scrolling after a release
+
+        We move at every frame of the screen, according to the time
+        spent since the last frame.
+        """
+        offset = float(self.children[0].pos[self.axis])
+        last = time.time()
+        while abs(speed) > self.min_speed:
+            yield Wait(self.screen, 'tick')
+            now = time.time()
+            offset += speed * (now - last)
+            speed *= self.friction ** (now - last)
+            last = now
+            self.scroll(int(offset))
+            if self.children[0].pos[self.axis] != int(offset):
+                # We reached the end
+                break
+        self.kinetic_task = None
+
+    def scroll(self, offset):
+        """Move the child to a given offset along the axis
+
+        We ensure that we don't go too far. The part of the child
+        that was already visible is not redrawn.
+
+        :Returns: True if the child moved
+        """
+        axis = self.axis
+        child = self.children[0]
+        offset = max(offset, self.size[axis] - child.size[axis])
+        offset = min(offset, 0)
+        delta = offset - child.pos[axis]
+        if not delta:
+            return False
+        # Moving the child doesn't change the drawing of the viewport
+        self.scrolling = True
+        child.pos = child.pos.set(axis, offset)
+        self.scrolling = False
+        if self.viewport is not None:
+            shift = Vect(0, 0).set(axis, delta)
+            self.viewport_shift = self.viewport_shift + shift
+            size = self.size
+            if delta > 0:
+                strip = Rect((0, 0), size.set(axis, delta))
+            else:
+                strip = Rect(Vect(0, 0).set(axis, size[axis] + delta),
+                             size.set(axis, -delta))
+            dirty = self.viewport_dirty
+            if dirty is not None:
+                dirty = dirty.move(shift).clip(self.rect)
+            if dirty is not None and dirty.size[0] and dirty.size[1]:
+                strip = strip.merge(dirty)
+            self.viewport_dirty = strip
+        Widget.need_redraw(self, self.rect)
+        self.emit('scrolled')
+        return True
+
+    def need_redraw(self, rect):
+        if self.viewport is not None and not self.scrolling:
+            dirty = rect.clip(self.rect)
+            if dirty.size[0] and dirty.size[1]:
+                self.viewport_dirty = dirty if self.viewport_dirty is None \
+                    else self.viewport_dirty.merge(dirty)
+        super(Scrollable, self).need_redraw(rect)
+
+    def use_viewport(self):
+        """Return True if we draw the child through the viewport"""
+        if self.blit is not None:
+            return self.blit
+        rows = self.children[0].children if self.children else []
+        for row in rows:
+            if not row.store_surface:
+                return True
+        return False
+
+    def draw(self, painter):
+        if not self.use_viewport():
+            # We don't need to keep the viewport up to date
+            self.viewport = None
+            super(Scrollable, self).draw(painter)
+            return
+        # Our own background doesn't scroll
+        painter.draw(self)
+        self.draw_viewport(painter)
+        painter.draw_surface(self.viewport)
+
+    def draw_viewport(self, painter):
+        """Redraw the dirty part of the viewport"""
+        # (the Vect of guic can't be compared directly)
+        if self.viewport is None or \
+                tuple(self.viewport_size) != tuple(self.size):
+            self.viewport = painter.surface_from_size(self.size)
+            self.viewport_size = self.size
+            self.viewport_dirty = self.rect
+            self.viewport_shift = Vect(0, 0)
+        if tuple(self.viewport_shift) != (0, 0):
+            painter.scroll_surface(self.viewport, self.viewport_shift)
+            self.viewport_shift = Vect(0, 0)
+        if self.viewport_dirty is None:
+            return
+        viewport_painter = painter.to_surface(self.viewport)
+        viewport_painter.layer = painter.layer
+        viewport_painter.set_mask(self.viewport_dirty)
+        self.viewport_dirty = None
+        # The viewport is transparent where nothing is drawn
+        viewport_painter.fill((0, 0, 0, 0), self.size)
+        for c in self.children:
+            viewport_painter.move(c.pos)
+            mask = viewport_painter.mask
+            viewport_painter.clip(c.rect)
+            if viewport_painter.mask.intersect(c.rect):
+                viewport_painter.draw_child(c)
+            viewport_painter.set_mask(mask)
+            viewport_painter.umove(c.pos)
+
+    def destroy(self):
+        if self.kinetic_task is not None:
+            self.kinetic_task.close()
+            self.kinetic_task = None
+        super(Scrollable, self).destroy()
 
     def resize(self):
         super(Scrollable, self).resize()
@@ -100,15 +260,8 @@ class Scrollable(Widget):
         child = self.children[0]
         child.size = child.optimal_size.set(self.axis - 1,
                                             self.size[self.axis - 1])
-
-         # We ensure that we don't go too far
-        if child.pos[self.axis] + child.size[self.axis] < \
-                self.size[self.axis]:
-            child.pos = child.pos.set(
-                self.axis, self.size[self.axis] - child.size[self.axis])
-        if child.pos[self.axis] > 0:
-            child.pos = child.pos.set(self.axis, 0)
-        self.emit('scrolled')
+        if not self.scroll(child.pos[self.axis]):
+            self.emit('scrolled')
 
 
 class ScrollableSlide(Widget):
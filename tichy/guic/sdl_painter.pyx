@@ -49,25 +49,40 @@ from button import Button
 import label
 from label import Label
 
+import os
+
 import pygame
 import pygame.image
 import pygame.font
 import pygame.locals
 
 from font import Font
+from tichy.nine_slice import frame_surface
+from tichy import svg_raster
 
 import logging
 logger = logging.getLogger('sdl_display')
 
 cdef class SdlPainter(Painter):
-    def __init__(self, size, fullscreen = False):
+    def __init__(self, size, fullscreen = False, headless = False):
+        """Open the display
+
+        If headless is True we use the SDL dummy video driver, that
+        draws into memory without showing anything.
+        """
         Painter.__init__(self, Vect(0,0), Rect((0,0), size))
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
         pygame.display.init()
         pygame.font.init()
         
-        flags = pygame.FULLSCREEN if fullscreen else 0
-        flags |= pygame.RESIZABLE
-        self.surface = pygame.display.set_mode(size,flags)
+        if headless:
+            # The dummy driver gives a 8 bits display by default
+            self.surface = pygame.display.set_mode(size, 0, 32)
+        else:
+            flags = pygame.FULLSCREEN if fullscreen else 0
+            flags |= pygame.RESIZABLE
+            self.surface = pygame.display.set_mode(size,flags)
         pygame.display.set_caption("Tichy")
         
     cdef void c_clip(self, c_Rect *r):
@@ -98,46 +113,21 @@ cdef class SdlPainter(Painter):
         self._draw_surface(surf, None)
         self.c_move(&border)
         
-    cdef c_surface_from_size(self, c_Vect *size):
+    cdef c_surface_from_size(self, c_Vect *size, int alpha=True):
+        if not alpha:
+            return pygame.Surface((size.x, size.y)).convert(self.surface)
         # This is not really optimized, because we use transparent surface all the time
         return pygame.Surface((size.x, size.y), pygame.SRCALPHA, 32).convert_alpha(self.surface)
 
 
-    def surface_from_svg(self,path):
-        import rsvg
-        import cairo
-        import array
-        # NOTE: currently pygame has a bug where it switches channel
-        # in the buffer before drawing it. The fix below is inefficient
-        # and is not being included for now. So the svg colors will be off
-
-        # commented out fix pygame channel switch bug
-        #import re
-        # create pygame image surface
-        # there is a bug in pygame where it switches buffer channels
-        # r"\2\1\4\3"
-        #fixed_buf = re.sub (r"(.)(.)(.)(.)", r"\4\3\2\1", buf.tostring())
-        #surf = pygame.image.fromstring(fixed_buf, (width,height), "ARGB")
-
-        svg = rsvg.Handle (file=path)
-        width, height = svg.props.width, svg.props.width
-        stride = width * 4
-        # create a character data structure because pycairo does not
-        # seem to handle python types   
-        buf = array.array('c', chr(0) * width * height * 4)
-        cairo_surface = cairo.ImageSurface\
-            .create_for_data (buf, cairo.FORMAT_ARGB32,
-                              width, height, stride)
-        cairo_context = cairo.Context(cairo_surface)
-        svg.render_cairo (cairo_context)
-        surf = pygame.image.frombuffer(buf.tostring(),
-                                       (width,height), "ARGB")
-        return surf.convert_alpha()
+    def surface_from_svg(self, path, size=None):
+        surf = svg_raster.surface_from_svg(path, size)
+        return surf.convert_alpha(self.surface)
         
-    def surface_from_image(self, char* path):
+    def surface_from_image(self, char* path, size=None):
         if path[-3:] == 'svg':
             try:
-                return self.surface_from_svg(path)
+                return self.surface_from_svg(path, size)
             except Exception, e:
                 logger.error("can't use surface_from_svg : %s", e)
             
@@ -155,6 +145,9 @@ cdef class SdlPainter(Painter):
             self.surface.blit(surf, (self.pos.x, self.pos.y), area.to_list())
         else:
             self.surface.blit(surf, (self.pos.x, self.pos.y))
+        if self.profiler is not None:
+            size = area.size if area else surf.get_size()
+            self.profiler.blit(self.mask.clip(Rect(Vect(0, 0), asvect(size))))
             
     cdef Painter _to_surface(self, surf):
         cdef SdlPainter ret = SdlPainter.__new__(SdlPainter)
@@ -162,11 +155,19 @@ cdef class SdlPainter(Painter):
         ret.c_pos.x = ret.c_pos.y = 0 # TODO: automatic initialisation ?
         rect = surf.get_rect()
         ret.c_mask.pos.x = ret.c_mask.pos.y = 0
-        ret.c_mask.size.x = 480; ret.c_mask.size.y = 640
+        ret.c_mask.size.x = rect.width; ret.c_mask.size.y = rect.height
+        ret.profiler = self.profiler
         return ret
             
+    def scroll_surface(self, surf, offset):
+        # The clip of the surface would limit the scrolled area
+        surf.set_clip(None)
+        surf.scroll(offset[0], offset[1])
+            
     cdef void _fill(self, color, Vect size):
         self.surface.fill(color, (self.pos.x, self.pos.y, size.x, size.y))
+        if self.profiler is not None:
+            self.profiler.blit(self.mask.clip(Rect(Vect(0, 0), size)))
 
     cdef void _flip(self, Rect rect):
         if rect is None:
@@ -174,90 +175,17 @@ cdef class SdlPainter(Painter):
         else:
             pygame.display.update(rect.to_list())
 
+    def flip_rects(self, rects):
+        if rects:
+            pygame.display.update([rect.to_list() for rect in rects])
+
     cdef void _draw_frame(self, frame, Vect size):
-        """This is the super optimized version of draw_frame
-        
-            It doesn't work in some case (the edit widget) I don't know why
-        """
-        cdef int width = size.x
-        cdef int height = size.y
-        cdef int x = self.pos.x
-        cdef int y = self.pos.y
+        """Draw a frame
 
+        The frame surfaces are composed once for every size and
+        cached (see `tichy.nine_slice`), so this is a single blit.
+        """
         frame.image.load(self)
-        surf = frame.image.surf
-        
-        cdef int c1 = self.surface.map_rgb(surf.get_at((16, 15)))
-        cdef int c2 = self.surface.map_rgb(surf.get_at((16, 16)))
-        
-        cdef SDL_Surface* c_self_surf = PySurface_AsSurface(self.surface)
-        cdef SDL_Surface* c_surf = PySurface_AsSurface(surf)
-        
-        # I don't know why I have to do this !!!
-        SDL_SetAlpha(c_surf, 0, 255)
-        
-        # Draw the inside part
-        cdef SDL_Rect rect
-        rect.x = x + 8; rect.y = y + 8; rect.w = width - 16; rect.h = height / 2 - 8
-        SDL_FillRect(c_self_surf, &rect, c1)
-        rect.x = x + 8; rect.y = y + 8 + height / 2 - 8; rect.w = width - 16; rect.h = height / 2 - 8
-        SDL_FillRect(c_self_surf, &rect, c2)
-        
-        # Draw the corners
-        cdef SDL_Rect src_rect
-        src_rect.x = src_rect.y = 0
-        src_rect.w = src_rect.h = 8
-        
-        rect.x = x; rect.y = y; rect.w = rect.h = 8
-        SDL_BlitSurface(c_surf, &src_rect, c_self_surf, &rect)
-        rect.x = x + width - 8; rect.y = y; rect.w = rect.h = 8
-        src_rect.x = 24
-        SDL_BlitSurface(c_surf, &src_rect, c_self_surf, &rect)
-        rect.x = x + width - 8; rect.y = y + height - 8; rect.w = rect.h = 8
-        src_rect.y += 24
-        SDL_BlitSurface(c_surf, &src_rect, c_self_surf, &rect)
-        rect.x = x; rect.y = y + height - 8; rect.w = rect.h = 8
-        src_rect.x -= 24
-        SDL_BlitSurface(c_surf, &src_rect, c_self_surf, &rect)
-        
-        # Draw the borders
-        # up border
-        src_rect.x = 8; src_rect.y = 0
-        for i from 1 <= i < width / 16:
-            rect.x = x + i * 8; rect.y = y; rect.w = rect.h = 8
-            SDL_BlitSurface(c_surf, &src_rect, c_self_surf, &rect)
-        src_rect.x = 16
-        for i from width / 16 <= i < width / 8 - 1:
-            rect.x = x + i * 8; rect.y = y; rect.w = rect.h = 8
-            SDL_BlitSurface(c_surf, &src_rect, c_self_surf, &rect)
-        # down border
-        src_rect.x = 8; src_rect.y = 24
-        for i from 1 <= i < width / 16:
-            rect.x = x + i * 8; rect.y = y + height - 8; rect.w = rect.h = 8
-            SDL_BlitSurface(c_surf, &src_rect, c_self_surf, &rect)
-        src_rect.x = 16
-        for i from width / 16 <= i < width / 8 - 1:
-            rect.x = x + i * 8; rect.y = y + height - 8; rect.w = rect.h = 8
-            SDL_BlitSurface(c_surf, &src_rect, c_self_surf, &rect)
-        # left border
-        src_rect.x = 0; src_rect.y = 8
-        for i from 1 <= i < height / 16:
-            rect.x = x; rect.y = y + i * 8; rect.w = rect.h = 8
-            SDL_BlitSurface(c_surf, &src_rect, c_self_surf, &rect)
-        src_rect.y = 16
-        for i from height / 16 <= i < height / 8 - 1:
-            rect.x = x; rect.y = y + i * 8; rect.w = rect.h = 8
-            SDL_BlitSurface(c_surf, &src_rect, c_self_surf, &rect)
-        # right border
-        src_rect.x = 24; src_rect.y = 8
-        for i from 1 <= i < height / 16:
-            rect.x = x + width - 8; rect.y = y + i * 8; rect.w = rect.h = 8
-            SDL_BlitSurface(c_surf, &src_rect, c_self_surf, &rect)
-        src_rect.y = 16
-        for i from height / 16 <= i < height / 8 - 1:
-            rect.x = x + width - 8; rect.y = y + i * 8; rect.w = rect.h = 8
-            SDL_BlitSurface(c_surf, &src_rect, c_self_surf, &rect)
-            
-            
-import gobject
+        self._draw_surface(frame_surface(frame.image, (size.x, size.y)), None)
+
 
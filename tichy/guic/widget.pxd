@@ -38,6 +38,7 @@ cdef class Widget(Object):
     
     cdef public object surface
     cdef public int store_surface
+    cdef public int python_draw
     
     cdef public object _style
     cdef public dict style_dict
@@ -54,6 +55,8 @@ cdef class Widget(Object):
     cdef void c_need_organize(self, Widget child)
     cdef public int _resized = False
     cdef void c_need_resize(self, Widget child)
+    cdef public int children_organized
+    cdef public int children_resized
     cdef public int resizable
 
     cdef public int _destroyed = False
@@ -63,6 +66,7 @@ cdef class Widget(Object):
     cdef public int clickable
     
     cdef void c_draw(self, Painter painter) except *
+    cdef void c_draw_widget(self, Painter painter) except *
     cdef void c_do_resize(self) except *
 
     cdef void c_need_redraw(self, c_Rect *rect)  
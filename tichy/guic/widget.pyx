@@ -49,6 +49,10 @@ cdef class Widget(Object):
         self.expand = expand
         
         self._organized = False
+        # False if some children or sub-children need to be organized
+        # or resized
+        self.children_organized = False
+        self.children_resized = False
         
         self.rect = Rect(Vect(0,0), self.optimal_size)
         self._pos = pos or Vect(0,0)
@@ -56,6 +60,7 @@ cdef class Widget(Object):
         self.clickable = False
         self.surface = None     # This is used for the widget that keep a copy of there surface for optimisation
         self.store_surface = False   # Set to true for the widget to keep a memory of it own surface
+        self.python_draw = False    # Set to true if a python subclass overrides draw
         
         if same_as is None:
             self.style = style
@@ -83,7 +88,12 @@ cdef class Widget(Object):
                     self._style = self.parent.style_dict['children-style']
                 else:
                     self._style = self.parent.style
-            self.style_dict = self._style.apply(self)
+            style_dict = self._style.apply(self)
+            if style_dict is self.style_dict:
+                # The styles cache gave us the same dict, so the
+                # children styles didn't change either
+                return
+            self.style_dict = style_dict
             children_style = self._style if 'children-style' not in self.style_dict else  self.style_dict['children-style']
             for c in self.children:
                 c.style = children_style
@@ -119,22 +129,32 @@ cdef class Widget(Object):
         def __set__(self, Vect pos):
             if c_vect_equal(&pos.c_value, &self._pos.c_value):
                 return
+            # Moving the widget doesn't change its contents, so we
+            # keep its stored surface and only redraw the parent
+            if self.parent is not None:
+                self.parent.need_redraw(self.rect.move(self._pos))
             self._pos = pos
-            self.need_redraw(self.rect) # XXX: slow
+            if self.parent is not None:
+                self.parent.need_redraw(self.rect.move(self._pos)) # XXX: slow
             
     property min_size:
         def __get__(self):
             return self._min_size or self.style_dict.get('min-size', Vect(0,0))
         def __set__(self, Vect value):
             self._min_size = value
+            # The parent needs to take the new size into account
+            if self.parent is not None:
+                self.parent.resized = False
+                self.parent.organized = False
             
     property optimal_size:
         def __get__(self):
             return self._optimal_size
         def __set__(self, Vect value):
             self._optimal_size = value
-            self.parent.resized = False
-            self.parent.organized = False
+            if self.parent is not None:
+                self.parent.resized = False
+                self.parent.organized = False
 
     property contents_rect:
         def __get__(self):
@@ -157,6 +177,8 @@ cdef class Widget(Object):
                 self.need_organize(self)
                 
     cdef void c_need_organize(self, Widget child):
+        if child is not self:
+            self.children_organized = False
         if self.parent is not None:
             self.parent.need_organize(child) # XXX: super slow !!! Need to make screen cython
     def need_organize(self, Widget child):
@@ -171,6 +193,8 @@ cdef class Widget(Object):
                 self.need_resize(self)
             
     cdef void c_need_resize(self, Widget child):
+        if child is not self:
+            self.children_resized = False
         if self.parent is not None:
             self.parent.need_resize(child) # XXX: super slow !!! Need to make screen cython
     def need_resize(self, Widget child):
@@ -217,6 +241,8 @@ cdef class Widget(Object):
         """Add a child to the widget"""
         self.children.append(w)
         self._emit_1('add-child', w)    # XXX: remove ?
+        self.children_organized = False
+        self.children_resized = False
         self.resized = False
         self.organized = False
         
@@ -241,7 +267,8 @@ cdef class Widget(Object):
         self.surface = None
         cdef c_Rect p_rect
         c_rect_move(rect, &self._pos.c_value, &p_rect)
-        if self.parent is not None:
+        # A destroyed widget is not drawn anymore
+        if self.parent is not None and not self._destroyed:
             self.parent.need_redraw(c_rect_to_py(&p_rect)) # XXX: super slow !!! Need to make screen cython
     def need_redraw(self, Rect rect):
         self.c_need_redraw(&rect.c_value)
@@ -251,10 +278,18 @@ cdef class Widget(Object):
         
             Ths position where we paint is stored in the painter itself (opengl style) 
         """ 
+        # The parents call c_draw directly, so we only reach the
+        # python draw method of the widgets that ask for it
+        if self.python_draw:
+            self.draw(painter)
+        else:
+            self.c_draw_widget(painter)
+            
+    cdef void c_draw_widget(self, Painter painter) except *:
         if self.store_surface and self.surface is None:
             surface = painter.c_surface_from_size(&self.rect.c_value.size)
             self.store_surface = False
-            self.c_draw(painter._to_surface(surface))
+            self.c_draw_widget(painter._to_surface(surface))
             self.store_surface = True
             self.surface = surface
         
@@ -270,17 +305,24 @@ cdef class Widget(Object):
             mask = painter.c_mask
             painter.c_clip(&c.rect.c_value)
             if c_rect_intersect(&painter.c_mask, &c.rect.c_value):
-                c.c_draw(painter)
+                if painter.profiler is None:
+                    c.c_draw(painter)
+                else:
+                    painter.profiler.draw(c, painter)
             painter.c_set_mask(&mask)
             painter.c_umove(&c._pos.c_value)
             
     def draw(self, o):
-        self.c_draw(o)
+        self.c_draw_widget(o)
         
     cdef void c_do_resize(self) except *:
         cdef Widget c
-        for c in self.children:
-            c.c_do_resize()
+        # We only go into the children if one of them or of their own
+        # children is not resized
+        if not self.children_resized:
+            self.children_resized = True
+            for c in self.children:
+                c.c_do_resize()
         if self._resized:
             return
         self.resize()
@@ -295,11 +337,18 @@ cdef class Widget(Object):
             self.optimal_size = Vect.merge(self.min_size, *[c.optimal_size for c in self.children])
         
     def do_organize(self):
+        """Organize the widget and its children if they need it
+
+        We only go into the children if one of them or of their own
+        children is not organized.
+        """
         if not self.organized:
             self.organize()
             self.need_redraw(self.rect)
-        for c in self.children:
-            c.do_organize()
+        if not self.children_organized:
+            self.children_organized = True
+            for c in self.children:
+                c.do_organize()
         self.organized = True
             
     def organize(self):
@@ -27,13 +27,22 @@ cimport painter
 from painter cimport Painter
 
 cimport geo
-from geo cimport Vect
+from geo cimport Vect, Rect, c_Rect, c_rect_clip, c_rect_merge, c_rect_to_py
 
 cdef class Window(Widget):
     """ Special widget that can receive events from an external source
         
         A window can also be an event source for other sub window. We can also block the events to all but one
         child, making it a modal dialog.
+        
+        An opaque window draws its contents into a surface, its layer, that is kept between the frames. Only
+        the dirty part of the layer is redrawn, the rest of the time the layer is just blitted. The opaque
+        windows and the modal windows inside an opaque window are not drawn into its layer but over it, so
+        that a dialog or an update of the top bar doesn't redraw the windows below.
+        
+        The layer has the black background of the screen, so an opaque window hides everything below it. The
+        other windows are drawn directly into their parent, because drawing into a transparent layer is much
+        slower.
     """
     
     cdef readonly list events
@@ -43,9 +52,22 @@ cdef class Window(Widget):
     
     cdef int child_need_organize
     cdef int child_need_resize
+    
+    cdef public int opaque
+    cdef public object layer             # The surface of the contents
+    cdef object layer_size
+    cdef int layer_dirty                 # True if a part of the layer need to be redrawn
+    cdef c_Rect layer_dirty_rect
+    cdef readonly list windows           # The windows inside this one
+    cdef readonly Window parent_window
 
-    def __init__(self, Widget parent, modal = True, events_source = None, **kargs):
+    def __init__(self, Widget parent, modal = True, events_source = None, opaque = False, **kargs):
+        self.opaque = opaque
+        self.windows = []
         Widget.__init__(self, parent, **kargs)
+        if self.parent is not None:
+            self.parent_window = self.window
+            self.parent_window.windows.append(self)
         
         if events_source is None:
             events_source = parent if isinstance(parent, Window) else parent.window
@@ -58,14 +80,35 @@ cdef class Window(Widget):
             source = self.events_source
             source.modal_child = self
             
-        self.child_need_organize = False
-        self.child_need_resize = False
+    def drawn_over(self):
+        """Return True if we are drawn over our parent window layer"""
+        cdef Window parent = self.parent_window
+        return parent is not None and parent.opaque and (self.opaque or self is parent.modal_child)
+        
+    def add(self, Widget w):
+        if not self.opaque or not isinstance(w, Window):
+            super(Window, self).add(w)
+            return
+        # We don't organize and redraw our contents for a new window, we only need to set its size
+        self.children.append(w)
+        self._emit_1('add-child', w)
+        w.pos = self.contents_pos
+        w.size = self.contents_size
 
     def remove(self, Widget w):
-        super(Window, self).remove(w)
+        if isinstance(w, Window) and w.drawn_over():
+            self.children.remove(w)
+            self.need_compose(w.rect.move(w.pos))
+        else:
+            super(Window, self).remove(w)
         if w is self.modal_child:
             self.modal_child = None
             
+    def destroy(self):
+        if self.parent_window is not None and self in self.parent_window.windows:
+            self.parent_window.windows.remove(self)
+        super(Window, self).destroy()
+            
     def resize(self):
         return
         
@@ -74,26 +117,133 @@ cdef class Window(Widget):
             return [self.modal_child]
         return list(reversed(self.children))
         
-    cdef void c_draw(self, Painter painter):
-        if self.modal_child is None:
-            Widget.c_draw(self, painter)
+    cdef void c_need_redraw(self, c_Rect *rect):
+        cdef c_Rect clipped
+        if self.opaque:
+            c_rect_clip(rect, &self.rect.c_value, &clipped)
+            if clipped.size.x <= 0 or clipped.size.y <= 0:
+                return
+            if self.layer is not None:
+                if self.layer_dirty:
+                    c_rect_merge(&self.layer_dirty_rect, &clipped, &self.layer_dirty_rect)
+                else:
+                    self.layer_dirty_rect = clipped
+                    self.layer_dirty = True
+            self.need_compose(c_rect_to_py(&clipped))
+        elif self.drawn_over():
+            self.need_compose(c_rect_to_py(rect))
         else:
+            Widget.c_need_redraw(self, rect)
+            
+    def need_compose(self, Rect rect):
+        """Redraw a part of the window without redrawing its layer
+        
+            If we are drawn over the layer of our parent window, the parent layer doesn't need to be redrawn
+            either.
+        """
+        if self.drawn_over():
+            self.parent_window.need_compose(rect.move(self.abs_pos()))
+        elif self.parent is not None:
+            Widget.c_need_redraw(self, &rect.c_value)
+        
+    cdef void c_draw(self, Painter painter):
+        if painter.layer is not None and painter.layer is self.parent_window and self.drawn_over():
+            # Our parent window draws us over its layer
+            return
+        if self.modal_child is not None:
             painter.c_move(&self.modal_child._pos.c_value)
-            self.modal_child.c_draw(painter)
+            if painter.profiler is None:
+                self.modal_child.c_draw(painter)
+            else:
+                painter.profiler.draw(self.modal_child, painter)
             painter.c_umove(&self.modal_child._pos.c_value)
+        elif not self.opaque:
+            Widget.c_draw(self, painter)
+        else:
+            self.draw_layer(painter)
+            painter._draw_surface(self.layer, None)
+            self.draw_windows(painter)
+            
+    def draw_layer(self, Painter painter):
+        """Redraw the dirty part of the layer"""
+        cdef Vect size = self.size
+        if self.layer is None or self.layer_size != (size.x, size.y):
+            self.layer = painter.c_surface_from_size(&size.c_value, False)
+            self.layer_size = (size.x, size.y)
+            self.layer_dirty_rect = self.rect.c_value
+            self.layer_dirty = True
+        if not self.layer_dirty:
+            return
+        cdef Painter layer_painter = painter._to_surface(self.layer)
+        layer_painter.layer = self
+        layer_painter.c_set_mask(&self.layer_dirty_rect)
+        self.layer_dirty = False
+        # The background color of the screen
+        layer_painter._fill((0, 0, 0), size)
+        Widget.c_draw(self, layer_painter)
+        
+    def draw_windows(self, Painter painter):
+        """Draw the opaque windows inside this one over the layer"""
+        cdef Window window
+        cdef Widget w
+        cdef Rect rect
+        cdef c_Rect mask
+        for window in self.windows:
+            if not window.opaque:
+                continue
+            # The visible part of the window is clipped by all its parents
+            rect = window.rect
+            w = window
+            while w is not self:
+                rect = rect.move(w._pos).clip(w.parent.rect)
+                w = w.parent
+            mask = painter.c_mask
+            painter.c_clip(&rect.c_value)
+            if rect.intersect(painter.mask):
+                pos = window.abs_pos()
+                painter.move(pos)
+                if painter.profiler is None:
+                    window.c_draw(painter)
+                else:
+                    painter.profiler.draw(window, painter)
+                painter.umove(pos)
+            painter.c_set_mask(&mask)
             
+    def wakeup(self):
+        """Ask our events source for a tick"""
+        if self.events_source is not None:
+            self.events_source.wakeup()
+
     def need_organize(self, child):
-        self.child_need_organize = True
+        if child is not self:
+            self.children_organized = False
+        if not self.child_need_organize:
+            self.child_need_organize = True
+            self.wakeup()
     def need_resize(self, child):
-        self.child_need_resize = True
+        if child is not self:
+            self.children_resized = False
+        if not self.child_need_resize:
+            self.child_need_resize = True
+            self.wakeup()
             
-    def tick(self):
+    def layout(self):
+        """Resize and organize the widgets that need it
+
+        This is also done for all the windows inside this one.
+        """
+        cdef Window window
         if self.child_need_resize:
             self.do_resize()
             self.child_need_resize = False
         if self.child_need_organize:
             self.do_organize()
             self.child_need_organize = False
+        for window in self.windows[:]:
+            window.layout()
+
+    def tick(self):
+        self.layout()
         
         self.events = []
         if self.modal_child is None:
@@ -148,13 +148,11 @@ class XWindow(Widget):
 
         This effectively turns the window into a windows manager.
         """
-        # XXX: need to put `watch` method into tichy.mainloop
-        import gobject
+        import tichy
 
         logger.info("listening to display socket %s",
                     self.x_display.fileno())
-        self.watch = gobject.io_add_watch(self.x_display.fileno(),
-                                          gobject.IO_IN,
+        self.watch = tichy.mainloop.watch(self.x_display.fileno(),
                                           self._on_x_display_socket_ready)
         self.x_screen.root.change_attributes(
             event_mask=Xlib.X.SubstructureNotifyMask)
@@ -162,9 +160,8 @@ class XWindow(Widget):
 
     def disable_wm(self):
         if self.watch:
-            # XXX: need to put `watch` method into tichy.mainloop
-            import gobject
-            gobject.source_remove(self.watch)
+            import tichy
+            tichy.mainloop.source_remove(self.watch)
             self.watch = None
             self.x_screen.root.change_attributes(event_mask=Xlib.X.NONE)
 
@@ -26,12 +26,13 @@ from edit import Edit
 from button import Button
 from geo import Vect, Rect
 from scrollable import Scrollable, ScrollableSlide
+from virtual_list import VirtualList
 from painter import Painter
 from image import ImageWidget
 from screen import Screen
 from window import Window
 from spring import Spring
 from sdl_painter import SdlPainter as Painter
-from mainloop import EventsLoop
+from mainloop import EventsLoop, HeadlessLoop
 from surf_widget import SurfWidget
 from xwindow import XWindow
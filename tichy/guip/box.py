@@ -43,6 +43,31 @@ class Box(Frame):
 
     spacing = property(__get_spacing, __set_spacing)
 
+    def move_child(self, w, index):
+        """Move a child of the box to a given index
+
+        The widgets are always added at the end of their parent, this
+        can then place them somewhere else in the box.
+        """
+        children = self.children
+        if children[index] is w:
+            return
+        children.remove(w)
+        children.insert(index, w)
+        self.organized = False
+
+    def reorder(self, children):
+        """Change the order of the children of the box
+
+        :Parameters:
+
+            children : list of `Widget`
+                All the children of the box, in their new order
+        """
+        assert len(children) == len(self.children)
+        self.children[:] = children
+        self.organized = False
+
     def resize(self):
         axis = self.axis
         optimal_size = Vect(0, 0)
@@ -67,55 +92,51 @@ class Box(Frame):
 
     def organize(self):
         axis = self.axis
-        # First we put all the children in there minimum size
-        for c in self.children:
-            c.size = c.min_size.set(axis - 1, self.contents_size[axis - 1])
-            assert c.size[axis] >= c.min_size[axis]
-
-        # We grow the children as much as we can
+        children = self.children
+        spacing = self.spacing
         length = self.contents_size[axis]
-        while True:
-            children_need = [c for c in self.children
-                             if c.optimal_size[axis] > c.size[axis]]
-            if not children_need:
-                break
-
-            tot = sum((c.size[axis] + self.spacing \
-                           for c in self.children)) - self.spacing
-            free = max(0, length - tot)
-
-            free_per_child = free / len(children_need)
-            for c in children_need:
-                if c.optimal_size[axis] - c.size[axis] < free_per_child:
-                    c.size = c.size.set(axis, c.optimal_size[axis])
-                    break
-            else:
+        # First we give all the children there minimum size
+        sizes = [c.min_size[axis] for c in children]
+
+        # We grow the children as much as we can, sharing the free
+        # space equally. The children that need less than their
+        # share get their optimal size, and the rest of the space is
+        # shared between the others. We look at the children sorted
+        # by their needs, so that a single pass is enough.
+        free = max(0, length - sum(sizes) - spacing * (len(children) - 1))
+        needs = sorted((c.optimal_size[axis] - sizes[i], i)
+                       for i, c in enumerate(children)
+                       if c.optimal_size[axis] > sizes[i])
+        for k, (need, i) in enumerate(needs):
+            free_per_child = free / (len(needs) - k)
+            if need >= free_per_child:
+                for need, i in needs[k:]:
+                    sizes[i] += free_per_child
                 break
-        for c in children_need:
-            c.size = c.size.set(axis, c.size[axis] + free_per_child)
+            sizes[i] += need
+            free -= need
 
         # If we still have some free space, we grow the expand children
-        tot = sum((c.size[axis] + self.spacing for c in self.children)) - \
-            self.spacing
-        free = length - tot
+        free = length - sum(sizes) - spacing * (len(children) - 1)
         if free > 0:
-            nb_expand = sum(1 for c in self.children if c.expand)
+            nb_expand = sum(1 for c in children if c.expand)
             if nb_expand:
-                for c in self.children:
-                    if not c.expand:
-                        continue
-                    given = free / nb_expand
-                    assert given >= 0
-                    c.size = c.size.set(axis, c.size[axis] + given)
-
-        # Finally we also set the positions
+                given = free / nb_expand
+                for i, c in enumerate(children):
+                    if c.expand:
+                        sizes[i] += given
+
+        # Finally we set the sizes and the positions, only once so
+        # that the children that don't change are not reorganized
         pos = self.contents_pos
-        for c in self.children:
+        width = self.contents_size[axis - 1]
+        for c, size in zip(children, sizes):
+            c.size = Vect(0, 0).set(axis, size).set(axis - 1, width)
             assert c.size[axis] >= c.min_size[axis], \
                 (c, c.size[axis], c.min_size[axis])
             c.pos = pos
-            pos += Vect(c.size[0] + self.spacing if axis == 0 else 0,
-                        c.size[1] + self.spacing if axis == 1 else 0)
+            pos += Vect(c.size[0] + spacing if axis == 0 else 0,
+                        c.size[1] + spacing if axis == 1 else 0)
 
 
 class Fixed(Widget):
@@ -19,7 +19,7 @@
 from widget import Widget
 from geo import Rect, Vect
 
-import gobject  # Only for the timeout
+import tichy
 
 
 class Button(Widget):
@@ -60,8 +60,8 @@ class Button(Widget):
             def on_hold(*args):
                 self.hold()
 
-            self.hold_connection = gobject.timeout_add(self.holdable,
-                                                       on_hold)
+            self.hold_connection = tichy.mainloop.timeout_add(
+                self.holdable, on_hold)
 
         return True
 
@@ -86,7 +86,7 @@ class Button(Widget):
     def unhold(self):
         """This has to be called every time we need to cancel the hold"""
         if self.hold_connection:
-            gobject.source_remove(self.hold_connection)
+            tichy.mainloop.source_remove(self.hold_connection)
             self.hold_connection = None
 
     def destroy(self):
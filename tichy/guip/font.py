@@ -17,21 +17,59 @@
 #    You should have received a copy of the GNU General Public License
 #    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
 
+from bisect import bisect_left
+
 import pygame
 import pygame.font
 
+from tichy.lru import LRUCache
+
+
+def is_cjk(char):
+    """Return True if a character is a chinese, japanese or korean one
+
+    We can break a line before or after those characters.
+    """
+    return u'\u2e80' <= char <= u'\u9fff' or \
+        u'\uac00' <= char <= u'\ud7af' or \
+        u'\uf900' <= char <= u'\ufaff' or \
+        u'\uff00' <= char <= u'\uffef'
+
 
 class Font(object):
+    """A font that renders texts with a dark border
+
+    The rendered texts are kept in a cache shared by all the fonts,
+    so rendering the same text again only costs a dictionary lookup.
+    Each line is rendered as a whole by SDL_ttf, so that we keep the
+    kerning and the combining characters.
+    """
+
+    # The surfaces of the rendered texts, keyed by (font file, font
+    # size, text, color, length)
+    cache = LRUCache(2 * 1024 * 1024)
 
     def __init__(self, name=None, size=32):
         name = name or 'arplumingtwmbe'
-        file = pygame.font.match_font(name)
-        self.font = pygame.font.Font(file, size)
+        self.file = pygame.font.match_font(name)
+        self.size = size
+        self.font = pygame.font.Font(self.file, size)
+        # char -> advance
+        self.advances = {}
+
+    def advance(self, char):
+        """Return the width of a character"""
+        try:
+            return self.advances[char]
+        except KeyError:
+            ret = self.font.size(char)[0]
+            self.advances[char] = ret
+            return ret
 
     def render_line(self, text, color=None):
         # We use a little trick to add a border to the text
         border = self.font.render(text, True, (64, 64, 64))
-        text = self.font.render(text, True, (255, 255, 255))
+        text = self.font.render(text, True, color or (255, 255, 255))
         ret = pygame.Surface(text.get_rect().inflate(2, 2).size, 0, text)
         for x in (0, 2):
             for y in (0, 2):
@@ -40,8 +78,17 @@ class Font(object):
         return ret.convert_alpha()
 
     def render(self, text, color=None, length=None):
+        color = color and tuple(color)
+        key = (self.file, self.size, text, color, length)
+        surf = self.cache.get(key)
+        if surf is None:
+            surf = self._render(text, color, length)
+            self.cache.put(key, surf, surf.get_pitch() * surf.get_height())
+        return surf
+
+    def _render(self, text, color=None, length=None):
         lines = self.split(text, length)
-        surfs = [self.render_line(line) for line in lines]
+        surfs = [self.render_line(line, color) for line in lines]
         height = self.font.get_height()
         rects = [surf.get_rect().move(0, height * i) \
                      for i, surf in enumerate(surfs)]
@@ -52,23 +99,63 @@ class Font(object):
         return surf
 
     def split(self, text, length=None):
-        # For the moment we use a very stupid way of doing it...
+        """Split a text into lines
+
+        :Parameters:
+
+            text : unicode
+                The text, the new lines characters force a new line
+
+            length : int | None
+                If set, the lines are wrapped so that they are
+                shorter than this length
+        """
+        paragraphs = text.split('\n')
+        if not paragraphs[-1]:
+            paragraphs.pop()
+        if not length:
+            return paragraphs
+        ret = []
+        for paragraph in paragraphs:
+            ret.extend(self.wrap(paragraph, length))
+        return ret
+
+    def wrap(self, text, length):
+        """Wrap a text without new lines into lines shorter than length
+
+        We break the lines on spaces and around CJK characters. A
+        word longer than a line is cut. We only measure each glyph
+        once, so this is linear with the length of the text.
+        """
+        advance = self.advance
+        # pos[i] is the width of text[:i]
+        pos = [0]
+        for char in text:
+            pos.append(pos[-1] + advance(char))
         ret = []
-        i = 0
-        while text:
-            i += 1
-            if i > len(text):
-                ret.append(text)
-                break
-            line = text[:i]
-            if line[-1] == '\n':
-                ret.append(line[:-1])
-                text = text[i:]
-                i = 0
-                continue
-            if length and self.font.size(line)[0] >= length:
-                ret.append(line[:-1])
-                text = text[i-1:]
-                i = 0
-                continue
+        start = 0
+        # (end of the line, start of the next line) if we break at
+        # the last break opportunity
+        brk = None
+        for i, char in enumerate(text):
+            cjk = is_cjk(char)
+            if char == ' ':
+                brk = (i, i + 1)
+            elif cjk and i > start:
+                brk = (i, i)
+            while i > start and pos[i + 1] - pos[start] >= length:
+                if brk and brk[0] > start:
+                    end, next = brk
+                else:
+                    # We cut the word at the last character that fits
+                    end = bisect_left(pos, pos[start] + length, start + 1,
+                                      i + 1) - 1
+                    end = next = max(end, start + 1)
+                ret.append(text[start:end])
+                start = next
+                brk = None
+            if cjk:
+                brk = (i + 1, i + 1)
+        if start < len(text) or not ret:
+            ret.append(text[start:])
         return ret
@@ -23,6 +23,8 @@ from widget import Widget
 from label import Label
 from button import Button
 
+from tichy.nine_slice import frame_surface
+
 
 class Painter(object):
     """This class is used to draw all the widgets
@@ -31,6 +33,11 @@ class Painter(object):
 
     """
 
+    # The window whose layer we are drawing, if any
+    layer = None
+    # The `DrawProfiler` the widgets are drawn through, if any
+    profiler = None
+
     def __init__(self, pos=None, mask=None):
         self.pos = pos or Vect(0, 0)
         self.mask = mask
@@ -53,6 +60,13 @@ class Painter(object):
         if isinstance(o, Widget):
             return self.draw_widget(o)
 
+    def draw_child(self, w):
+        """Draw a child widget, through the profiler if there is one"""
+        if self.profiler is None:
+            w.draw(self)
+        else:
+            self.profiler.draw(w, self)
+
     def set_mask(self, rect):
         self.mask = Rect(rect[0], rect[1])
 
@@ -72,12 +86,16 @@ class Painter(object):
         """
         raise NotImplementedError
 
-    def surface_from_size(self, size):
-        """Create a new surface"""
+    def surface_from_size(self, size, alpha=True):
+        """Create a new surface, transparent if alpha is True"""
         raise NotImplementedError
 
-    def surface_from_image(self, path):
-        """Create a new surface"""
+    def surface_from_image(self, path, size=None):
+        """Create a new surface
+
+        The SVG images are rendered at the given size. The other
+        images are loaded at their own size.
+        """
         raise NotImplementedError
 
     def surface_from_text(self, font, text):
@@ -93,52 +111,22 @@ class Painter(object):
     def fill(self, color, size=None):
         raise NotImplementedError
 
+    def scroll_surface(self, surf, offset):
+        """Shift the contents of a surface"""
+        raise NotImplementedError
+
     def draw_frame(self, frame, size):
-        """Draw a frame. This function is in fact currently very slow !"""
-        size = asvect(size)
-
-        def indexes():
-            width, height = size
-            # The corners
-            yield (0, 0), (0, 0)
-            yield (width - 8, 0), (24, 0)
-            yield (0, height - 8), (0, 24)
-            yield (width - 8, height - 8), (24, 24)
-
-            mwidth = width / 2
-            mheight = height / 2
-
-            # The borders
-            for i in range(1, mwidth / 8):
-                yield (i * 8, 0), (8, 0)
-                yield (i * 8, height - 8), (8, 24)
-            for i in range(mwidth / 8, width / 8 - 1):
-                yield (i * 8, 0), (16, 0)
-                yield (i * 8, height - 8), (16, 24)
-
-            for i in range(1, mheight / 8):
-                yield (0, i * 8), (0, 8)
-                yield (width - 8, i * 8), (24, 8)
-            for i in range(mheight / 8, height / 8 - 1):
-                yield (0, i * 8), (0, 16)
-                yield (width - 8, i * 8), (24, 16)
-        frame.image.load(self)
-        surf = frame.image.surf
-        for dest, src in indexes():
-            self.move(Vect(*dest))
-            self.draw_surface(surf, Rect(asvect(src), Vect(8, 8)))
-            self.umove(Vect(*dest))
-
-        c1 = surf.get_at((16, 15))
-        half_size = Vect(size[0] - 16, size[1] / 2 - 8)
-        self.move(Vect(8, 8))
-        self.fill(c1, half_size)
-        self.umove(Vect(8, 8))
+        """Draw a frame
 
-        c2 = surf.get_at((16, 16))
-        self.move(Vect(8, half_size[1] + 8))
-        self.fill(c2, half_size)
-        self.umove(Vect(8, half_size[1] + 8))
+        The frame surfaces are composed once for every size and
+        cached (see `tichy.nine_slice`), so this is a single blit.
+        """
+        frame.image.load(self)
+        self.draw_surface(frame_surface(frame.image, asvect(size)))
 
     def flip(self, rect=None):
         raise NotImplementedError
+
+    def flip_rects(self, rects):
+        """Show a list of rects of the display, all at once"""
+        raise NotImplementedError
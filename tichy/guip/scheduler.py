@@ -0,0 +1,117 @@
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+from collections import deque
+
+import tichy.object
+from widget import Widget
+
+
+class FrameScheduler(tichy.object.Object):
+    """Run the frames of a screen
+
+    A frame is done once per tick, after the events have been
+    handled. It does all the pending layout, then paints the dirty
+    rects and flips them, so the result of the events is shown by the
+    same tick. The frames are paced by the ticks of the events loop
+    (see `EventsLoop.fps`).
+
+    The work that is not urgent can be added with `idle_add`. It is
+    done after the frames, as long as the frame plus the idle work
+    take less than `budget` seconds.
+
+    After every frame we emit a 'frame' signal with a dict of the
+    timings of the frame, in ms : 'layout', 'paint', 'flip' and
+    'idle', plus the number of painted 'pixels'. If
+    `Widget.count_layout` is set, we also give the number of widgets
+    'resizes' and 'organizes' since the last frame.
+    """
+
+    # The time in seconds a frame and the idle work can take
+    budget = 0.025
+
+    def __init__(self, screen):
+        super(FrameScheduler, self).__init__()
+        self.screen = screen
+        self.idle_tasks = deque()   # [id, callback, args]
+        self.next_id = 0
+        self.frames = 0
+        self.timings = None
+        self.resize_count = Widget.resize_count
+        self.organize_count = Widget.organize_count
+
+    def idle_add(self, callback, *args):
+        """Call a callback after a frame, when we have the time
+
+        The callback is called again after an other frame as long as
+        it returns True.
+
+        :Returns: The id of the task, to use with `idle_remove`
+        """
+        self.next_id += 1
+        self.idle_tasks.append([self.next_id, callback, args])
+        self.screen.wakeup()
+        return self.next_id
+
+    def idle_remove(self, id):
+        """Remove a task added with `idle_add`"""
+        for task in self.idle_tasks:
+            if task[0] == id:
+                self.idle_tasks.remove(task)
+                return
+
+    def frame(self):
+        """Do a frame"""
+        screen = self.screen
+        start = time.time()
+        screen.layout()
+        layout_end = time.time()
+        rects = screen.paint()
+        paint_end = time.time()
+        screen.flip(rects)
+        flip_end = time.time()
+        self.run_idle_tasks(start + self.budget)
+        end = time.time()
+        self.frames += 1
+        self.timings = {'layout': (layout_end - start) * 1000,
+                        'paint': (paint_end - layout_end) * 1000,
+                        'flip': (flip_end - paint_end) * 1000,
+                        'idle': (end - flip_end) * 1000,
+                        'pixels': screen.painted_pixels if rects else 0}
+        if Widget.count_layout:
+            self.timings.update(
+                resizes=Widget.resize_count - self.resize_count,
+                organizes=Widget.organize_count - self.organize_count)
+            self.resize_count = Widget.resize_count
+            self.organize_count = Widget.organize_count
+        self.emit('frame', self.timings)
+
+    def run_idle_tasks(self, deadline):
+        """Run the idle tasks until a given time"""
+        tasks = self.idle_tasks
+        # We run every task at most once per frame
+        for i in range(len(tasks)):
+            if not tasks or time.time() >= deadline:
+                break
+            task = tasks.popleft()
+            if task[1](*task[2]):
+                tasks.append(task)
+        if tasks:
+            self.screen.wakeup()
@@ -20,6 +20,12 @@
 from widget import Widget
 from geo import Vect, Rect
 from window import Window
+from scheduler import FrameScheduler
+
+
+def area(rect):
+    """Return the number of pixels of a rect"""
+    return rect.size[0] * rect.size[1]
 
 
 class Screen(Window):
@@ -32,40 +38,108 @@ class Screen(Window):
     widgets
     """
 
+    # Two dirty rects are merged if their bounding rect is not bigger
+    # than this factor times the sum of their areas
+    merge_factor = 1.25
+    # The maximum number of dirty rects
+    max_rects = 8
+
     def __init__(self, events_source, painter, **kargs):
-        self.redraw_rect = None
+        self.redraw_rects = []
         super(Screen, self).__init__(None, events_source=events_source,
                                      modal=False, **kargs)
         self.size = Vect(480, 640) # TODO find a better way
         self.painter = painter
-        self.redraw_rect = self.rect
+        self.redraw_rects = [self.rect]
+        # The number of pixels painted during the last frame, and
+        # since the creation of the screen
+        self.painted_pixels = 0
+        self.total_painted_pixels = 0
+        self.scheduler = FrameScheduler(self)
 
         self.monitor(events_source, 'tick', self.on_tick)
 
     screen = property(lambda self: self)
 
     def draw(self):
-        if not self.redraw_rect:
-            return
+        self.flip(self.paint())
+
+    def paint(self):
+        """Paint the dirty rects
+
+        :Returns: The list of the painted rects
+        """
+        if not self.redraw_rects:
+            return []
         assert self.painter.pos.x == self.painter.pos.y == 0
-        # TODO: use virtual attribute
-        self.painter.set_mask(self.redraw_rect)
-        # The background color
-        self.painter.fill((0, 0, 0), self.size)
-        super(Screen, self).draw(self.painter)
-        self.painter.flip(self.redraw_rect)
-        self.redraw_rect = None
+        # We reset the list first, so that the rects invalidated
+        # during the drawing are redrawn at the next frame
+        rects, self.redraw_rects = self.redraw_rects, []
+        pixels = 0
+        for rect in rects:
+            # TODO: use virtual attribute
+            self.painter.set_mask(rect)
+            # The background color
+            self.painter.fill((0, 0, 0), self.size)
+            if self.painter.profiler is None:
+                super(Screen, self).draw(self.painter)
+            else:
+                self.painter.profiler.draw(self, self.painter,
+                                           super(Screen, self).draw)
+            pixels += area(rect)
+        self.painted_pixels = pixels
+        self.total_painted_pixels += pixels
+        return rects
+
+    def flip(self, rects):
+        """Show the painted rects on the display
+
+        All the rects are updated by a single call, so that SDL only
+        has to push them to the display once per frame.
+        """
+        self.painter.flip_rects(rects)
 
     def need_redraw(self, rect):
-        self.redraw_rect = rect if not self.redraw_rect else \
-            self.redraw_rect.merge(rect)
+        """Add a rect to the list of the dirty rects
+
+        The dirty rects are kept disjoint : a new rect is merged with
+        every rect it intersects, or that is close enough so that
+        drawing their bounding rect doesn't cost much more than
+        drawing both of them. If there are more than `max_rects`
+        rects, we merge them all.
+        """
+        rect = rect.clip(self.rect)
+        if not area(rect):
+            return
+        rects = self.redraw_rects
+        if not rects:
+            self.wakeup()
+        i = 0
+        while i < len(rects):
+            other = rects[i]
+            merged = rect.merge(other)
+            if rect.intersect(other) or area(merged) <= \
+                    (area(rect) + area(other)) * self.merge_factor:
+                # The merged rect may now touch rects we already
+                # checked, so we start again
+                del rects[i]
+                rect = merged
+                i = 0
+            else:
+                i += 1
+        rects.append(rect)
+        if len(rects) > self.max_rects:
+            rect = rects[0]
+            for other in rects[1:]:
+                rect = rect.merge(other)
+            self.redraw_rects = [rect]
 
     def on_tick(self, event_source):
         self.tick()
 
     def tick(self):
-        self.draw()
         super(Screen, self).tick()
+        self.scheduler.frame()
 
     def destroy(self):
         super(Screen, self).destroy()
@@ -16,6 +16,8 @@
 #    You should have received a copy of the GNU General Public License
 #    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+
 import pygame
 import pygame.image
 import pygame.font
@@ -25,6 +27,7 @@ from geo import Vect, Rect, asvect, asrect
 from painter import Painter
 from tichy.tasklet import Tasklet, Wait
 from tichy.object import Object
+from tichy import svg_raster
 
 from font import Font
 
@@ -39,12 +42,23 @@ class SdlPainter(Painter):
     simple blitting functions, but do it very efficiently.
     """
 
-    def __init__(self, size, fullscreen=False):
+    def __init__(self, size, fullscreen=False, headless=False):
+        """Open the display
+
+        If headless is True we use the SDL dummy video driver, that
+        draws into memory without showing anything.
+        """
         Painter.__init__(self, Vect(0, 0), Rect((0, 0), size))
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
         pygame.display.init()
         pygame.font.init()
-        flags = pygame.RESIZABLE
-        self.surface = pygame.display.set_mode(size, flags)
+        if headless:
+            # The dummy driver gives a 8 bits display by default
+            self.surface = pygame.display.set_mode(size, 0, 32)
+        else:
+            flags = pygame.RESIZABLE
+            self.surface = pygame.display.set_mode(size, flags)
         pygame.display.set_caption("Tichy")
 
     def to_surface(self, surface):
@@ -54,6 +68,7 @@ class SdlPainter(Painter):
         ret.pos = Vect(0, 0)
         ret.mask = Rect((0, 0), surface.get_size())
         ret.surface = surface
+        ret.profiler = self.profiler
         return ret
 
     def set_mask(self, mask):
@@ -65,47 +80,20 @@ class SdlPainter(Painter):
         super(SdlPainter, self).clip(r)
         self.surface.set_clip(self.mask.move(self.pos).to_list())
 
-    def surface_from_size(self, size):
+    def surface_from_size(self, size, alpha=True):
+        if not alpha:
+            return pygame.Surface(size).convert()
         # This is not really optimized, because we use transparent
         # surface all the time
         return pygame.Surface(size, pygame.SRCALPHA, 32).convert_alpha()
 
-    def surface_from_svg(self, path):
-        import rsvg
-        import cairo
-        import array
-        # NOTE: currently pygame has a bug where it switches channel
-        # in the buffer before drawing it. The fix below is
-        # inefficient and is not being included for now. So the svg
-        # colors will be off
-
-        # commented out pygame channel switch bug
-        #
-        #import re
-        # create pygame image surface
-        # there is a bug in pygame where it switches buffer channels
-        # r"\2\1\4\3"
-        #fixed_buf = re.sub (r"(.)(.)(.)(.)", r"\4\3\2\1", buf.tostring())
-        #surf = pygame.image.fromstring(fixed_buf, (width,height), "ARGB")
-
-        svg = rsvg.Handle(file=path)
-        width, height = svg.props.width, svg.props.width
-        stride = width * 4
-        # create a character data structure because pycairo does not
-        # seem to handle python types
-        buf = array.array('c', chr(0) * width * height * 4)
-        cairo_surface = cairo.ImageSurface.create_for_data(
-            buf, cairo.FORMAT_ARGB32, width, height, stride)
-        cairo_context = cairo.Context(cairo_surface)
-        svg.render_cairo(cairo_context)
-        surf = pygame.image.frombuffer(buf.tostring(),
-                                       (width, height), "ARGB")
-        return surf.convert_alpha()
+    def surface_from_svg(self, path, size=None):
+        return svg_raster.surface_from_svg(path, size).convert_alpha()
 
-    def surface_from_image(self, path):
+    def surface_from_image(self, path, size=None):
         if path[-3:] == 'svg':
             try:
-                return self.surface_from_svg(path)
+                return self.surface_from_svg(path, size)
             except Exception, e:
                 logger.error("can't use surface_from_svg : %s", e)
         surf = pygame.image.load(path)
@@ -124,6 +112,9 @@ class SdlPainter(Painter):
             self.surface.blit(surf, self.pos.to_list(), area.to_list())
         else:
             self.surface.blit(surf, self.pos.to_list())
+        if self.profiler is not None:
+            size = area.size if area else surf.get_size()
+            self.profiler.blit(self.mask.clip(Rect((0, 0), size)))
 
     def fill(self, color, size=None):
         if size:
@@ -131,9 +122,23 @@ class SdlPainter(Painter):
                               (self.pos.x, self.pos.y, size[0], size[1]))
         else:
             self.surface.fill(color)
+        if self.profiler is not None:
+            rect = Rect((0, 0), size) if size else \
+                Rect(-self.pos, self.surface.get_size())
+            self.profiler.blit(self.mask.clip(rect))
+
+    def scroll_surface(self, surf, offset):
+        # The scroll is clipped by the clip rect of the surface, that
+        # may have been set by a painter drawing into it
+        surf.set_clip(None)
+        surf.scroll(offset[0], offset[1])
 
     def flip(self, rect=None):
         if not rect:
             pygame.display.flip()
         else:
             pygame.display.update(rect.to_list())
+
+    def flip_rects(self, rects):
+        if rects:
+            pygame.display.update([rect.to_list() for rect in rects])
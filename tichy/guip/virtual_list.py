@@ -0,0 +1,47 @@
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from widget import Widget
+from geo import Vect
+from scrollable import Scrollable
+from tichy.virtual_list import VirtualListContentsMixin, VirtualListMixin
+
+
+class VirtualListContents(VirtualListContentsMixin, Widget):
+    """The sliding child of a `VirtualList`
+
+    See `tichy.virtual_list.VirtualListContentsMixin`.
+    """
+
+    Vect = Vect
+
+    def do_organize(self):
+        if not self.organized and Widget.count_layout:
+            Widget.organize_count += 1
+        super(VirtualListContents, self).do_organize()
+
+
+class VirtualList(VirtualListMixin, Scrollable):
+    """Scrollable view of a list that only creates the visible views
+
+    See `tichy.virtual_list.VirtualListMixin`.
+    """
+
+    contents_class = VirtualListContents
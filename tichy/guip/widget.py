@@ -28,6 +28,13 @@ class Widget(Object):
     This is really similar to gtk.widget, except lighter.
     """
 
+    # Set to True to count the calls to `resize` and `organize` for
+    # all the widgets, so that we can measure the layout work (see
+    # `FrameScheduler`). This is only meant for the benchmarks.
+    count_layout = False
+    resize_count = 0
+    organize_count = 0
+
     def __init__(self, parent, style=None, optimal_size=None,
                  min_size=None, expand=False, item=None,
                  same_as=None, tags=[], pos=None, **kargs):
@@ -78,6 +85,10 @@ class Widget(Object):
 
         self.__organized = False
         self.__resized = False
+        # False if some children or sub-children need to be organized
+        # or resized
+        self.children_organized = False
+        self.children_resized = False
 
         self.__destroyed = False
 
@@ -119,7 +130,12 @@ class Widget(Object):
                 self.__style = self.parent.style
         else:
             raise Exception("no parent and no style")
-        self.style_dict = self.__style.apply(self)
+        style_dict = self.__style.apply(self)
+        if style_dict is self.style_dict:
+            # The styles cache gave us the same dict, so the children
+            # styles didn't change either
+            return
+        self.style_dict = style_dict
         children_style = self.__style if \
             'children-style' not in self.style_dict else \
             self.style_dict['children-style']
@@ -134,10 +150,14 @@ class Widget(Object):
         return ret
 
     def add_tag(self, tag):
+        if tag in self.tags:
+            return
         self.tags.add(tag)
         self.style = self.style
 
     def remove_tag(self, tag):
+        if tag not in self.tags:
+            return
         self.tags.discard(tag)
         self.style = self.style
 
@@ -145,7 +165,13 @@ class Widget(Object):
         return self.__min_size or self.style_dict.get('min-size', Vect(0, 0))
 
     def __set_min_size(self, value):
+        if value == self.__min_size:
+            return
         self.__min_size = value
+        # The parent needs to take the new size into account
+        if self.parent is not None:
+            self.parent.resized = False
+            self.parent.organized = False
 
     min_size = property(__get_min_size, __set_min_size)
 
@@ -154,9 +180,12 @@ class Widget(Object):
 
     def __set_optimal_size(self, value):
         assert isinstance(value, Vect), value
+        if value == self.__optimal_size:
+            return
         self.__optimal_size = value
-        self.parent.resized = False
-        self.parent.organized = False
+        if self.parent is not None:
+            self.parent.resized = False
+            self.parent.organized = False
 
     optimal_size = property(__get_optimal_size, __set_optimal_size)
 
@@ -171,6 +200,8 @@ class Widget(Object):
     organized = property(__get_organized, __set_organized)
 
     def need_organize(self, child):
+        if child is not self:
+            self.children_organized = False
         if self.parent:
             self.parent.need_organize(child)
 
@@ -179,10 +210,13 @@ class Widget(Object):
 
     def __set_resized(self, value):
         self.__resized = value
-        self.need_resize(self)
+        if not value:
+            self.need_resize(self)
     resized = property(__get_resized, __set_resized)
 
     def need_resize(self, child):
+        if child is not self:
+            self.children_resized = False
         if self.parent:
             self.parent.need_resize(child)
 
@@ -202,9 +236,13 @@ class Widget(Object):
     def __set_pos(self, value):
         if value == self.__pos:
             return
-        self.need_redraw(self.rect)
+        # Moving the widget doesn't change its contents, so we keep
+        # its stored surface and only redraw the parent
+        if self.parent is not None:
+            self.parent.need_redraw(self.rect.move(self.__pos))
         self.__pos = value
-        self.need_redraw(self.rect)
+        if self.parent is not None:
+            self.parent.need_redraw(self.rect.move(self.__pos))
     pos = property(__get_pos, __set_pos)
 
     def __get_contents_rect(self):
@@ -260,6 +298,8 @@ class Widget(Object):
         """Add a child to the widget"""
         self.children.append(w)
         self.emit('add-child', w)   # XXX: remove ?
+        self.children_organized = False
+        self.children_resized = False
         self.organized = False
         self.resized = False
 
@@ -287,7 +327,8 @@ class Widget(Object):
 
     def need_redraw(self, rect):
         self.surface = None
-        if self.parent is not None:
+        # A destroyed widget is not drawn anymore
+        if self.parent is not None and not self.__destroyed:
             self.parent.need_redraw(rect.move(self.pos))
 
     def draw(self, painter):
@@ -314,16 +355,25 @@ class Widget(Object):
             mask = painter.mask
             painter.clip(c.rect)
             if painter.mask.intersect(c.rect):
-                c.draw(painter)
+                painter.draw_child(c)
             painter.mask = mask
             painter.umove(c.pos)
 
     def do_organize(self):
+        """Organize the widget and its children if they need it
+
+        We only go into the children if one of them or of their own
+        children is not organized.
+        """
         if not self.organized:
+            if Widget.count_layout:
+                Widget.organize_count += 1
             self.organize()
             self.need_redraw(self.rect)
-        for c in self.children:
-            c.do_organize()
+        if not self.children_organized:
+            self.children_organized = True
+            for c in self.children:
+                c.do_organize()
         self.organized = True
 
     def organize(self):
@@ -335,10 +385,19 @@ class Widget(Object):
             c.size = self.contents_size
 
     def do_resize(self):
-        for c in self.children:
-            c.do_resize()
+        """Resize the widget and its children if they need it
+
+        We only go into the children if one of them or of their own
+        children is not resized.
+        """
+        if not self.children_resized:
+            self.children_resized = True
+            for c in self.children:
+                c.do_resize()
         if self.resized:
             return
+        if Widget.count_layout:
+            Widget.resize_count += 1
         self.resize()
         self.resized = True
 
@@ -31,10 +31,50 @@ class Window(Widget):
     A window can also be an event source for other sub window. We can
     also block the events to all but one child, making it a modal
     dialog.
+
+    An opaque window draws its contents into a surface, its layer,
+    that is kept between the frames. Only the dirty part of the layer
+    is redrawn, the rest of the time the layer is just blitted. The
+    opaque windows and the modal windows inside an opaque window are
+    not drawn into its layer but over it, so that a dialog or an
+    update of the top bar doesn't redraw the windows below.
+
+    The layer has the black background of the screen, so an opaque
+    window hides everything below it. The other windows are drawn
+    directly into their parent, because drawing into a transparent
+    layer is much slower.
     """
 
-    def __init__(self, parent, modal=True, events_source=None, **kargs):
+    def __init__(self, parent, modal=True, events_source=None,
+                 opaque=False, **kargs):
+        """Create a new window
+
+        :Parameters:
+
+            modal : bool
+                If true the window gets all the events of its events
+                source
+
+            events_source : `Window` | None
+                The window that gives us the events, by default the
+                parent window
+
+            opaque : bool
+                If true the window keeps its contents in a layer
+        """
+        self.opaque = opaque
+        self.layer = None           # The surface of the contents
+        self.layer_size = None
+        self.layer_dirty = None     # The part of the layer to redraw
+        self.windows = []           # The windows inside this one
+        self.parent_window = None
+        self.child_need_organize = False
+        self.child_need_resize = False
+        self.events_source = None
         super(Window, self).__init__(parent, **kargs)
+        if self.parent is not None:
+            self.parent_window = self.window
+            self.parent_window.windows.append(self)
         if events_source is None:
             events_source = parent if isinstance(parent, Window) else \
                 parent.window
@@ -43,14 +83,38 @@ class Window(Widget):
         if modal:
             self.events_source.modal_child = self
 
-        self.child_need_organize = False
-        self.child_need_resize = False
+    def drawn_over(self):
+        """Return True if we are drawn over our parent window layer"""
+        parent = self.parent_window
+        return parent is not None and parent.opaque and \
+            (self.opaque or self is parent.modal_child)
+
+    def add(self, w):
+        if not self.opaque or not isinstance(w, Window):
+            super(Window, self).add(w)
+            return
+        # We don't organize and redraw our contents for a new window,
+        # we only need to set its size
+        self.children.append(w)
+        self.emit('add-child', w)
+        w.pos = self.contents_pos
+        w.size = self.contents_size
 
     def remove(self, w):
-        super(Window, self).remove(w)
+        if isinstance(w, Window) and w.drawn_over():
+            self.children.remove(w)
+            self.need_compose(w.rect.move(w.pos))
+        else:
+            super(Window, self).remove(w)
         if w is self.modal_child:
             self.modal_child = None
 
+    def destroy(self):
+        if self.parent_window is not None and \
+                self in self.parent_window.windows:
+            self.parent_window.windows.remove(self)
+        super(Window, self).destroy()
+
     def sorted_children(self):
         # Since the children can overlap in a window We define that
         # the last window added is on the top Maybe we need to have a
@@ -62,27 +126,119 @@ class Window(Widget):
     def resize(self):
         return
 
+    def wakeup(self):
+        """Ask our events source for a tick"""
+        if self.events_source is not None:
+            self.events_source.wakeup()
+
     def need_organize(self, child):
-        self.child_need_organize = True
+        if child is not self:
+            self.children_organized = False
+        if not self.child_need_organize:
+            self.child_need_organize = True
+            self.wakeup()
 
     def need_resize(self, child):
-        self.child_need_resize = True
+        if child is not self:
+            self.children_resized = False
+        if not self.child_need_resize:
+            self.child_need_resize = True
+            self.wakeup()
 
-    def draw(self, painter):
-        if self.modal_child is None:
-            Widget.draw(self, painter)
+    def need_redraw(self, rect):
+        if self.opaque:
+            rect = rect.clip(self.rect)
+            if not rect.size[0] or not rect.size[1]:
+                return
+            if self.layer is not None:
+                self.layer_dirty = rect if self.layer_dirty is None \
+                    else self.layer_dirty.merge(rect)
+            self.need_compose(rect)
+        elif self.drawn_over():
+            self.need_compose(rect)
         else:
+            super(Window, self).need_redraw(rect)
+
+    def need_compose(self, rect):
+        """Redraw a part of the window without redrawing its layer
+
+        If we are drawn over the layer of our parent window, the
+        parent layer doesn't need to be redrawn either.
+        """
+        if self.drawn_over():
+            self.parent_window.need_compose(rect.move(self.abs_pos()))
+        elif self.parent is not None:
+            Widget.need_redraw(self, rect)
+
+    def draw(self, painter):
+        if painter.layer is not None and \
+                painter.layer is self.parent_window and self.drawn_over():
+            # Our parent window draws us over its layer
+            return
+        if self.modal_child is not None:
             painter.move(self.modal_child.pos)
-            self.modal_child.draw(painter)
+            painter.draw_child(self.modal_child)
             painter.umove(self.modal_child.pos)
+        elif not self.opaque:
+            Widget.draw(self, painter)
+        else:
+            self.draw_layer(painter)
+            painter.draw_surface(self.layer)
+            self.draw_windows(painter)
 
-    def tick(self):
+    def draw_layer(self, painter):
+        """Redraw the dirty part of the layer"""
+        if self.layer is None or self.layer_size != self.size:
+            self.layer = painter.surface_from_size(self.size, alpha=False)
+            self.layer_size = self.size
+            self.layer_dirty = self.rect
+        if self.layer_dirty is None:
+            return
+        layer_painter = painter.to_surface(self.layer)
+        layer_painter.layer = self
+        layer_painter.set_mask(self.layer_dirty)
+        self.layer_dirty = None
+        # The background color of the screen
+        layer_painter.fill((0, 0, 0), self.size)
+        Widget.draw(self, layer_painter)
+
+    def draw_windows(self, painter):
+        """Draw the opaque windows inside this one over the layer"""
+        for window in self.windows:
+            if not window.opaque:
+                continue
+            # The visible part of the window is clipped by all its
+            # parents
+            rect = window.rect
+            w = window
+            while w is not self:
+                rect = rect.move(w.pos).clip(w.parent.rect)
+                w = w.parent
+            mask = painter.mask
+            painter.clip(rect)
+            if painter.mask.intersect(rect):
+                pos = window.abs_pos()
+                painter.move(pos)
+                painter.draw_child(window)
+                painter.umove(pos)
+            painter.set_mask(mask)
+
+    def layout(self):
+        """Resize and organize the widgets that need it
+
+        This is also done for all the windows inside this one.
+        """
         while self.child_need_resize:
             self.child_need_resize = False
             self.do_resize()
         while self.child_need_organize:
             self.child_need_organize = False
             self.do_organize()
+        for window in self.windows[:]:
+            window.layout()
+
+    def tick(self):
+        self.layout()
 
         self.events = []
         if not self.modal_child:
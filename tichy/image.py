@@ -17,13 +17,26 @@
 #    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
 
 import tichy
+from tichy.image_cache import cache
 
 
 class Image(tichy.Item):
-    """Base class for images"""
+    """Base class for images
+
+    The surfaces of the images are shared with the other images of the
+    same file and size (see `tichy.image_cache`).
+    """
 
     def __init__(self, path, size=None):
         """create a new image from a file
+
+        :Parameters:
+
+            path : str
+                The path of the image file
+
+            size : `Vect` | tuple | None
+                If set, the image is scaled to this size
         """
         super(Image, self).__init__()
         assert isinstance(path, basestring), type(path)
@@ -38,6 +51,7 @@ class Image(tichy.Item):
         assert isinstance(value, basestring)
         self.__path = value
         self.surf = None
+        cache.release(self)
         self.emit('modified')
 
     path = property(__get_path, __set_path)
@@ -48,7 +62,7 @@ class Image(tichy.Item):
     def load(self, painter):
         if self.surf:
             return
-        self.surf = painter.surface_from_image(self.path)
+        self.surf = cache.load(painter, self)
 
     def view(self, parent):
         import tichy.gui
@@ -0,0 +1,198 @@
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+__docformat__ = 'reStructuredText'
+
+"""Shared cache of the surfaces of the images
+
+All the `tichy.Image` objects with the same file and size share the
+same surface, so a file is only decoded once however many images show
+it. The surfaces are keyed by (path, size, mtime of the file), so
+changing the file on disk gives a new surface.
+
+The cache counts the images using every surface. A surface that is
+not used anymore is moved into a `LRUCache` with a budget in bytes,
+so that we can reuse it if an image needs it again (e.g. the battery
+gadget switching between a few icons), until it is evicted by more
+recently released surfaces. The surfaces of the images we will need
+later can be loaded in advance with `ImageCache.prescale`.
+"""
+
+import os
+import weakref
+
+import pygame
+
+from tichy.lru import LRUCache
+
+import logging
+logger = logging.getLogger('image_cache')
+
+
+class ImageCache(object):
+    """Reference counted cache of image surfaces
+
+    :Parameters:
+
+        budget : int
+            The maximum number of bytes of the surfaces that are not
+            used by any image
+    """
+
+    def __init__(self, budget):
+        self.used = {}      # key -> [surface, number of images, bytes]
+        self.unused = LRUCache(budget)
+        self.images = {}    # id(image) -> (weakref of image, key)
+        self.hits = 0
+        self.misses = 0
+        self.used_bytes = 0
+
+    def __get_budget(self):
+        return self.unused.budget
+
+    def __set_budget(self, value):
+        # The unused surfaces over the budget are evicted the next
+        # time we release a surface
+        self.unused.budget = value
+
+    budget = property(__get_budget, __set_budget)
+
+    def __get_bytes(self):
+        return self.used_bytes + self.unused.size
+
+    bytes = property(__get_bytes,
+                     doc="Number of bytes of all the cached surfaces")
+
+    def stats(self):
+        """Return a dict of the cache statistics"""
+        return {'hits': self.hits, 'misses': self.misses,
+                'bytes': self.bytes, 'used': len(self.used),
+                'unused': len(self.unused)}
+
+    def load(self, painter, image):
+        """Return the surface of an image
+
+        The surface is kept until the image calls `release`, or is
+        deleted.
+
+        :Parameters:
+
+            painter : `Painter`
+                The painter used to load the surface if it is not in
+                the cache
+
+            image : `tichy.Image`
+                The image
+        """
+        self.release(image)
+        path = image.path
+        size = tuple(image.size) if image.size else None
+        key = self.key(path, size)
+        entry = self.used.get(key)
+        if entry is not None:
+            self.hits += 1
+        else:
+            surf = self.unused.get(key)
+            if surf is not None:
+                self.hits += 1
+                self.unused.remove(key)
+            else:
+                self.misses += 1
+                surf = self.create(painter, path, size)
+            entry = [surf, 0, surf.get_pitch() * surf.get_height()]
+            self.used[key] = entry
+            self.used_bytes += entry[2]
+        entry[1] += 1
+        id_ = id(image)
+        ref = weakref.ref(image, lambda ref: self.__release(id_))
+        self.images[id_] = (ref, key)
+        return entry[0]
+
+    def key(self, path, size):
+        """Return the key of the surface of a file at a given size"""
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        return (path, size, mtime)
+
+    def surface_key(self, image):
+        """Return the key of the surface loaded by an image
+
+        :Returns: tuple | None
+        """
+        ref_key = self.images.get(id(image))
+        return ref_key and ref_key[1]
+
+    def prescale(self, painter, path, size=None):
+        """Load and scale the surface of an image we will need later
+
+        The surface is added with the unused ones, so it is kept until
+        an image needs it or it is evicted. This returns False, so it
+        can be used as an idle task, e.g. with
+        `FrameScheduler.idle_add`.
+        """
+        size = tuple(size) if size else None
+        key = self.key(path, size)
+        if key in self.used or key in self.unused:
+            return False
+        try:
+            surf = self.create(painter, path, size)
+        except (pygame.error, IOError), e:
+            logger.warning("can't prescale %s : %s", path, e)
+            return False
+        self.unused.put(key, surf, surf.get_pitch() * surf.get_height())
+        return False
+
+    def create(self, painter, path, size):
+        """Load a new surface and scale it to the size of the image"""
+        # The SVG images are already rendered at the right size
+        surf = painter.surface_from_image(path, size)
+        if size is not None and surf.get_size() != size:
+            try:
+                surf = pygame.transform.smoothscale(surf, size)
+            except ValueError:
+                # smoothscale only works with 24 or 32 bits surfaces
+                surf = pygame.transform.scale(surf, size)
+        return surf
+
+    def release(self, image):
+        """Release the surface used by an image, if any"""
+        self.__release(id(image))
+
+    def __release(self, id_):
+        ref_key = self.images.pop(id_, None)
+        if ref_key is None:
+            return
+        key = ref_key[1]
+        entry = self.used[key]
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        del self.used[key]
+        self.used_bytes -= entry[2]
+        self.unused.put(key, entry[0], entry[2])
+
+    def clear(self):
+        """Remove the surfaces that are not used by any image"""
+        self.unused.clear()
+
+
+# The surfaces of all the images
+cache = ImageCache(4 * 1024 * 1024)
@@ -17,6 +17,8 @@
 #    You should have received a copy of the GNU General Public License
 #    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import with_statement
+
 __docformat__ = 'reStructuredText'
 
 from tichy.item import Item
@@ -26,6 +28,89 @@ from tichy.service import Service
 # XXX: We need to remove the removed, appened and cleared signal
 
 
+class ListChange(object):
+    """Describe all the modifications done to a `List` during a batch
+
+    The ranges are (start, stop) tuples, like python slices.
+
+    :Attributes:
+
+        removed : list of (int, int)
+            The ranges of the removed items, as indexes in the list
+            before the batch
+
+        added : list of (int, int)
+            The ranges of the added items, as indexes in the list
+            after the batch
+
+        moved : bool
+            True if the items that stayed in the list have been
+            reordered (e.g. by a sort)
+    """
+
+    def __init__(self, old, new):
+        """Compute the changes between two sequences of items
+
+        The items are compared by identity.
+        """
+        self.removed = self._ranges(self._missing(old, new))
+        self.added = self._ranges(self._missing(new, old))
+        removed = set(i for start, stop in self.removed
+                      for i in range(start, stop))
+        added = set(i for start, stop in self.added
+                    for i in range(start, stop))
+        kept_old = [id(x) for i, x in enumerate(old) if i not in removed]
+        kept_new = [id(x) for i, x in enumerate(new) if i not in added]
+        self.moved = kept_old != kept_new
+
+    @staticmethod
+    def _missing(values, others):
+        """Return the indexes of the values that are not in others"""
+        counts = {}
+        for value in others:
+            counts[id(value)] = counts.get(id(value), 0) + 1
+        ret = []
+        for i, value in enumerate(values):
+            if counts.get(id(value)):
+                counts[id(value)] -= 1
+            else:
+                ret.append(i)
+        return ret
+
+    @staticmethod
+    def _ranges(indexes):
+        """Group a sorted list of indexes into (start, stop) ranges"""
+        ret = []
+        for i in indexes:
+            if ret and ret[-1][1] == i:
+                ret[-1] = (ret[-1][0], i + 1)
+            else:
+                ret.append((i, i + 1))
+        return ret
+
+    def __nonzero__(self):
+        return bool(self.removed or self.added or self.moved)
+
+    def __repr__(self):
+        return "ListChange(removed=%s, added=%s, moved=%s)" % \
+            (self.removed, self.added, self.moved)
+
+
+class ListBatch(object):
+    """Context manager returned by `List.batch`"""
+
+    def __init__(self, list):
+        self.list = list
+
+    def __enter__(self):
+        self.list.begin_batch()
+        return self.list
+
+    def __exit__(self, type, value, traceback):
+        self.list.end_batch()
+        return False
+
+
 class List(list, Item):
     """Base class for list
 
@@ -33,30 +118,83 @@ class List(list, Item):
     we want to monitor the list modifications. We can also create
     actor on a list.
 
+    Several modifications can be grouped using the `batch` method. In
+    that case the signals are only emitted once at the end of the
+    batch.
+
     Signals
         'modified' : emitted any time the list has been modified
         'cleared' : emitted when the list has been cleared
         'removed' : emitted when an item has been removed
         'appened' : emitted when an item has been appened
+        'inserted' : emitted when an item has been inserted
+        'changed' : emitted at the end of a batch, with a
+                    `ListChange` argument
     """
 
     def __init__(self, values=[]):
         list.__init__(self, values)
         Item.__init__(self)
         assert hasattr(self, '_Object__listeners'), self
+        self.__batch_depth = 0
+        self.__batch_origin = None
+
+    def batch(self):
+        """Return a context manager grouping all the modifications
+
+        e.g. :
+
+            with contacts.batch():
+                for contact in new_contacts:
+                    contacts.append(contact)
+
+        will only emit a single 'changed' signal and a single
+        'modified' signal.
+        """
+        return ListBatch(self)
+
+    def begin_batch(self):
+        """Start grouping the modifications of the list
+
+        Batches can be nested. Prefer the `batch` method.
+        """
+        if self.__batch_depth == 0:
+            self.__batch_origin = list(self)
+        self.__batch_depth += 1
+
+    def end_batch(self):
+        """End a batch started with `begin_batch`
+
+        If it is the outer most batch and the list has been modified,
+        the 'changed' and 'modified' signals are emitted.
+        """
+        assert self.__batch_depth > 0
+        self.__batch_depth -= 1
+        if self.__batch_depth:
+            return
+        change = ListChange(self.__batch_origin, self)
+        self.__batch_origin = None
+        if change:
+            self.emit('changed', change)
+            self.emit('modified')
+
+    def _notify(self, event, *args):
+        """Emit a modification signal, unless we are in a batch"""
+        if not self.__batch_depth:
+            self.emit(event, *args)
 
     def clear(self):
         """Remove all the items from a list"""
-        self[:] = []
-        self.emit('cleared')
-        self.emit('modified')
+        list.__delslice__(self, 0, len(self))
+        self._notify('cleared')
+        self._notify('modified')
 
     def append(self, value):
         """Add a new item in the list"""
         assert isinstance(value, Item), type(value)
         list.append(self, value)
-        self.emit('appened', value)
-        self.emit('modified')
+        self._notify('appened', value)
+        self._notify('modified')
 
     def insert(self, index, value):
         """insert an item into the list at a given position
@@ -68,27 +206,42 @@ class List(list, Item):
                 The inserted value
         """
         list.insert(self, index, value)
-        self.emit('inserted', index, value)
-        self.emit('modified')
+        self._notify('inserted', index, value)
+        self._notify('modified')
 
     def __setitem__(self, key, value):
         list.__setitem__(self, key, value)
-        self.emit('modified')
+        self._notify('modified')
+
+    # In python 2 the slice operations don't go through __setitem__
+    # and __delitem__
+
+    def __setslice__(self, i, j, values):
+        list.__setslice__(self, i, j, values)
+        self._notify('modified')
+
+    def __delitem__(self, key):
+        list.__delitem__(self, key)
+        self._notify('modified')
+
+    def __delslice__(self, i, j):
+        list.__delslice__(self, i, j)
+        self._notify('modified')
 
     def extend(self, values):
         list.extend(self, values)
-        self.emit('modified')
+        self._notify('modified')
 
     def remove(self, value):
         """Remove one item from the list"""
         list.remove(self, value)
-        self.emit('removed', value)
-        self.emit('modified')
+        self._notify('removed', value)
+        self._notify('modified')
 
     def sort(self, *args, **kargs):
         """Sort the list inplace"""
-        list.sort(*args, **kargs)
-        self.emit('modified')
+        list.sort(self, *args, **kargs)
+        self._notify('modified')
 
     def view(self, parent, **kargs):
         """Return a view of the list"""
@@ -117,24 +270,60 @@ class List(list, Item):
             actors.remove(action.actor)
             self.remove(item)
 
+        def create_actor(e):
+            actor = e.create_actor()
+            if can_delete:
+                actor.new_action("Delete").connect('activated', on_delete)
+            return actor
+
+        # We try to apply the modifications of the original list to
+        # the actors list one by one, so that the view doesn't have
+        # to recreate all the actors views. applied[0] is True if the
+        # last modification has already been applied by the handler of
+        # its own signal.
+        applied = [False]
+
+        def on_appened(l, value):
+            actors.append(create_actor(value))
+            applied[0] = True
+
+        def on_inserted(l, index, value):
+            actors.insert(index, create_actor(value))
+            applied[0] = True
+
+        def on_removed(l, value):
+            applied[0] = True
+            for actor in actors:
+                if actor.item is value:
+                    actors.remove(actor)
+                    return
+
         def on_modified(l):
             """Called when the original list is modified"""
-            actors.clear()
-            for e in self:
-                actor = e.create_actor()
-                if can_delete:
-                    actor.new_action("Delete").connect('activated', on_delete)
-                actors.append(actor)
-
-        connection = self.connect('modified', on_modified)
+            if applied[0]:
+                applied[0] = False
+                return
+            if len(actors) == len(self) and \
+                    all(a.item is e for a, e in zip(actors, self)):
+                return
+            with actors.batch():
+                actors.clear()
+                for e in self:
+                    actors.append(create_actor(e))
+
+        connections = [self.connect('appened', on_appened),
+                       self.connect('inserted', on_inserted),
+                       self.connect('removed', on_removed),
+                       self.connect('modified', on_modified)]
         on_modified(self)
         view = actors.view(parent, **kargs)
 
-        def on_destroyed(view, connection):
-            self.disconnect(connection)
+        def on_destroyed(view, connections):
+            for connection in connections:
+                self.disconnect(connection)
 
-        # We don't forget to remove the connection
-        view.connect('destroyed', on_destroyed, connection)
+        # We don't forget to remove the connections
+        view.connect('destroyed', on_destroyed, connections)
 
         return view
 
@@ -0,0 +1,107 @@
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+__docformat__ = 'reStructuredText'
+
+"""Least recently used cache"""
+
+
+class LRUCache(object):
+    """A cache with a budget, that drops the least recently used values
+
+    Every value has a size (e.g. the number of bytes of a surface).
+    When the total size of the values is bigger than the budget, we
+    remove the values that have not been used for the longest time.
+
+    The values are kept in a circular doubly linked list, most
+    recently used first, so that all the operations are O(1).
+    """
+
+    def __init__(self, budget):
+        """Create a new cache
+
+        :Parameters:
+
+            budget : int
+                The maximum total size of the values
+        """
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.__map = {}     # key -> link
+        # The root of the list. A link is [prev, next, key, value, size]
+        self.__root = root = []
+        root[:] = [root, root, None, None, 0]
+
+    def __len__(self):
+        return len(self.__map)
+
+    def __contains__(self, key):
+        return key in self.__map
+
+    def get(self, key, default=None):
+        """Return the value of a key, and mark it as recently used"""
+        link = self.__map.get(key)
+        if link is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        root = self.__root
+        if root[1] is not link:
+            # Move the link at the front
+            link[0][1] = link[1]
+            link[1][0] = link[0]
+            link[0] = root
+            link[1] = root[1]
+            root[1][0] = link
+            root[1] = link
+        return link[3]
+
+    def put(self, key, value, size=1):
+        """Add a value into the cache
+
+        A value bigger than the whole budget is not added.
+        """
+        if key in self.__map:
+            self.remove(key)
+        if size > self.budget:
+            return
+        root = self.__root
+        link = [root, root[1], key, value, size]
+        root[1][0] = link
+        root[1] = link
+        self.__map[key] = link
+        self.size += size
+        while self.size > self.budget:
+            self.remove(root[0][2])
+
+    def remove(self, key):
+        """Remove a key from the cache"""
+        link = self.__map.pop(key)
+        link[0][1] = link[1]
+        link[1][0] = link[0]
+        self.size -= link[4]
+
+    def clear(self):
+        """Remove all the values"""
+        self.__map.clear()
+        root = self.__root
+        root[:] = [root, root, None, None, 0]
+        self.size = 0
@@ -16,6 +16,8 @@
 #
 #    You should have received a copy of the GNU General Public License
 
+from __future__ import with_statement
+
 __docformat__ = 'reStructuredText'
 
 """Message module"""
@@ -130,6 +132,11 @@ class Message(tichy.Item):
                 'status': self.status}
 
 
+# The indexed columns of the messages database table
+MESSAGES_COLUMNS = {'number': 'peer', 'timestamp': 'timestamp',
+                    'status': 'status'}
+
+
 class MessagesService(tichy.Service):
     """The service that stores all the messages
 
@@ -163,12 +170,17 @@ class MessagesService(tichy.Service):
             msg : `Message`
                 The message we add
         """
+        self._add_to_inbox(msg)
+        self._update()
+
+    def _add_to_inbox(self, msg):
+        """Add a `Message` into the inbox without updating the
+        notification"""
         logger.info("Add to inbox : %s", msg)
         assert(isinstance(msg, Message))
         self.inbox.insert(0, msg)
         if msg.status != 'read':
             msg.connect('read', self.on_message_read)
-        self._update()
 
     def add_to_outbox(self, msg):
         """Add a `Message` into the outbox
@@ -206,7 +218,8 @@ class MessagesService(tichy.Service):
         logger.info("load all messages")
         """load all the messages from all sources"""
         # TODO: make this coherent with contacts service method
-        data = tichy.Persistance('messages').load()
+        data = tichy.database.records_storage(
+            'messages', MESSAGES_COLUMNS).load()
         if not data:
             yield None
         # TODO: check for data coherence
@@ -215,16 +228,21 @@ class MessagesService(tichy.Service):
             message = Message(**kargs)
             all_messages.append(message)
         logger.info("got %d messages", len(all_messages))
-        for m in all_messages:
-            # XXX: we need to rethink all this stuff...
-            if m.direction == 'in':
-                self.add_to_inbox(m)
-            elif m.direction == 'out':
-                self.add_to_outbox(m)
+        # We use batches so that the views are only updated once
+        with self.inbox.batch():
+            with self.outbox.batch():
+                for m in all_messages:
+                    # XXX: we need to rethink all this stuff...
+                    if m.direction == 'in':
+                        self._add_to_inbox(m)
+                    elif m.direction == 'out':
+                        self.add_to_outbox(m)
+        self._update()
 
     @tichy.tasklet.tasklet
     def _save_all(self):
         logger.info("save all messages")
         data = [x.to_dict() for x in self.inbox + self.outbox]
-        tichy.Persistance('messages').save(data)
+        tichy.database.records_storage(
+            'messages', MESSAGES_COLUMNS).save(data)
         yield None
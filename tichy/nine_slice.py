@@ -0,0 +1,123 @@
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+__docformat__ = 'reStructuredText'
+
+"""Nine slice rendering of the frames backgrounds
+
+A frame image is a 32x32 image cut into 8x8 tiles :
+
+  - the four corner tiles are the corners of the frame
+  - the tiles (8, 0) and (16, 0) are repeated along the left and
+    right halves of the top border. Same thing for the other borders
+  - the pixels (16, 15) and (16, 16) are the colors of the top and
+    bottom halves of the inside of the frame
+
+The surfaces of the frames are composed once for every size and kept
+in a cache, so that drawing a frame is a single blit. This is used by
+the guip and guic painters.
+
+The cache is keyed by the `tichy.image_cache` key of the frame image
+(its path, size and modification time) rather than by its surface, so
+that it doesn't keep the surfaces of the images alive and a modified
+image gives a new frame.
+"""
+
+import pygame
+
+from tichy.lru import LRUCache
+from tichy.image_cache import cache as image_cache
+
+# The size of the tiles of the frame images
+TILE = 8
+
+# The composed frames, keyed by (frame image key, width, height)
+cache = LRUCache(4 * 1024 * 1024)
+
+
+def frame_surface(image, size):
+    """Return the surface of a frame of a given size
+
+    :Parameters:
+
+        image : `tichy.Image`
+            The frame image, already loaded
+
+        size : `Vect` | tuple
+            The size of the frame
+    """
+    width, height = size
+    key = (image_cache.surface_key(image), width, height)
+    ret = cache.get(key)
+    if ret is None:
+        ret = compose_frame(image.surf, width, height)
+        cache.put(key, ret, ret.get_pitch() * ret.get_height())
+    return ret
+
+
+def compose_frame(surf, width, height):
+    """Compose a new surface of a frame of a given size"""
+    ret = pygame.Surface((max(width, 0), max(height, 0)), pygame.SRCALPHA,
+                         32)
+
+    def copy(dest, src, size=(TILE, TILE)):
+        # We blit into a transparent surface : we want to copy the
+        # pixels with their alpha, not to blend them
+        ret.blit(surf, dest, (src, size), pygame.BLEND_RGBA_MAX)
+
+    def strip(start, end, pos, src, axis):
+        # Repeat a tile along an axis between start and end
+        i = start
+        while i < end:
+            length = min(TILE, end - i)
+            dest = list(pos)
+            dest[axis] = i
+            size = [TILE, TILE]
+            size[axis] = length
+            copy(dest, src, size)
+            i += length
+
+    # The inside
+    inside_width = max(width - 2 * TILE, 0)
+    half = max(height / 2 - TILE, 0)
+    ret.fill(surf.get_at((16, 15)), (TILE, TILE, inside_width, half))
+    ret.fill(surf.get_at((16, 16)),
+             (TILE, TILE + half, inside_width, height - 2 * TILE - half))
+
+    # The borders
+    right = width - TILE
+    bottom = height - TILE
+    strip(TILE, width / 2, (0, 0), (8, 0), 0)
+    strip(width / 2, right, (0, 0), (16, 0), 0)
+    strip(TILE, width / 2, (0, bottom), (8, 24), 0)
+    strip(width / 2, right, (0, bottom), (16, 24), 0)
+    strip(TILE, height / 2, (0, 0), (0, 8), 1)
+    strip(height / 2, bottom, (0, 0), (0, 16), 1)
+    strip(TILE, height / 2, (right, 0), (24, 8), 1)
+    strip(height / 2, bottom, (right, 0), (24, 16), 1)
+
+    # The corners
+    copy((0, 0), (0, 0))
+    copy((right, 0), (24, 0))
+    copy((0, bottom), (0, 24))
+    copy((right, bottom), (24, 24))
+
+    if pygame.display.get_init() and pygame.display.get_surface():
+        ret = ret.convert_alpha()
+    return ret
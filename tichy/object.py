@@ -26,27 +26,79 @@ a way similar to gobject.
 __docformat__ = 'reStructuredText'
 
 import os
+import weakref
+from itertools import count
 
-from types import GeneratorType
+from types import GeneratorType, MethodType
 from tichy.tasklet import Tasklet
 
 
+# Used to generate the connections ids. We don't use the `id` of the
+# connection anymore since it can be reused after a disconnection.
+_next_connection_id = count(1).next
+
+
+def _dead_callback(*args):
+    """The callback of the disconnected slots"""
+
+
+def _remove_slot(listeners, dead, event, slot):
+    """Remove a slot from the listeners of an event
+
+    We only mark the slot as dead, and clean the listeners list once
+    it contains more dead slots than living ones.
+
+    :Parameters:
+
+        listeners : dict
+            event -> [slot, ...]
+
+        dead : dict
+            event -> number of dead slots
+    """
+    slot[0] = _dead_callback
+    slots = listeners[event]
+    if slots[-1] is slot:
+        # The most common case: a `Wait` removing its connection. We
+        # keep the list even if it is empty, since the event is likely
+        # to be connected again.
+        slots.pop()
+        return
+    nb_dead = dead.get(event, 0) + 1
+    if nb_dead * 2 > len(slots):
+        dead.pop(event, None)
+        listeners[event] = [x for x in slots if x[0] is not _dead_callback]
+    else:
+        dead[event] = nb_dead
+
+
 class Object(object):
     """This class implements the observer patern
 
         I could use gobject.GObject instead.  But i think gobject may
         be overkill there... still thinking about it...
+
+    Every connection is stored as a slot (a [callback, obj, args]
+    list) in the listeners list of its event, and also in a registry
+    (id -> (event, slot)), so that we can disconnect in constant
+    time. A disconnected slot is only marked as dead, by replacing
+    its callback, and the listeners lists are cleaned up later.
     """
 
     def __new__(cls, *args, **kargs):
         ret = object.__new__(cls)
-        ret.__listeners = {}
+        ret.__init_listeners()
         return ret
 
     def __init__(self, *kargs): # TODO: see why I hava to use __init__
                                 # even with the __new__
         if not hasattr(self, '_Object__listeners'):
-            self.__listeners = {}
+            self.__init_listeners()
+
+    def __init_listeners(self):
+        self.__listeners = {}       # event -> [slot, ...]
+        self.__connections = {}     # id -> (event, slot)
+        self.__dead = {}            # event -> number of dead slots
 
     @classmethod
     def path(cls, path=None):
@@ -103,13 +155,72 @@ class Object(object):
 
         :Returns: The id of the connection
         """
-        return self.connect_object(event, callback, self, *args)
+        # This is the same as __add_slot, inlined because a `Wait`
+        # connects every time it is used
+        slot = [callback, self, args]
+        oid = _next_connection_id()
+        listeners = self.__listeners.get(event)
+        if listeners is None:
+            self.__listeners[event] = [slot]
+        else:
+            listeners.append(slot)
+        self.__connections[oid] = (event, slot)
+        return oid
 
     def connect_object(self, event, callback, obj, *args):
         """Connect an event using a given object instead of self"""
-        connection = (callback, obj, args)
-        self.__listeners.setdefault(event, []).append(connection)
-        return id(connection)
+        return self.__add_slot(event, [callback, obj, args])
+
+    def connect_weak(self, event, callback, *args):
+        """Connect the object to a given event, without keeping the
+        receiver alive
+
+        The callback has to be a bound method. We only keep a weak
+        reference to the object the method is bound to, and the
+        connection is automatically removed when this object dies.
+
+        :Parameters:
+
+            `event` : str
+                the name of the vent we connect to
+
+            `callback` : bound method
+                the method called when the event is emitted
+
+        :Returns: The id of the connection
+        """
+        assert isinstance(callback, MethodType) and \
+            callback.im_self is not None, callback
+        func = callback.im_func
+        slot = [None, self, args]
+        oid = self.__add_slot(event, slot)
+        listeners = self.__listeners
+        connections = self.__connections
+        dead = self.__dead
+
+        def on_receiver_dead(ref):
+            # We can't call disconnect here, since we don't want to
+            # keep a reference to self
+            if connections.pop(oid, None) is not None:
+                _remove_slot(listeners, dead, event, slot)
+        receiver = weakref.ref(callback.im_self, on_receiver_dead)
+
+        def weak_callback(obj, *args):
+            target = receiver()
+            if target is not None:
+                return func(target, obj, *args)
+        slot[0] = weak_callback
+        return oid
+
+    def __add_slot(self, event, slot):
+        oid = _next_connection_id()
+        listeners = self.__listeners.get(event)
+        if listeners is None:
+            self.__listeners[event] = [slot]
+        else:
+            listeners.append(slot)
+        self.__connections[oid] = (event, slot)
+        return oid
 
     def disconnect(self, oid):
         """remove a connection from the listeners
@@ -119,13 +230,18 @@ class Object(object):
             oid : int
                 The id returned by `Object.connect` method
         """
-        for listener in self.__listeners.itervalues():
-            for connection in listener:
-                if id(connection) == oid:
-                    listener.remove(connection)
-                    return
-
-        raise Exception("trying to disconnect a bad id")
+        try:
+            event, slot = self.__connections.pop(oid)
+        except KeyError:
+            raise Exception("trying to disconnect a bad id")
+        listeners = self.__listeners[event]
+        if listeners[-1] is slot:
+            # The fast path of `_remove_slot`, for a `Wait` removing
+            # its connection
+            slot[0] = _dead_callback
+            listeners.pop()
+        else:
+            _remove_slot(self.__listeners, self.__dead, event, slot)
 
     def emit(self, event, *args):
         """Emit a signal
@@ -135,13 +251,36 @@ class Object(object):
            All extra arguments will be passed to the listeners
            callback method.
 
+           Only the listeners connected when the signal is emitted
+           will be notified, and a listener disconnected by an other
+           callback during the emission won't be called.
+
            :Parameters:
                `event` : str
                    The name of the event to emit.
         """
-        for callback, obj, extra_args in self.__listeners.get(event, []):
-            eargs = args + extra_args
-            call = callback(obj, *eargs)
+        listeners = self.__listeners.get(event)
+        if not listeners:
+            return
+        if len(listeners) == 1:
+            # The most common case. We don't iterate over the
+            # listeners, so we don't need to copy them
+            callback, obj, extra_args = listeners[0]
+            if extra_args:
+                call = callback(obj, *(args + extra_args))
+            else:
+                call = callback(obj, *args)
+            if type(call) is GeneratorType:
+                Tasklet(generator=call).start()
+            return
+        # A callback can connect or disconnect during the emission,
+        # so we iterate over a copy of the listeners. The slots
+        # disconnected in the meantime only call `_dead_callback`.
+        for callback, obj, extra_args in listeners[:]:
+            if extra_args:
+                call = callback(obj, *(args + extra_args))
+            else:
+                call = callback(obj, *args)
             # Now in case the callback is a generator, we turn it into a task
             # This allow us to directly connect to generators
             if type(call) is GeneratorType:
@@ -20,40 +20,519 @@
 
 """Persistance module"""
 
-# TODO: turn the save and load methods into a `Tasklet`. Saving into a
-#       file can take a lot of time.
+from __future__ import with_statement, absolute_import
 
 import os
+import time
+import atexit
+import threading
+import marshal
+import binascii
+from hashlib import md5
 import yaml
 
+try:
+    import json
+except ImportError:
+    try:
+        import simplejson as json
+    except ImportError:
+        json = None
+
 import logging
 LOGGER = logging.getLogger('persistance')
 
 
+class Codec(object):
+    """Base class of the formats used to serialize the data
+
+    The codecs are registered using `register_codec`, and are chosen
+    by name with the `codec` argument of `Persistance`.
+    """
+
+    # The name of the codec
+    name = None
+    # The extension we add to the files path
+    extension = ''
+
+    def dumps(self, data):
+        """Return the data serialized into a string"""
+        raise NotImplementedError
+
+    def loads(self, string):
+        """Return the data serialized into a string"""
+        raise NotImplementedError
+
+    def dump_line(self, data):
+        """Return the data serialized into a single line
+
+        This is used for the journal entries.
+        """
+        raise NotImplementedError
+
+    def load_line(self, line):
+        """Return the data serialized by `dump_line`"""
+        raise NotImplementedError
+
+
+class YamlCodec(Codec):
+    """The yaml format, using libyaml when available"""
+
+    name = 'yaml'
+
+    Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    Dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+    def dumps(self, data):
+        return yaml.dump(data, Dumper=self.Dumper, default_flow_style=False)
+
+    def loads(self, string):
+        return yaml.load(string, Loader=self.Loader)
+
+    def dump_line(self, data):
+        return yaml.dump(data, Dumper=_LineDumper, default_flow_style=True,
+                         width=2 ** 30).rstrip('\n')
+
+    def load_line(self, line):
+        return yaml.load(line, Loader=self.Loader)
+
+
+class _LineDumper(YamlCodec.Dumper):
+    """yaml dumper that never splits a string over several lines"""
+
+    def represent_str(self, data):
+        if isinstance(data, unicode):
+            node = self.represent_unicode(data)
+        else:
+            node = super(_LineDumper, self).represent_str(data)
+        if '\n' in data or '\r' in data:
+            # Double quoted strings escape the new lines
+            node.style = '"'
+        return node
+
+_LineDumper.add_representer(str, _LineDumper.represent_str)
+_LineDumper.add_representer(unicode, _LineDumper.represent_str)
+
+
+class JsonCodec(Codec):
+    """The json format
+
+    Note that json has no byte strings, so all the strings are loaded
+    as unicode.
+    """
+
+    name = 'json'
+    extension = '.json'
+
+    def dumps(self, data):
+        return json.dumps(data)
+
+    def loads(self, string):
+        return json.loads(string)
+
+    dump_line = dumps
+    load_line = loads
+
+
+class MarshalCodec(Codec):
+    """Python marshal binary format
+
+    This is the fastest and most compact format, but the files can
+    only be read by python.
+    """
+
+    name = 'marshal'
+    extension = '.marshal'
+
+    def dumps(self, data):
+        return marshal.dumps(data)
+
+    def loads(self, string):
+        return marshal.loads(string)
+
+    def dump_line(self, data):
+        return binascii.b2a_base64(marshal.dumps(data)).rstrip('\n')
+
+    def load_line(self, line):
+        return marshal.loads(binascii.a2b_base64(line))
+
+
+# All the registered codecs indexed by name
+codecs = {}
+
+
+def register_codec(codec):
+    """Make a `Codec` instance usable by `Persistance`"""
+    codecs[codec.name] = codec
+
+register_codec(YamlCodec())
+register_codec(MarshalCodec())
+if json is not None:
+    register_codec(JsonCodec())
+
+
+class Journal(object):
+    """The state of a journaled file
+
+    A journaled file is made of a snapshot, that is a normal file
+    containing a list of records, and a journal file, where we append
+    one line per modification of the list. Each line is a dictionary
+    serialized with the codec `dump_line` method, with an 'op' key :
+
+      - {op: add, index: i, record: r} : insert r at position i
+      - {op: update, index: i, record: r} : replace the record i by r
+      - {op: delete, index: i, count: n} : delete n records from i
+
+    The first line of the journal contains the md5 digest of the
+    snapshot it applies to. If the snapshot is replaced and we crash
+    before the journal is reset, the journal won't match the new
+    snapshot and is ignored, and the next save compacts the file to
+    start a new journal. An incomplete or unreadable line (if we crash
+    while appending) and the lines after it are ignored as well, and
+    the next save also compacts the file.
+
+    There is only one Journal per file, shared by all the
+    `Persistance` instances using it.
+    """
+
+    # We compact when the journal has more entries than this and more
+    # entries than the number of records
+    compact_min = 128
+
+    def __init__(self, path, codec):
+        self.path = path
+        self.codec = codec
+        self.journal_path = path + '.journal'
+        self.records = None
+        self.nb_entries = 0
+        # False if the journal file doesn't match the snapshot, so that
+        # we can't append to it
+        self.valid = False
+
+    def load(self):
+        """Read the snapshot and replay the journal
+
+        :Returns: the list of records, or None if the file doesn't
+                  exist
+        """
+        try:
+            snapshot = open(self.path, 'rb').read()
+        except IOError, ex:
+            snapshot = None
+        records = snapshot and self.codec.loads(snapshot)
+        self.records = list(records or [])
+        self.nb_entries = 0
+        try:
+            lines = open(self.journal_path, 'rb').readlines()
+        except IOError, ex:
+            lines = []
+        self.valid = bool(lines) and \
+            lines[0].strip() == self._header(snapshot or '')
+        if self.valid:
+            for line in lines[1:]:
+                if not line.endswith('\n'):
+                    LOGGER.warning("incomplete journal entry in %s",
+                                   self.journal_path)
+                    # We can't append after the partial line
+                    self.valid = False
+                    break
+                try:
+                    self._apply(self.codec.load_line(line))
+                except Exception, ex:
+                    LOGGER.warning("bad journal entry in %s : %s",
+                                   self.journal_path, ex)
+                    self.valid = False
+                    break
+                self.nb_entries += 1
+        elif lines:
+            LOGGER.info("ignoring outdated journal %s", self.journal_path)
+        if snapshot is None:
+            return None
+        return self.records
+
+    def save(self, data):
+        """Write the changes between data and the current records"""
+        if self.records is None:
+            self.load()
+        if not isinstance(data, list):
+            raise TypeError("can only journal lists, got %s" % type(data))
+        entries = self._diff(self.records, data)
+        if not entries:
+            return
+        self.records = list(data)
+        self.nb_entries += len(entries)
+        if self.nb_entries > max(self.compact_min, len(self.records)) or \
+                not self.valid:
+            self.compact()
+            return
+        file = open(self.journal_path, 'ab')
+        try:
+            file.write(''.join(self.codec.dump_line(e) + '\n'
+                               for e in entries))
+        finally:
+            file.close()
+
+    def compact(self):
+        """Write all the records into the snapshot and reset the journal
+
+        The snapshot is written into a temporary file that is then
+        renamed, so we always have a complete snapshot on disk.
+        """
+        LOGGER.info("compacting %s", self.path)
+        snapshot = self.codec.dumps(self.records)
+        _atomic_write(self.path, snapshot)
+        _atomic_write(self.journal_path, self._header(snapshot) + '\n')
+        self.nb_entries = 0
+        self.valid = True
+
+    @staticmethod
+    def _header(snapshot):
+        return 'snapshot: %s' % md5(snapshot).hexdigest()
+
+    @staticmethod
+    def _diff(old, new):
+        """Return the list of journal entries that turn old into new
+
+        We only look for the common head and tail of the two lists,
+        which is enough for the usual cases : a record added,
+        modified or deleted.
+        """
+        size = min(len(old), len(new))
+        start = 0
+        while start < size and old[start] == new[start]:
+            start += 1
+        end = 0
+        while end < size - start and old[-1 - end] == new[-1 - end]:
+            end += 1
+        old_end = len(old) - end
+        new_end = len(new) - end
+        ret = []
+        index = start
+        while index < old_end and index < new_end:
+            ret.append({'op': 'update', 'index': index,
+                        'record': new[index]})
+            index += 1
+        if index < old_end:
+            ret.append({'op': 'delete', 'index': index,
+                        'count': old_end - index})
+        while index < new_end:
+            ret.append({'op': 'add', 'index': index, 'record': new[index]})
+            index += 1
+        return ret
+
+    def _apply(self, entry):
+        op = entry['op']
+        index = entry['index']
+        if op == 'add':
+            self.records.insert(index, entry['record'])
+        elif op == 'update':
+            self.records[index] = entry['record']
+        elif op == 'delete':
+            del self.records[index:index + entry['count']]
+        else:
+            raise ValueError("bad journal entry : %s" % entry)
+
+
+def _atomic_write(path, data):
+    """Replace the content of a file, without leaving it half written"""
+    tmp_path = path + '.tmp'
+    file = open(tmp_path, 'wb')
+    try:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    finally:
+        file.close()
+    os.rename(tmp_path, path)
+
+
+class WriteBehind(object):
+    """Delay and coalesce the saves of `Persistance` files
+
+    The data to save are kept in memory, and serialized and written
+    into the files later by a background thread, so that saving never
+    blocks the main loop : the main loop only hands the data over. If
+    the same file is saved several times before it is written, only
+    the last data are written.
+    """
+
+    def __init__(self):
+        self.pending = {}   # path -> (persistance, data, deadline)
+        self.writing = set()    # paths of the files being written
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = True
+
+    def schedule(self, persistance, data, delay):
+        """Write the data of a `Persistance` in at most delay seconds"""
+        with self.condition:
+            pending = self.pending.get(persistance.path)
+            if pending is not None:
+                # We keep the first deadline, so that a file modified
+                # all the time still gets written
+                deadline = pending[2]
+            else:
+                deadline = time.time() + delay
+            self.pending[persistance.path] = (persistance, data, deadline)
+            if self.thread is None and self.running:
+                self.thread = threading.Thread(target=self._run,
+                                               name='persistance')
+                self.thread.setDaemon(True)
+                self.thread.start()
+            self.condition.notify()
+
+    def flush(self, path=None):
+        """Write the pending data now
+
+        We also wait for the writes in progress, so that the files
+        are up to date when this returns.
+
+        :Parameters:
+
+            path : str | None
+                If set, only write the data of this file.
+        """
+        with self.condition:
+            if path is None:
+                items = self.pending.values()
+                self.pending.clear()
+            elif path in self.pending:
+                items = [self.pending.pop(path)]
+            else:
+                items = []
+            while self.writing if path is None else path in self.writing:
+                self.condition.wait()
+            paths = self._take(items)
+        self._write(items, paths)
+
+    def stop(self):
+        """Stop the background thread and write the pending data"""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while True:
+                    if not self.running:
+                        return
+                    now = time.time()
+                    # The files being written by flush have to wait
+                    deadlines = [(x[2], path)
+                                 for path, x in self.pending.iteritems()
+                                 if path not in self.writing]
+                    if deadlines and min(deadlines)[0] <= now:
+                        break
+                    if deadlines:
+                        self.condition.wait(min(deadlines)[0] - now)
+                    else:
+                        self.condition.wait()
+                items = [self.pending.pop(path)
+                         for deadline, path in deadlines if deadline <= now]
+                paths = self._take(items)
+            self._write(items, paths)
+
+    def _take(self, items):
+        """Mark the files of the items as being written"""
+        paths = set(x[0].path for x in items)
+        self.writing.update(paths)
+        return paths
+
+    def _write(self, items, paths):
+        try:
+            for persistance, data, deadline in items:
+                try:
+                    persistance.write(data)
+                except Exception, ex:
+                    LOGGER.exception("can't save %s : %s", persistance.path,
+                                     ex)
+        finally:
+            with self.condition:
+                self.writing.difference_update(paths)
+                self.condition.notifyAll()
+
+
+write_behind = WriteBehind()
+# Make sure we don't lose the pending saves when we quit
+atexit.register(write_behind.stop)
+
+
 class Persistance(object):
     """Use this class to save and load data from file
 
     All the data will be placed into ~/.tichy directory. They are
-    stored using yaml format, but we could modify this cause the
-    plugins are not suppoed to read the file directly.
+    stored using yaml format by default, but the plugins can choose
+    an other registered `Codec` (e.g. 'json' or 'marshal'). If the
+    file doesn't exist in this format but exists in an other one, it
+    is converted when we load it.
+
+    If journal is True, the data must be a list of records, and
+    instead of rewriting the whole file at each save we only append
+    the modified records to a journal (see `Journal`). The file
+    written is compatible with the non journaled mode.
+
+    The saves are not written immediately : they are coalesced for up
+    to `delay` seconds and written in a background thread (see
+    `WriteBehind`). Use `Persistance.flush` to write them now. A delay
+    of 0 writes the data synchronously.
     """
 
     base_path = os.path.expanduser('~/.tichy/')
 
-    def __init__(self, path):
+    # Default time we wait before writing a file
+    delay = 1.0
+
+    # Default codec name
+    codec = 'yaml'
+
+    # The journals indexed by file path
+    __journals = {}
+
+    def __init__(self, path, journal=False, delay=None, codec=None):
         self.path = path
+        self.journal = journal
+        if delay is not None:
+            self.delay = delay
+        if codec is not None:
+            self.codec = codec
 
-    def _open(self, mod='r'):
+    @staticmethod
+    def flush():
+        """Write all the pending saves
+
+        This should be called before quitting.
+        """
+        write_behind.flush()
+
+    def _path(self):
         path = os.path.join(self.base_path, self.path)
+        path += codecs[self.codec].extension
         dir = os.path.dirname(path)
         if not os.path.exists(dir):
             os.makedirs(dir)
+        return path
+
+    def _open(self, mod='r'):
+        path = self._path()
         try:
             return open(path, mod)
         except IOError, ex:
             LOGGER.warning("can't open file : %s", ex)
             raise
 
+    def _journal(self):
+        path = self._path()
+        journal = self.__journals.get(path)
+        if journal is None:
+            journal = Journal(path, codecs[self.codec])
+            self.__journals[path] = journal
+        return journal
+
     def save(self, data):
         """Save a data into the file
 
@@ -63,16 +542,59 @@ class Persistance(object):
                 Any kind of python structure that can be
                 serialized. Usually dictionary or list.
         """
-        file = self._open('w')
-        file.write(yaml.safe_dump(data, default_flow_style=False))
+        if self.delay and write_behind.running:
+            write_behind.schedule(self, data, self.delay)
+        else:
+            write_behind.flush(self.path)
+            self.write(data)
+
+    def write(self, data):
+        """Write a data into the file now"""
+        if self.journal:
+            self._journal().save(data)
+            return
+        # We forget the journal state since we replace the snapshot
+        self.__journals.pop(self._path(), None)
+        file = self._open('wb')
+        file.write(codecs[self.codec].dumps(data))
 
     def load(self):
         """Load data from the file
 
         :Returns: The structure previously saved into the file
         """
+        # We want to get the data from the last save
+        write_behind.flush(self.path)
+        if not os.path.exists(self._path()):
+            return self._convert()
+        if self.journal:
+            records = self._journal().load()
+            return records and list(records)
         try:
-            file = self._open()
+            file = self._open('rb')
         except IOError, ex:
             return None
-        return yaml.safe_load(file)
+        return codecs[self.codec].loads(file.read())
+
+    def _convert(self):
+        """Convert the file saved with an other codec, if any
+
+        :Returns: The structure saved into the file, or None
+        """
+        for codec in codecs:
+            if codec == self.codec:
+                continue
+            old = Persistance(self.path, self.journal, 0, codec)
+            path = old._path()
+            if not os.path.exists(path):
+                continue
+            LOGGER.info("converting %s from %s to %s",
+                        self.path, codec, self.codec)
+            data = old.load()
+            self.write(data)
+            old.__journals.pop(path, None)
+            for old_path in [path, path + '.journal']:
+                if os.path.exists(old_path):
+                    os.remove(old_path)
+            return data
+        return None
@@ -30,6 +30,10 @@ import tichy
 from tichy.tasklet import WaitDBus
 from tichy.phone.call import Call
 
+# The indexed columns of the calls logs database table
+LOGS_COLUMNS = {'number': 'number', 'timestamp': 'timestamp',
+                'status': 'status'}
+
 
 class GSMService(tichy.Service):
 
@@ -65,12 +69,14 @@ class GSMService(tichy.Service):
         """Save the logs into a file"""
         LOGGER.info("Saving call logs")
         data = [c.to_dict() for c in self.logs]
-        tichy.Persistance('calls/logs').save(data)
+        tichy.database.records_storage(
+            'calls/logs', LOGS_COLUMNS).save(data)
 
     def _load_logs(self):
         """Load all the logs"""
         LOGGER.info("Loading call logs")
-        data = tichy.Persistance('calls/logs').load()
+        data = tichy.database.records_storage(
+            'calls/logs', LOGS_COLUMNS).load()
         if not data:
             return
         # TODO: add some checks for data consistency
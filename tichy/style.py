@@ -38,6 +38,10 @@ class Frame(object):
 
 class Font(object):
 
+    # The resized fonts, keyed by (file, size), so that the widgets
+    # with a font size share the same loaded font
+    resized = {}
+
     def __init__(self, file, size=24):
         self.file = file
         self.size = size
@@ -53,13 +57,24 @@ class Font(object):
         return self.font.render(text, color, length)
 
     def resize(self, size):
-        """Create a new font identical to this one but with a different size
+        """Return a font identical to this one but with a different size
         """
-        return Font(self.file, size)
+        if size == self.size:
+            return self
+        key = (self.file, size)
+        ret = Font.resized.get(key)
+        if ret is None:
+            ret = Font.resized[key] = Font(self.file, size)
+        return ret
 
 
 class Filter(object):
-    """Filter condiction for sub-styles"""
+    """Filter condiction for sub-styles
+
+    The filters must only depend on the type of the widget, the type
+    of its item and its tags, because the styles cache the result of
+    `Style.apply` for these three values.
+    """
 
     def __call__(self, w):
         raise NotImplementedError
@@ -125,12 +140,51 @@ class Style(dict, Item):
     - then it gets its own attributes
 
     - finally it gets the attributes from its parent style
+
+    The dicts returned by `apply` are cached by widget type, item type
+    and tags, so the widgets that only differ by other things share the
+    same dict, that must not be modified. Every change of any style
+    clears all the caches.
     """
 
+    # Incremented every time a style is modified, so that the styles
+    # know when their cache is out of date
+    version = 0
+
     def __init__(self, parent=None):
         super(Style, self).__init__()
         self.parent = parent
         self.parts = []
+        self.cache = {}
+        self.cache_version = Style.version
+
+    def __setitem__(self, key, value):
+        super(Style, self).__setitem__(key, value)
+        Style.version += 1
+
+    def __delitem__(self, key):
+        super(Style, self).__delitem__(key)
+        Style.version += 1
+
+    def update(self, *args, **kargs):
+        super(Style, self).update(*args, **kargs)
+        Style.version += 1
+
+    def setdefault(self, key, value=None):
+        Style.version += 1
+        return super(Style, self).setdefault(key, value)
+
+    def pop(self, *args):
+        Style.version += 1
+        return super(Style, self).pop(*args)
+
+    def popitem(self):
+        Style.version += 1
+        return super(Style, self).popitem()
+
+    def clear(self):
+        super(Style, self).clear()
+        Style.version += 1
 
     @classmethod
     def code(cls):
@@ -144,8 +198,26 @@ class Style(dict, Item):
 
     def add_part(self, filter, style):
         self.parts.append((filter, style))
+        Style.version += 1
 
     def apply(self, widget, up=True):
+        """Return the style dict of a widget
+
+        The returned dict is shared by all the widgets of the same
+        type, with the same item type and tags. It must not be
+        modified.
+        """
+        if self.cache_version != Style.version:
+            self.cache.clear()
+            self.cache_version = Style.version
+        key = (type(widget), type(widget.item), frozenset(widget.tags), up)
+        ret = self.cache.get(key)
+        if ret is None:
+            ret = self.__apply(widget, up)
+            self.cache[key] = ret
+        return ret
+
+    def __apply(self, widget, up):
         # XXX: also apply to Style attribute (children-style, etc..)
         ret = {}
         if up and self.parent is not None:
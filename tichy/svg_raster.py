@@ -0,0 +1,229 @@
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+__docformat__ = 'reStructuredText'
+
+"""Rasterisation of the SVG images
+
+The SVG files are rendered by rsvg and cairo at the size we need,
+directly into the pixels of a pygame surface : the surface has the
+same pixels format as a cairo ARGB32 surface, so there is no copy and
+no channels swapping to do, SDL converts the pixels when we convert
+the surface to the display format.
+
+Cairo gives pixels with premultiplied alpha, that we convert to the
+straight alpha pygame uses if numpy is available.
+
+The rendered pixels are saved into `cache_dir`, keyed by the hash of
+the SVG file and the size, so that the next time we need the same
+image we don't need rsvg at all. This is used by the guip and guic
+painters. The icons can be rendered in advance with `prerender`, and
+`cleanup` keeps the size of the cache under `cache_budget`.
+"""
+
+import os
+from hashlib import sha1
+
+import pygame
+import pygame.image
+
+try:
+    import numpy
+    import pygame.surfarray
+except ImportError:
+    numpy = None
+
+import logging
+logger = logging.getLogger('svg_raster')
+
+# Where we save the rendered images
+cache_dir = os.path.expanduser('~/.tichy/cache/svg/')
+
+# The maximum number of bytes of the saved images
+cache_budget = 8 * 1024 * 1024
+
+# The sizes of the icons of the applications, that we render in
+# advance at start up
+icon_sizes = [(96, 96)]
+
+# The masks of a surface with the pixels format of cairo ARGB32
+# (native endian 32 bits integers)
+CAIRO_MASKS = (0x00ff0000, 0x0000ff00, 0x000000ff, 0xff000000)
+
+
+def surface_from_svg(path, size=None):
+    """Return a surface of an SVG file
+
+    The returned surface is not converted to the display format.
+
+    :Parameters:
+
+        path : str
+            The path of the SVG file
+
+        size : tuple | None
+            The size of the surface. If None, we use the size defined
+            in the SVG file
+    """
+    data = open(path, 'rb').read()
+    cache_path = None
+    if size is not None:
+        cache_path = get_cache_path(data, size)
+        surf = load_cached(cache_path, size)
+        if surf is not None:
+            return surf
+    surf = render(data, size)
+    unpremultiply(surf)
+    if cache_path is None:
+        cache_path = get_cache_path(data, surf.get_size())
+    save_cached(cache_path, surf)
+    return surf
+
+
+def prerender(path, size):
+    """Render an SVG file into the cache if it is not already there
+
+    It returns False, so it can be used as an idle task, e.g. with
+    `FrameScheduler.idle_add`, to render at start up the images we
+    will need later.
+    """
+    try:
+        data = open(path, 'rb').read()
+        cache_path = get_cache_path(data, size)
+        if not os.path.exists(cache_path):
+            surf = render(data, size)
+            unpremultiply(surf)
+            save_cached(cache_path, surf)
+    except Exception, e:
+        logger.warning("can't prerender %s : %s", path, e)
+    return False
+
+
+def cleanup(budget=None):
+    """Remove the least recently used saved images over the budget
+
+    The saved images are touched every time we load them, so the
+    oldest ones are the least recently used. It returns False, so it
+    can be used as an idle task.
+
+    :Parameters:
+
+        budget : int | None
+            The maximum number of bytes we keep, default to
+            `cache_budget`
+    """
+    if budget is None:
+        budget = cache_budget
+    try:
+        names = os.listdir(cache_dir)
+    except OSError:
+        return False
+    files = []
+    for name in names:
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(f[1] for f in files)
+    files.sort()
+    for mtime, size, path in files:
+        if total <= budget:
+            break
+        try:
+            os.remove(path)
+        except OSError, e:
+            logger.warning("can't remove cached image %s : %s", path, e)
+            continue
+        total -= size
+    return False
+
+
+def render(data, size=None):
+    """Render an SVG document into a new surface, using rsvg"""
+    import rsvg
+    import cairo
+    svg = rsvg.Handle(data=data)
+    svg_width, svg_height = svg.props.width, svg.props.height
+    width, height = size or (svg_width, svg_height)
+    surf = pygame.Surface((width, height), pygame.SRCALPHA, 32, CAIRO_MASKS)
+    # Cairo draws into the pixels of the surface. The surface is
+    # locked until we release its buffer.
+    pixels = surf.get_buffer()
+    cairo_surface = cairo.ImageSurface.create_for_data(
+        pixels, cairo.FORMAT_ARGB32, width, height, surf.get_pitch())
+    cairo_context = cairo.Context(cairo_surface)
+    cairo_context.scale(float(width) / svg_width, float(height) / svg_height)
+    svg.render_cairo(cairo_context)
+    cairo_surface.finish()
+    del cairo_context, cairo_surface, pixels
+    return surf
+
+
+def unpremultiply(surf):
+    """Convert the pixels of a surface from premultiplied alpha"""
+    if numpy is None:
+        # The semi transparent pixels will be a little bit too dark
+        return
+    alpha = pygame.surfarray.pixels_alpha(surf)
+    rgb = pygame.surfarray.pixels3d(surf)
+    a = alpha[..., numpy.newaxis].astype(numpy.uint16)
+    straight = (rgb.astype(numpy.uint16) * 255 + a / 2) / numpy.maximum(a, 1)
+    rgb[...] = numpy.minimum(straight, 255)
+    del alpha, rgb
+
+
+def get_cache_path(data, size):
+    """Return the path of the cached image of an SVG document"""
+    return os.path.join(cache_dir, '%s-%dx%d.rgba' % (
+        sha1(data).hexdigest(), size[0], size[1]))
+
+
+def load_cached(cache_path, size):
+    """Return the cached surface, or None if it is not in the cache"""
+    try:
+        data = open(cache_path, 'rb').read()
+    except IOError:
+        return None
+    if len(data) != size[0] * size[1] * 4:
+        logger.warning("bad cached image %s", cache_path)
+        return None
+    try:
+        # So that `cleanup` knows we still use it
+        os.utime(cache_path, None)
+    except OSError:
+        pass
+    return pygame.image.fromstring(data, tuple(size), 'RGBA')
+
+
+def save_cached(cache_path, surf):
+    """Save a rendered surface into the cache"""
+    try:
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        # We write into a temporary file, so that an other process
+        # never sees a partial file
+        tmp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+        f = open(tmp_path, 'wb')
+        f.write(pygame.image.tostring(surf, 'RGBA'))
+        f.close()
+        os.rename(tmp_path, cache_path)
+    except (IOError, OSError), e:
+        logger.warning("can't save cached image %s : %s", cache_path, e)
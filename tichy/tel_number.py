@@ -23,7 +23,16 @@ import tichy
 
 
 class TelNumber(tichy.Text):
-    """Telephone number class"""
+    """Telephone number class
+
+    Two numbers are considered the same if their significant digits
+    are equal, or if they both have at least `match_length` digits
+    and one is a suffix of the other. So '+33 6 12 34 56 78' and '06
+    12 34 56 78' are the same number.
+    """
+
+    # The minimum number of digits for a suffix match
+    match_length = 7
 
     def __init__(self, text='', **kargs):
         """Create a new TelNumber instance
@@ -41,16 +50,48 @@ class TelNumber(tichy.Text):
         # get_text method return a basestring object and then connect
         # the actor view to the modified signal
         self.view_text = tichy.Text(text)
+        # The (value, contacts generation) the view text was computed
+        # for
+        self.__view_key = None
         self.connect('modified', TelNumber.update_view_text)
 
+    @classmethod
+    def normalize(cls, number):
+        """Return the significant digits of a number
+
+        We ignore all the non digit characters, and the leading zeros
+        of the international ('00') and trunk ('0') prefixes. Only the
+        ASCII digits count: unicode.isdigit also accepts superscripts
+        and the digits of other scripts.
+        """
+        digits = ''.join(c for c in unicode(number) if c in '0123456789')
+        return digits.lstrip('0')
+
+    @classmethod
+    def key(cls, number):
+        """Return a key such that numbers that match have the same key"""
+        return cls.normalize(number)[-cls.match_length:]
+
+    @classmethod
+    def match(cls, number, other):
+        """Return True if two numbers are the same number"""
+        number = cls.normalize(number)
+        other = cls.normalize(other)
+        if not number or not other:
+            return False
+        if number == other:
+            return True
+        if min(len(number), len(other)) < cls.match_length:
+            return False
+        return number.endswith(other) or other.endswith(number)
+
     def get_contact(self):
         """Return the `Contact` that has this number
 
         :Returns: `Contact` | None
         """
         contacts_service = tichy.Service('Contacts')
-        contacts = contacts_service.find_by_number(self.value)
-        return contacts[0] if contacts else None
+        return contacts_service.get_by_number(self.value)
 
     def input_method(self):
         return 'number'
@@ -61,12 +102,21 @@ class TelNumber(tichy.Text):
 
     def update_view_text(self):
         # We check if the number is from a contact.  If so we set the
-        # view text
-        contact = self.get_contact()
+        # view text. We don't need to do it again until the number or
+        # the contacts are modified.
+        contacts_service = tichy.Service('Contacts')
+        key = (self.value, contacts_service.generation)
+        if key == self.__view_key:
+            return
+        self.__view_key = key
+        contact = contacts_service.get_by_number(self.value)
         if contact:
-            self.view_text.value = contact.get_text()
+            text = unicode(contact.get_text())
         else:
-            self.view_text.value = self.value
+            text = self.value
+        # Only emit 'modified' if the text actually changed
+        if text != self.view_text.value:
+            self.view_text.value = text
 
     def edit(self, window, name='number', **kargs):
         text_edit = tichy.Service('TextEdit')
@@ -0,0 +1,247 @@
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+__docformat__ = 'reStructuredText'
+
+"""The logic of the virtual lists, shared by the gui backends
+
+The backends only define the classes of their own widgets, mixing
+these classes with their Widget and Scrollable classes.
+"""
+
+
+class VirtualListContentsMixin(object):
+    """The sliding child of a `VirtualListMixin`
+
+    Its size is the size of the whole list, but it only contains the
+    views of the items that are in the visible window.
+
+    The backends mix it with their Widget class, and set `Vect` to
+    their Vect class.
+    """
+
+    Vect = None
+
+    def __init__(self, parent, vlist, **kargs):
+        self.vlist = vlist
+        self.length_width = None
+        super(VirtualListContentsMixin, self).__init__(parent, **kargs)
+
+    def resize(self):
+        axis = self.vlist.axis
+        width = max([c.optimal_size[axis - 1] for c in self.children] or
+                    [0])
+        length = self.vlist.row_length * len(self.vlist.list)
+        self.min_size = self.Vect(0, 0)
+        # Setting the optimal size reorganizes the list, so we only
+        # do it if it changed
+        if (length, width) != self.length_width:
+            self.length_width = (length, width)
+            self.optimal_size = self.Vect(0, 0).set(axis, length).set(
+                axis - 1, width)
+
+    def organize(self):
+        axis = self.vlist.axis
+        row_length = self.vlist.row_length
+        size = self.size.set(axis, row_length)
+        for index, view in self.vlist.views.iteritems():
+            view.size = size
+            view.pos = self.Vect(0, 0).set(axis, index * row_length)
+
+    def remove(self, view):
+        # The views we release are out of the visible window, so we
+        # don't need to redraw anything
+        self.children.remove(view)
+        self.resized = False
+
+    def do_organize(self):
+        # Moving or resizing a view already redraws it, we don't need
+        # to redraw all the contents when we create the views that
+        # become visible
+        if not self.organized:
+            self.organize()
+        if not self.children_organized:
+            self.children_organized = True
+            for c in self.children:
+                c.do_organize()
+        self.organized = True
+
+
+class VirtualListMixin(object):
+    """Scrollable view of a list that only creates the visible views
+
+    All the rows of the list have the same length along the scrolling
+    axis : the length given at the creation, or the optimal length of
+    the first row. The rows are given this length whatever their own
+    optimal size, so a longer row is cut and a shorter one is
+    stretched. Only the views of the items in the visible part of
+    the list (plus `overscan` rows on each side) are created. When we
+    scroll, the views that leave the window are released and the views
+    of the new visible items are created. So the memory used doesn't
+    depend on the size of the list.
+
+    If an `update_view` function is given, the released views are
+    kept and reused for other items instead of being destroyed.
+
+    The backends mix it with their Scrollable class, and set
+    `contents_class` to their `VirtualListContentsMixin` class.
+    """
+
+    contents_class = None
+
+    def __init__(self, parent, list, axis=1, row_length=None, overscan=2,
+                 create_view=None, update_view=None, **kargs):
+        """Create a new VirtualList
+
+        :Parameters:
+
+            list : `tichy.List`
+                The list we show
+
+            row_length : int | None
+                The length of all the rows along the scrolling axis.
+                If None, we use the optimal size of the first row.
+
+            overscan : int
+                The number of rows we create before and after the
+                visible rows
+
+            create_view : function | None
+                function(parent, item) that creates the view of an
+                item. By default we call the item `view` method
+
+            update_view : function | None
+                function(view, item) that modifies an already created
+                view so that it shows an other item
+        """
+        super(VirtualListMixin, self).__init__(parent, axis=axis, item=list,
+                                          **kargs)
+        self.list = list
+        self.__row_length = row_length
+        self.overscan = overscan
+        self.create_view = create_view or self.default_create_view
+        self.update_view = update_view
+        self.views = {}     # index -> view of the item
+        self.items = {}     # index -> item shown by the view
+        self.pool = []      # released views we can reuse
+        self.contents = self.contents_class(self, self)
+        self.connect('scrolled', self.on_scrolled)
+        self.monitor(list, 'modified', self.on_list_modified)
+
+    @staticmethod
+    def default_create_view(parent, item):
+        return item.view(parent)
+
+    def __get_row_length(self):
+        if self.__row_length is None:
+            if not self.list:
+                return 1
+            # We use the size of the first row
+            view = self.materialise(0)
+            view.do_resize()
+            self.__row_length = max(1, view.optimal_size[self.axis])
+            self.release(0)
+        return self.__row_length
+
+    row_length = property(__get_row_length)
+
+    def materialise(self, index):
+        """Return a view of the item at a given index"""
+        item = self.list[index]
+        if self.pool:
+            view = self.pool.pop()
+            self.update_view(view, item)
+            self.contents.add(view)
+        else:
+            view = self.create_view(self.contents, item)
+        self.views[index] = view
+        self.items[index] = item
+        return view
+
+    def release(self, index):
+        """Release the view of the item at a given index"""
+        del self.items[index]
+        self.discard(self.views.pop(index))
+
+    def discard(self, view):
+        """Keep a view we don't use anymore in the pool, or destroy it"""
+        if self.update_view is not None:
+            self.contents.remove(view)
+            self.pool.append(view)
+        else:
+            view.destroy()
+
+    def visible_range(self):
+        """Return the (first, last) indexes of the rows we need to show"""
+        axis = self.axis
+        row_length = self.row_length
+        offset = -self.contents.pos[axis]
+        first = max(0, offset / row_length - self.overscan)
+        last = min(len(self.list),
+                   (offset + self.size[axis]) / row_length + 1 +
+                   self.overscan)
+        return first, last
+
+    def update_window(self):
+        """Create and release the views according to the visible range"""
+        first, last = self.visible_range()
+        changed = False
+        for index in self.views.keys():
+            if not first <= index < last:
+                self.release(index)
+                changed = True
+        for index in xrange(first, last):
+            if index not in self.views:
+                self.materialise(index)
+                changed = True
+        if changed:
+            self.contents.organized = False
+
+    def on_scrolled(self, vlist):
+        self.update_window()
+
+    def on_list_modified(self, list):
+        # The indexes of the items may have changed. We move the
+        # views of the items that are still visible to their new
+        # index, and only release the views of the other rows.
+        views = {}      # id(item) -> [(view, item), ...]
+        for index, view in self.views.iteritems():
+            item = self.items[index]
+            views.setdefault(id(item), []).append((view, item))
+        self.views = {}
+        self.items = {}
+        first, last = self.visible_range()
+        for index in xrange(first, last):
+            kept = views.get(id(list[index]))
+            if kept:
+                self.views[index], self.items[index] = kept.pop()
+        for pairs in views.itervalues():
+            for view, item in pairs:
+                self.discard(view)
+        self.contents.organized = False
+        self.contents.resized = False
+        self.contents.need_redraw(self.contents.rect)
+        self.update_window()
+
+    def destroy(self):
+        # The pooled views are not children of the contents anymore
+        for view in self.pool:
+            self.contents.add(view)
+        self.pool = []
+        super(VirtualListMixin, self).destroy()
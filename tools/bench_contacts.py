@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+#
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark of the contacts lookup by number
+
+We look up the numbers of a call log in the contacts list, like when
+we draw the call log, using the number index of the contacts service
+and the linear scan we used before.
+
+usage : python bench_contacts.py [nb_contacts] [nb_calls]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import tichy
+from tichy.contact import PhoneContact
+
+
+def scan(contacts, number):
+    """The old ContactsService.find_by_number"""
+    return [x for x in contacts if x.tel == number]
+
+
+def main(nb_contacts=1000, nb_calls=500):
+    # We don't want to save the contacts
+    tichy.Persistance.base_path = tempfile.mkdtemp()
+    service = tichy.Service('Contacts')
+    contacts = [PhoneContact(name='contact %d' % i, tel='06%08d' % i)
+                for i in range(nb_contacts)]
+    service.contacts.extend(contacts)
+    numbers = ['06%08d' % random.randrange(nb_contacts * 2)
+               for i in range(nb_calls)]
+
+    t0 = time.time()
+    expected = [scan(service.contacts, n) for n in numbers]
+    scan_time = time.time() - t0
+    t0 = time.time()
+    found = [service.find_by_number(n) for n in numbers]
+    index_time = time.time() - t0
+    assert found == expected
+
+    print "%d lookups in %d contacts" % (nb_calls, nb_contacts)
+    print "scan  : %8.2f ms" % (scan_time * 1000)
+    print "index : %8.2f ms" % (index_time * 1000)
+    tichy.Persistance.flush()
+    shutil.rmtree(tichy.Persistance.base_path)
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+#
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark of the guip Font word wrapping
+
+We compare `Font.split` with the old implementation, that measured
+every prefix of the lines, on a SMS sized text and on a 2 KB text.
+
+usage : python bench_font.py [line_length]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pygame
+from tichy.guip.font import Font
+
+
+def old_split(font, text, length=None):
+    """The old Font.split"""
+    ret = []
+    i = 0
+    while text:
+        i += 1
+        if i > len(text):
+            ret.append(text)
+            break
+        line = text[:i]
+        if line[-1] == '\n':
+            ret.append(line[:-1])
+            text = text[i:]
+            i = 0
+            continue
+        if length and font.font.size(line)[0] >= length:
+            ret.append(line[:-1])
+            text = text[i-1:]
+            i = 0
+            continue
+    return ret
+
+
+def bench(func, number=10):
+    t0 = time.time()
+    for i in range(number):
+        func()
+    return (time.time() - t0) / number
+
+
+def main(length=440):
+    pygame.font.init()
+    words = u"the quick brown fox jumps over the lazy dog".split()
+    sms = u' '.join(words * 4)[:160]
+    long_text = u' '.join(words * 60)[:2048]
+    cjk = u'\u4eca\u5929\u5929\u6c14\u5f88\u597d' * 30
+
+    font = Font(None, 26)
+
+    def new_split(text):
+        # We don't want the advances to be cached
+        font.advances.clear()
+        return font.split(text, length)
+
+    print "%-12s %8s %12s %12s" % ('text', 'lines', 'old (ms)', 'new (ms)')
+    for name, text in [('160 chars', sms), ('2 KB', long_text),
+                       ('CJK', cjk)]:
+        old_time = bench(lambda: old_split(font, text, length))
+        new_time = bench(lambda: new_split(text))
+        print "%-12s %8d %12.2f %12.2f" % (name, len(new_split(text)),
+                                           old_time * 1000, new_time * 1000)
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
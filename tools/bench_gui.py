@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+#
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark of the gui on scripted scenarios, without any display
+
+We boot the same screen as test/tichy, with a headless painter and a
+`HeadlessLoop`, so we need neither X nor gobject. Then we play some
+scenarios, posting mouse and key events into the loop, and for every
+scenario we print :
+
+  - the number of frames drawn
+  - the mean and max time of a frame (layout + paint + flip) in ms
+  - the number of widgets resized and organized
+  - the number of painted pixels
+  - the number of python objects allocated and still alive after
+
+With --profile we also print the drawing cost of the widgets classes
+and items types of every scenario (see `tichy.draw_profiler`), and
+with --stacks we append their folded stacks to a file, that can be
+given to the flame graph tools.
+
+usage : python bench_gui.py [--backend=sdl|csdl] [--profile]
+                            [--stacks=FILE] [scenario ...]
+"""
+
+import gc
+import os
+import shutil
+import sys
+import tempfile
+from optparse import OptionParser
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+plugins_dir = os.path.join(root_dir, 'test/plugins')
+
+parser = OptionParser(usage="%prog [options] [scenario ...]")
+parser.add_option("", "--backend", dest="backend",
+                  help="select a specific gui backend",
+                  choices=["sdl", "csdl"], default=None)
+parser.add_option("", "--profile", dest="profile", action="store_true",
+                  help="report the drawing cost of the widgets",
+                  default=False)
+parser.add_option("", "--stacks", dest="stacks", metavar="FILE",
+                  help="append the folded stacks of the widgets to FILE",
+                  default=None)
+if __name__ == '__main__':
+    (options, args) = parser.parse_args()
+    if options.backend:
+        tichy_gui_backends = [options.backend]
+else:
+    # We are used by an other benchmark, e.g. bench_layout.py
+    (options, args) = parser.parse_args([])
+
+sys.path.insert(0, root_dir)
+
+import tichy
+import tichy.gui as gui
+from tichy.gui import Vect
+from tichy.contact import PhoneContact
+from tichy.draw_profiler import DrawProfiler
+from tichy import svg_raster
+
+import logging
+logging.basicConfig(level=logging.ERROR)
+
+# We report the number of widgets resized and organized (only the
+# python widgets can count them)
+if hasattr(gui.Widget, 'count_layout'):
+    gui.Widget.count_layout = True
+
+
+class Recorder(object):
+    """Record the timings of the frames of a screen"""
+
+    def __init__(self, screen):
+        self.frames = []
+        screen.scheduler.connect('frame', self.on_frame)
+
+    def on_frame(self, scheduler, timings):
+        self.frames.append(timings)
+
+    def report(self, name, objects):
+        frames = self.frames
+        times = [t['layout'] + t['paint'] + t['flip'] for t in frames] or [0]
+
+        def total(key):
+            return sum(t.get(key, 0) for t in frames)
+        print "%-16s %6d %8.2f %8.2f %8d %9d %10d %8d" % (
+            name, len(frames), sum(times) / len(times), max(times),
+            total('resizes'), total('organizes'), total('pixels'),
+            objects)
+        self.frames = []
+
+
+class Harness(object):
+    """Boot a screen and drive it with synthetic inputs"""
+
+    def __init__(self):
+        # We don't want to use or modify the user data
+        tichy.Persistance.base_path = tempfile.mkdtemp()
+        svg_raster.cache_dir = os.path.join(tichy.Persistance.base_path,
+                                            'svg')
+        self.loop = gui.HeadlessLoop()
+        # The plugins and the widgets use the global loop
+        tichy.mainloop = self.loop
+        tichy.plugins.import_all(plugins_dir)
+        style = tichy.Style.find_by_name("cool style").create()
+        tichy.Service.set_default('Design', 'Default')
+        painter = gui.Painter((480, 640), headless=True)
+        self.screen = gui.Screen(self.loop, painter, style=style)
+        scheduler = self.screen.scheduler
+        for app in tichy.Application.subclasses:
+            if not app.icon:
+                continue
+            icon_path = app.path(app.icon)
+            if icon_path.endswith('.svg'):
+                for size in svg_raster.icon_sizes:
+                    scheduler.idle_add(svg_raster.prerender, icon_path, size)
+            scheduler.idle_add(tichy.image_cache.cache.prescale, painter,
+                               icon_path, (96, 96))
+        scheduler.idle_add(svg_raster.cleanup)
+        self.recorder = Recorder(self.screen)
+
+    def boot(self):
+        """Start the launcher, like test/tichy does"""
+        vbox = gui.Box(self.screen, axis=1, border=0, spacing=0)
+        top_window = gui.Window(vbox, optimal_size=Vect(480, 64),
+                                modal=False, opaque=True)
+        self.content_window = gui.Window(vbox, min_size=Vect(480, 0),
+                                         modal=False, expand=True,
+                                         opaque=True)
+        hbox = gui.Box(top_window, axis=0)
+        for name in ['Battery', 'Clock']:
+            tichy.Gadget.find_by_name(name)(hbox).start()
+        tichy.Application.find_by_name('Launcher')(
+            self.content_window).start()
+        self.loop.settle()
+
+    def find(self, cls, text=None, widget=None):
+        """Return the first widget of a class, showing a given text"""
+        widget = widget or self.screen
+        if isinstance(widget, cls) and (
+            text is None or text in self.texts(widget)):
+            return widget
+        for child in widget.children:
+            ret = self.find(cls, text, child)
+            if ret is not None:
+                return ret
+        return None
+
+    def texts(self, widget):
+        """Return the texts shown by a widget and its children"""
+        ret = [getattr(widget, 'text', None)]
+        for child in widget.children:
+            ret.extend(self.texts(child))
+        return ret
+
+    def target(self, widget):
+        """Return a point near the top of a widget, to click on it
+
+        The center of a widget may be out of the screen.
+        """
+        return widget.screen_pos() + Vect(widget.size.x / 2, 16)
+
+    def click(self, pos):
+        self.loop.post_mouse_event('down', pos)
+        self.loop.step()
+        self.loop.post_mouse_event('up', pos)
+        self.loop.settle()
+
+    def drag(self, start, end, steps=10):
+        self.loop.post_mouse_event('down', start)
+        self.loop.step()
+        for i in range(1, steps + 1):
+            pos = start + (end - start) * i / steps
+            self.loop.post_mouse_event('motion', pos)
+            self.loop.step()
+        self.loop.post_mouse_event('up', end)
+        self.loop.settle()
+
+    def type(self, text):
+        for char in text:
+            self.loop.post_key_event('down', ord(char), 0, char)
+            self.loop.step()
+        self.loop.settle()
+
+
+def scenario_launcher(harness):
+    """Boot and show the launcher"""
+    harness.boot()
+
+
+def scenario_contacts(harness):
+    """Open a list of 200 contacts and scroll it up and down"""
+    tichy.Service('Contacts').contacts.extend(
+        PhoneContact(name='contact %d' % i, tel='06%08d' % i)
+        for i in range(200))
+    harness.click(harness.target(harness.find(gui.Button, 'Contacts')))
+    for i in range(3):
+        harness.drag(Vect(240, 560), Vect(240, 200))
+    for i in range(3):
+        harness.drag(Vect(240, 200), Vect(240, 560))
+
+
+def scenario_typing(harness):
+    """Type some text into a text editor"""
+    text = tichy.Text("")
+    tichy.Service('TextEdit').edit(harness.content_window, text).start()
+    harness.loop.settle()
+    harness.type(u"hello world, this is a benchmark")
+
+
+scenarios = ['launcher', 'contacts', 'typing']
+
+
+def main(names):
+    harness = Harness()
+    profiler = None
+    if options.profile or options.stacks:
+        profiler = DrawProfiler(None, stacks=options.stacks)
+        profiler.attach(harness.screen)
+    print "%-16s %6s %8s %8s %8s %9s %10s %8s" % (
+        'scenario', 'frames', 'mean ms', 'max ms', 'resizes', 'organizes',
+        'pixels', 'objects')
+    for name in names or scenarios:
+        gc.collect()
+        objects = len(gc.get_objects())
+        globals()['scenario_' + name](harness)
+        gc.collect()
+        harness.recorder.report(name, len(gc.get_objects()) - objects)
+        if profiler is not None:
+            profiler.dump()
+    tichy.Persistance.flush()
+    shutil.rmtree(tichy.Persistance.base_path)
+
+
+if __name__ == '__main__':
+    main(args)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+#
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark of the images loading
+
+We show a column of icons, like the rows of the default design lists,
+then switch an image between a few files, like the battery gadget
+does. We print the time taken, the number of image files decoded and
+the statistics of the images cache.
+
+usage : python bench_images.py [rows]
+"""
+
+import os
+import sys
+import time
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, root_dir)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+import tichy
+import tichy.gui as gui
+from tichy.gui import Vect
+from tichy.image_cache import cache
+
+
+class Events(tichy.Object):
+    """A fake events source, we tick the screen ourself"""
+
+    def __init__(self):
+        super(Events, self).__init__()
+        self.events = []
+
+    def wakeup(self):
+        pass
+
+
+class LoadCounter(object):
+    """Count the calls to the painter `surface_from_image`"""
+
+    def __init__(self, painter):
+        self.count = 0
+        cls = type(painter)
+        load = cls.surface_from_image
+        counter = self
+
+        def surface_from_image(self, path, size=None):
+            counter.count += 1
+            return load(self, path, size)
+        cls.surface_from_image = surface_from_image
+
+
+def main(rows):
+    for plugin in ['designs/default', 'styles/style3']:
+        tichy.plugins.import_single(
+            os.path.join(root_dir, 'test/plugins', plugin))
+    style = tichy.Style.find_by_name("cool style").create()
+    painter = gui.Painter((480, 640))
+    # The dummy driver gives a 8 bits display by default
+    painter.surface = pygame.display.set_mode((480, 640), 0, 32)
+    screen = gui.Screen(Events(), painter, style=style)
+    window = gui.Window(screen, modal=False, opaque=True)
+    counter = LoadCounter(painter)
+    apps = os.path.join(root_dir, 'test/plugins/apps')
+    icon = os.path.join(apps, 'contacts/icon.png')
+
+    start = time.time()
+    box = gui.Box(window, axis=1)
+    for i in range(rows):
+        tichy.Image(icon, size=Vect(96, 96)).view(box)
+    screen.tick()
+    print "show %d icons : %.1f ms, %d files loaded" % (
+        rows, (time.time() - start) * 1000, counter.count)
+
+    counter.count = 0
+    paths = [os.path.join(apps, name, 'icon.png')
+             for name in ['contacts', 'dialer', 'messages']]
+    box.destroy()
+    box = gui.Box(window, axis=1)
+    image = tichy.Image(paths[0], size=Vect(96, 96))
+    image.view(box)
+    start = time.time()
+    for i in range(rows):
+        image.path = paths[i % len(paths)]
+        screen.tick()
+    print "switch image %d times : %.1f ms, %d files loaded" % (
+        rows, (time.time() - start) * 1000, counter.count)
+    print "cache :", ', '.join('%s %d' % (k, v) for k, v in
+                               sorted(cache.stats().items()))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 100)
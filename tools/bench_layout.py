@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+#
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark of the layout on the real screens
+
+We boot the same screen as test/tichy with the `Harness` of
+bench_gui.py, and play scenarios that give work to the layout :
+
+  - launcher : boot and show the launcher
+  - contacts : open the list of contacts
+  - rename : rename the contacts shown, one per frame
+  - typing : type some text into the text editor, over the contacts
+
+For every scenario we print the number of widgets on the screen at
+the end, the mean number of widgets resized and organized per frame,
+as reported by the frame scheduler, and the mean time spent in the
+layout per frame. Most of the layout is done by the ticks of the
+windows, before the frames, so we time all the calls to the layout
+of the windows.
+
+usage : python bench_layout.py [nb_contacts]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_gui
+from bench_gui import Harness, tichy, gui, PhoneContact
+
+# Only the python widgets count their layout
+assert gui.Widget.count_layout
+
+
+class LayoutTimer(object):
+    """Measure the time spent in the layout of all the windows"""
+
+    def __init__(self):
+        self.time = 0
+        self.depth = 0      # The number of nested layouts
+        layout = gui.Window.layout
+        timer = self
+
+        def timed_layout(window):
+            # A window also does the layout of its own windows
+            timer.depth += 1
+            start = time.time()
+            try:
+                layout(window)
+            finally:
+                timer.depth -= 1
+            if not timer.depth:
+                timer.time += time.time() - start
+        gui.Window.layout = timed_layout
+
+
+def count_widgets(widget):
+    return 1 + sum(count_widgets(c) for c in widget.children)
+
+
+def scenario_launcher(harness, nb_contacts):
+    harness.boot()
+
+
+def scenario_contacts(harness, nb_contacts):
+    tichy.Service('Contacts').contacts.extend(
+        PhoneContact(name='contact %d' % i, tel='06%08d' % i)
+        for i in range(nb_contacts))
+    harness.click(harness.target(harness.find(gui.Button, 'Contacts')))
+
+
+def scenario_rename(harness, nb_contacts):
+    contacts = tichy.Service('Contacts').contacts
+    for contact in contacts[:10]:
+        contact.name.value = u'%s renamed' % contact.name.value
+        harness.loop.step()
+    harness.loop.settle()
+
+
+def scenario_typing(harness, nb_contacts):
+    text = tichy.Text("")
+    tichy.Service('TextEdit').edit(harness.content_window, text).start()
+    harness.loop.settle()
+    harness.type(u"hello world, this is a benchmark")
+
+
+scenarios = ['launcher', 'contacts', 'rename', 'typing']
+
+
+def main(nb_contacts):
+    harness = Harness()
+    timer = LayoutTimer()
+    print "%-10s %8s %7s %9s %10s %10s" % (
+        'scenario', 'widgets', 'frames', 'resizes', 'organizes',
+        'layout ms')
+    for name in scenarios:
+        timer.time = 0
+        globals()['scenario_' + name](harness, nb_contacts)
+        frames = harness.recorder.frames
+        harness.recorder.frames = []
+        nb_frames = float(max(len(frames), 1))
+
+        def mean(key):
+            return sum(t[key] for t in frames) / nb_frames
+        print "%-10s %8d %7d %9.1f %10.1f %10.2f" % (
+            name, count_widgets(harness.screen), len(frames),
+            mean('resizes'), mean('organizes'),
+            timer.time * 1000 / nb_frames)
+    tichy.Persistance.flush()
+    bench_gui.shutil.rmtree(tichy.Persistance.base_path)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 50)
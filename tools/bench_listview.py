@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+#
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark of the Default design list views updates
+
+We measure the time it takes to update an inbox view when a new
+message is inserted at the top of the inbox, and compare it with a
+full rebuild of the view (what the views used to do). The Default
+design shows the lists of actors with a VirtualList, we measure it
+and the ListView separately for every size. We collect the garbage before
+every measure, so that a collection of the previous views doesn't
+count in it.
+
+usage : python bench_listview.py [size ...]
+"""
+
+import gc
+import os
+import sys
+import time
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, root_dir)
+
+import tichy
+import tichy.gui as gui
+from tichy.gui import Vect
+
+
+def create_inbox(size):
+    inbox = tichy.List()
+    for i in range(size):
+        inbox.append(tichy.Message('%08d' % i, 'message %d' % i, 'in'))
+    return inbox
+
+
+def update(widget):
+    """Do what the window does before drawing"""
+    widget.do_resize()
+    widget.do_organize()
+
+
+def rebuild_list_view(view):
+    """The old way of updating a ListView"""
+    vbox = view.children[0]
+    for c in vbox.children[:]:
+        c.destroy()
+    for item in view.item:
+        item.view(vbox)
+
+
+def rebuild_virtual_list(view):
+    """The old way of updating a VirtualList"""
+    for index in view.views.keys():
+        view.release(index)
+    view.update_window()
+
+
+def main(sizes):
+    for plugin in ['designs/default', 'styles/style3']:
+        tichy.plugins.import_single(
+            os.path.join(root_dir, 'test/plugins', plugin))
+    design = sys.modules['default'].Default
+    style = tichy.Style.find_by_name("cool style").create()
+    root = gui.Widget(None, style=style, min_size=Vect(480, 640))
+    root.size = Vect(480, 640)
+
+    print "%-12s %8s %14s %14s" % ('view', 'size', 'insert (ms)',
+                                  'rebuild (ms)')
+    for cls, virtual, rebuild in (
+            (gui.VirtualList, True, rebuild_virtual_list),
+            (sys.modules['default'].ListView, False, rebuild_list_view)):
+        # We force the design to use the view we measure
+        design.virtual_actor_lists = virtual
+        design.virtual_list_size = 0 if virtual else sys.maxint
+        for size in sizes:
+            inbox = create_inbox(size)
+            view = inbox.actors_view(root)
+            assert isinstance(view, cls)
+            update(root)
+
+            msg = tichy.Message('0123456', 'new message', 'in')
+            gc.collect()
+            t0 = time.time()
+            inbox.insert(0, msg)
+            update(root)
+            insert_time = time.time() - t0
+
+            gc.collect()
+            t0 = time.time()
+            rebuild(view)
+            update(root)
+            rebuild_time = time.time() - t0
+
+            print "%-12s %8d %14.2f %14.2f" % (
+                cls.__name__, size, insert_time * 1000, rebuild_time * 1000)
+            view.destroy()
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or [100, 1000, 10000])
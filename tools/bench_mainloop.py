@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+#
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark of the events loop wakeups and input latency
+
+We run the events loop with a screen showing a button, first doing
+nothing, then clicking the button a few times per second. We measure
+the number of wakeups per second, and the time between a click and
+the end of the tick that handles it and draws its result, with the
+polling loop and with the event driven loop.
+
+The SDL dummy driver has no input file descriptor, so we watch a pipe
+that we write into every time we post a click.
+
+usage : python bench_mainloop.py [seconds]
+"""
+
+import fcntl
+import os
+import sys
+import time
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, root_dir)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import gobject
+import pygame
+
+import tichy
+import tichy.gui as gui
+
+
+def create_screen(loop):
+    for plugin in ['designs/default', 'styles/style3']:
+        tichy.plugins.import_single(
+            os.path.join(root_dir, 'test/plugins', plugin))
+    style = tichy.Style.find_by_name("cool style").create()
+    painter = gui.Painter((480, 640))
+    # The dummy driver gives a 8 bits display by default
+    painter.surface = pygame.display.set_mode((480, 640), 0, 32)
+    screen = gui.Screen(loop, painter, style=style)
+    window = gui.Window(screen, modal=False, opaque=True)
+    vbox = gui.Box(window, axis=1)
+    button = gui.Button(vbox)
+    gui.Spring(vbox, axis=1)
+    label = gui.Label(button, "clicked 0 times")
+
+    def on_clicked(button):
+        label.count += 1
+        label.text = "clicked %d times" % label.count
+    label.count = 0
+    button.connect('clicked', on_clicked)
+    return screen
+
+
+def run(event_driven, duration, clicks):
+    """Run the loop, return (wakeups per second, latencies)"""
+    loop = gui.EventsLoop()
+    loop.event_driven = event_driven
+    read_fd, write_fd = os.pipe()
+    fcntl.fcntl(read_fd, fcntl.F_SETFL, os.O_NONBLOCK)
+    loop.input_fds = [read_fd]
+    screen = create_screen(loop)
+    state = {'posted': None}
+    latencies = []
+
+    def on_tick(loop):
+        # We are called after the screen tick
+        if loop.events and state['posted'] is not None:
+            latencies.append(time.time() - state['posted'])
+            state['posted'] = None
+        # Like SDL reading the X connection
+        try:
+            os.read(read_fd, 64)
+        except OSError:
+            pass
+    loop.connect('tick', on_tick)
+
+    def click(type):
+        pos = (20, 20)
+        pygame.event.post(pygame.event.Event(type, pos=pos, button=1))
+        state['posted'] = time.time()
+        os.write(write_fd, 'x')
+        return False
+
+    for i in range(clicks):
+        start = (i + 0.5) * 1000 * duration / clicks
+        gobject.timeout_add(int(start), click, pygame.MOUSEBUTTONDOWN)
+        gobject.timeout_add(int(start) + 100, click, pygame.MOUSEBUTTONUP)
+    gobject.timeout_add(duration * 1000, loop.quit)
+    loop.run()
+    screen.destroy()
+    os.close(read_fd)
+    os.close(write_fd)
+    return (loop.ticks + loop.input_wakeups) / float(duration), latencies
+
+
+def main(duration):
+    print "%14s %7s %16s %18s %18s" % (
+        'loop', 'clicks', 'wakeups per s', 'mean latency (ms)',
+        'max latency (ms)')
+    for event_driven in [False, True]:
+        for clicks in [0, duration * 2]:
+            rate, latencies = run(event_driven, duration, clicks)
+            if latencies:
+                mean = sum(latencies) / len(latencies) * 1000
+                worst = max(latencies) * 1000
+            else:
+                mean = worst = 0
+            print "%14s %7d %16.1f %18.1f %18.1f" % (
+                'event driven' if event_driven else 'polling', clicks,
+                rate, mean, worst)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 5)
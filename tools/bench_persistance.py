@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+#
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark of the Persistance codecs
+
+We save and load a list of records looking like the messages of
+tichy.message with each registered codec. 'yaml-py' is the pure
+python yaml implementation we used before.
+
+usage : python bench_persistance.py [nb_records]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import yaml
+from tichy.persistance import Persistance, YamlCodec, register_codec
+
+
+class PurePythonYamlCodec(YamlCodec):
+    name = 'yaml-py'
+    extension = '.yaml-py'
+    Loader = yaml.SafeLoader
+    Dumper = yaml.SafeDumper
+
+
+def create_records(nb):
+    return [{'peer': '0123%06d' % i,
+             'text': 'message number %d\nsecond line' % i,
+             'timestamp': 'Tue Oct 14 12:%02d:%02d 2008' % (i / 60 % 60,
+                                                              i % 60),
+             'direction': 'in',
+             'status': 'read'} for i in range(nb)]
+
+
+def main(nb=10000):
+    register_codec(PurePythonYamlCodec())
+    Persistance.base_path = tempfile.mkdtemp()
+    records = create_records(nb)
+    print "%d records" % nb
+    print "%-10s %10s %10s %10s" % ('codec', 'save (ms)', 'load (ms)',
+                                    'size (kB)')
+    try:
+        for codec in ['yaml-py', 'yaml', 'json', 'marshal']:
+            persistance = Persistance('bench', delay=0, codec=codec)
+            t0 = time.time()
+            persistance.save(records)
+            save_time = time.time() - t0
+            t0 = time.time()
+            assert persistance.load() == records
+            load_time = time.time() - t0
+            size = os.path.getsize(persistance._path())
+            print "%-10s %10.1f %10.1f %10.1f" % (
+                codec, save_time * 1000, load_time * 1000, size / 1024.)
+            os.remove(persistance._path())
+    finally:
+        shutil.rmtree(Persistance.base_path)
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
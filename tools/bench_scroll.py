@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+#
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark of the scrolling of a list
+
+We drag a list of messages on the screen, one 8 pixels step per frame,
+and measure the number of frames per second and the number of widgets
+drawn per frame, with and without the blitting of the scrolled
+contents, and with the default choice of the Scrollable. We do it
+with rows that keep their drawing in a surface (the default for the
+buttons) and with rows that are drawn every time. Then we throw the
+list and count the frames of the kinetic motion.
+
+The screen runs on a `HeadlessLoop` with the SDL dummy video driver,
+so we need neither X nor gobject.
+
+usage : python bench_scroll.py [rows]
+"""
+
+import os
+import sys
+import time
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, root_dir)
+
+import tichy
+import tichy.gui as gui
+from tichy.gui import Vect
+
+
+def create_screen(rows, store_surface=True):
+    for plugin in ['designs/default', 'styles/style3']:
+        tichy.plugins.import_single(
+            os.path.join(root_dir, 'test/plugins', plugin))
+    style = tichy.Style.find_by_name("cool style").create()
+    loop = gui.HeadlessLoop()
+    # The buttons use the global loop for their timeouts
+    tichy.mainloop = loop
+    painter = gui.Painter((480, 640), headless=True)
+    screen = gui.Screen(loop, painter, style=style)
+    window = gui.Window(screen, modal=False, opaque=True)
+    messages = tichy.List()
+    for i in range(rows):
+        messages.append(tichy.Message('%08d' % i, 'message %d' % i, 'in'))
+
+    def create_view(parent, message):
+        view = message.create_actor().view(parent)
+        view.store_surface = store_surface
+        return view
+    vlist = gui.VirtualList(window, messages, create_view=create_view,
+                            kinetic=True)
+    return screen, loop, vlist
+
+
+def frame(loop, type=None, pos=None):
+    """Post a mouse event if any and do a frame"""
+    if type is not None:
+        loop.post_mouse_event(type, pos)
+    loop.step()
+
+
+class DrawCounter(object):
+    """Count the calls to the `draw` method of the painters"""
+
+    def __init__(self, painter):
+        self.count = 0
+        self.cls = type(painter)
+        self.draw = self.cls.draw
+
+        def draw(painter, o):
+            self.count += 1
+            return self.draw(painter, o)
+        self.cls.draw = draw
+
+
+def drag(loop, steps):
+    """Drag the list up, return the number of frames per second"""
+    frame(loop, 'down', (240, 600))
+    # We first need to move a bit to start the motion
+    frame(loop, 'motion', (240, 560))
+    t0 = time.time()
+    for i in range(steps):
+        frame(loop, 'motion', (240, 560 - i * 8))
+    fps = steps / (time.time() - t0)
+    frame(loop, 'up', (240, 560 - steps * 8))
+    return fps
+
+
+def throw(loop, vlist):
+    """Throw the list, return the number of frames of the motion"""
+    frame(loop, 'down', (240, 600))
+    for y in [560, 520, 480, 440]:
+        time.sleep(0.01)
+        frame(loop, 'motion', (240, y))
+    frame(loop, 'up', (240, 440))
+    frames = 0
+    while vlist.kinetic_task is not None:
+        time.sleep(0.02)
+        frame(loop)
+        frames += 1
+    return frames
+
+
+def main(rows):
+    print "%d rows" % rows
+    print "%12s %6s %10s %18s" % ('rows surface', 'blit', 'fps',
+                                  'widgets per frame')
+    for store_surface in [True, False]:
+        screen, loop, vlist = create_screen(rows, store_surface)
+        for i in range(3):
+            frame(loop)
+        counter = DrawCounter(screen.painter)
+        # None is the default choice of the Scrollable
+        for blit in [False, True, None]:
+            gui.Scrollable.blit = blit
+            counter.count = 0
+            fps = drag(loop, 200)
+            print "%12s %6s %10.1f %18.1f" % (store_surface, blit, fps,
+                                              counter.count / 200.0)
+            vlist.scroll(0)
+        counter.cls.draw = counter.draw
+    print "kinetic motion : %d frames" % throw(loop, vlist)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 500)
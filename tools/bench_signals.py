@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+#
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Micro benchmark of the tichy.Object signal dispatch
+
+We compare the current `tichy.Object` with the old implementation,
+that used to scan all the listeners to disconnect a connection.
+
+The 'gui mix' case follows the proportions of the signals in the
+bench_gui.py scenarios : for every `Wait`, seven signals are emitted
+without listener and one with a single listener.
+
+usage : python bench_signals.py [nb_iterations]
+"""
+
+import os
+import sys
+from timeit import Timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from types import GeneratorType
+
+from tichy.object import Object
+
+
+class OldObject(object):
+    """The old version of tichy.Object"""
+
+    def __init__(self):
+        self.__listeners = {}
+
+    def connect(self, event, callback, *args):
+        connection = (callback, self, args)
+        self.__listeners.setdefault(event, []).append(connection)
+        return id(connection)
+
+    def disconnect(self, oid):
+        for listener in self.__listeners.itervalues():
+            for connection in listener:
+                if id(connection) == oid:
+                    listener.remove(connection)
+                    return
+        raise Exception("trying to disconnect a bad id")
+
+    def emit(self, event, *args):
+        for callback, obj, extra_args in self.__listeners.get(event, []):
+            eargs = args + extra_args
+            call = callback(obj, *eargs)
+            if type(call) is GeneratorType:
+                pass
+
+
+def callback(obj, *args):
+    pass
+
+
+def populate(obj, nb_events, nb_listeners):
+    """Connect `nb_listeners` callbacks to `nb_events` events"""
+    for i in range(nb_events):
+        for j in range(nb_listeners):
+            obj.connect('event-%d' % i, callback)
+
+
+def bench_emit_no_listener(obj):
+    obj.emit('nothing', 1)
+
+
+def bench_emit(obj):
+    obj.emit('event-0', 1)
+
+
+def bench_wait(obj):
+    # This is what a `Wait` tasklet does when the signal is emitted
+    oid = obj.connect('mouse-motion', callback)
+    obj.emit('mouse-motion', 1)
+    obj.disconnect(oid)
+
+
+def bench_gui_mix(obj):
+    for i in range(7):
+        obj.emit('nothing', 1)
+    obj.emit('event-0', 1)
+    bench_wait(obj)
+
+
+def main(number=10000):
+    print "%-24s %10s %10s" % ('', 'old (us)', 'new (us)')
+    for name, func, nb_events, nb_listeners in [
+        ('emit, no listener', bench_emit_no_listener, 10, 4),
+        ('emit, 4 listeners', bench_emit, 10, 4),
+        ('wait, 10 events', bench_wait, 10, 4),
+        ('wait, 100 events', bench_wait, 100, 4),
+        ('gui mix', bench_gui_mix, 10, 1)]:
+        timers = []
+        for cls in [OldObject, Object]:
+            obj = cls()
+            populate(obj, nb_events, nb_listeners)
+            timers.append(Timer(lambda obj=obj: func(obj)))
+        # We alternate the two versions, so that they both suffer the
+        # same noise
+        times = [min(x) / number * 1e6 for x in zip(*[
+                    [timer.timeit(number) for timer in timers]
+                    for i in range(15)])]
+        print "%-24s %10.2f %10.2f" % ((name, ) + tuple(times))
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
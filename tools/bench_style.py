@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+#
+#    Tichy
+#
+#    copyright 2008 Guillaume Chereau (charlie@openmoko.org)
+#
+#    This file is part of Tichy.
+#
+#    Tichy is free software: you can redistribute it and/or modify it
+#    under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Tichy is distributed in the hope that it will be useful, but
+#    WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#    General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Tichy.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark of the styles resolution
+
+We create rows of buttons with labels in a list frame, the way the
+default design shows the lists, then we select and unselect the rows
+one after the other, like the default design does when we click on an
+item. We print the time taken and the number of style dicts computed
+by `Style.apply`.
+
+usage : python bench_style.py [rows]
+"""
+
+import os
+import sys
+import time
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, root_dir)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import tichy
+import tichy.gui as gui
+from tichy.style import Style
+
+
+class Events(tichy.Object):
+    """A fake events source, we never tick the screen"""
+
+    def wakeup(self):
+        pass
+
+
+class ApplyCounter(object):
+    """Count the style dicts really computed by `Style.apply`"""
+
+    def __init__(self):
+        self.count = 0
+        self.apply = Style._Style__apply
+        counter = self
+
+        def apply(self, *args, **kargs):
+            counter.count += 1
+            return counter.apply(self, *args, **kargs)
+        Style._Style__apply = apply
+
+
+def main(rows):
+    for plugin in ['designs/default', 'styles/style3']:
+        tichy.plugins.import_single(
+            os.path.join(root_dir, 'test/plugins', plugin))
+    style = tichy.Style.find_by_name("cool style").create()
+    painter = gui.Painter((480, 640))
+    screen = gui.Screen(Events(), painter, style=style)
+    window = gui.Window(screen, modal=False, opaque=True)
+    counter = ApplyCounter()
+
+    start = time.time()
+    frame = gui.Frame(window, item=tichy.List())
+    box = gui.Box(frame, axis=1)
+    buttons = []
+    for i in range(rows):
+        button = gui.Button(box)
+        gui.Label(button, "row %d" % i)
+        buttons.append(button)
+    print "create %d rows : %.1f ms, %d style dicts" % (
+        rows, (time.time() - start) * 1000, counter.count)
+
+    counter.count = 0
+    start = time.time()
+    for button in buttons:
+        button.add_tag('selected')
+        button.remove_tag('selected')
+    print "select %d rows : %.1f ms, %d style dicts" % (
+        rows, (time.time() - start) * 1000, counter.count)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 1000)